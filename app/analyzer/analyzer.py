@@ -1,5 +1,10 @@
 import hashlib
+import heapq
+from operator import itemgetter
+from app.analyzer.batch import BatchAnalyzer
+from app.analyzer.matcher import KeywordMatcher
 from app.utils.hash_table import HashTable
+from app.parser.BrowserPool import BrowserPool
 from app.parser.ContentParser import ContentParser
 import openpyxl
 
@@ -11,10 +16,13 @@ class Analyzer:
     Args:
         keywords (list): A list of tuples where each tuple contains a keyword and its associated topic.
         url (str, optional): The URL of the content to analyze. Defaults to an empty string.
+        matcher (KeywordMatcher, optional): A matcher compiled from the same keywords. Defaults to None,
+            in which case it is compiled on the first analysis.
 
     Attributes:
         keywords (list): The list of keyword-topic tuples for analysis.
         url (str): The URL of the content being analyzed.
+        matcher (KeywordMatcher): The compiled matcher used to scan content.
         score (dict): A dictionary to store topic scores.
         frequent_keywords (dict): A dictionary to store frequently occurring keywords and their counts.
 
@@ -28,9 +36,10 @@ class Analyzer:
         load_keywords(keywords): Update the list of keywords for analysis.
     """
 
-    def __init__(self, keywords, url=""):
+    def __init__(self, keywords, url="", matcher=None):
         self.keywords = keywords
         self.url = url
+        self.matcher = matcher
         self.score = {}
         self.frequent_keywords = {}
 
@@ -45,16 +54,14 @@ class Analyzer:
         Args:
             content (str): The content to analyze.
         """
-        for keyword, topic in self.keywords:
-            count = content.lower().count(keyword.lower())
-            if topic not in self.score:
-                self.score[topic] = 0
-            self.score[topic] += count
+        if self.matcher is None:
+            self.matcher = KeywordMatcher(self.keywords)
+        score, frequent_keywords = self.matcher.match(content)
 
-            if count > 0:
-                if keyword not in self.frequent_keywords:
-                    self.frequent_keywords[keyword] = 0
-                self.frequent_keywords[keyword] += count
+        for topic, count in score.items():
+            self.score[topic] = self.score.get(topic, 0) + count
+        for keyword, count in frequent_keywords.items():
+            self.frequent_keywords[keyword] = self.frequent_keywords.get(keyword, 0) + count
 
     def get_score(self, depth=None):
         """
@@ -66,20 +73,10 @@ class Analyzer:
         Returns:
             dict: A dictionary containing topic scores.
         """
-        sorted_keywords = sorted(self.score.items(), key=lambda x: x[1], reverse=True)
-
+        scored = ((topic, score) for topic, score in self.score.items() if score > 0)
         if depth is None:
-            return {k: v for k, v in sorted_keywords if v > 0}
-        else:
-            result = {}
-            count = 0
-            for k, v in sorted_keywords:
-                if v > 0:
-                    result[k] = v
-                    count += 1
-                    if count >= depth:
-                        break
-            return result
+            return dict(sorted(scored, key=itemgetter(1), reverse=True))
+        return dict(heapq.nlargest(depth, scored, key=itemgetter(1)))
 
     def get_frequent_keywords(self):
         """
@@ -113,6 +110,7 @@ class Analyzer:
             keywords (list): A list of tuples where each tuple contains a keyword and its associated topic.
         """
         self.keywords = keywords
+        self.matcher = None
 
 
 
@@ -128,15 +126,19 @@ if __name__ == "__main__":
         column_data.append(cell_value)
     workbook.close()
 
+    pool = BrowserPool(max_size=1)
+    contents = []
     for link in column_data:
-        p = ContentParser(url=link)
-        a = Analyzer(keywords=keywords)
+        p = ContentParser(url=link, pool=pool)
         p.fetch_content()
         p.parse_content()
-        a.analyze_content(p.content)
+        contents.append(p.content)
+    pool.close()
+
+    batch = BatchAnalyzer(keywords=keywords)
+    batch.analyze_contents(contents)
+    for link, score, frequent_keywords in zip(column_data, batch.get_scores(), batch.get_frequent_keywords()):
         print(link)
-        print(a.get_score())
-        print(a.get_frequent_keywords())
-        p.reset()
-        a.reset()
+        print(score)
+        print(frequent_keywords)
         print("\n")
@@ -0,0 +1,162 @@
+import numpy as np
+from scipy import sparse
+
+from app.analyzer.matcher import KeywordMatcher
+
+
+class BatchAnalyzer:
+    """
+    A class for analyzing a batch of contents at once with sparse matrix products.
+
+    The lowercased contents are split into lines, and every distinct line of the batch is scanned once.
+    No keyword can span a line break, so a content's keyword counts are the sum of the counts of its
+    lines. The batch is turned into a sparse document-by-line matrix and a sparse line-by-keyword count
+    matrix. Their product gives the keyword counts of every document, and a product with the
+    keyword-to-topic matrix gives the topic scores. Lines shared between pages, such as menus and
+    footers, are scanned only once per batch. Results match `Analyzer.get_score` and
+    `Analyzer.get_frequent_keywords` for each content.
+
+    Args:
+        keywords (list): A list of tuples where each tuple contains a keyword and its associated topic.
+        matcher (KeywordMatcher, optional): A matcher compiled from the same keywords. Defaults to None,
+            in which case it is compiled from the keywords.
+
+    Attributes:
+        keywords (list): The list of keyword-topic tuples for analysis.
+        matcher (KeywordMatcher): The compiled matcher used to scan content.
+        topic_scores (scipy.sparse.csr_matrix): Keyword hits per document and topic of the last batch.
+        keyword_counts (scipy.sparse.csr_matrix): Counts per document and keyword of the last batch.
+
+    Methods:
+        analyze_contents(contents): Analyze a batch of contents.
+        get_scores(depth=None): Get the topic scores of each content in descending order.
+        get_frequent_keywords(): Get the occurring keywords of each content and their counts.
+        reset(): Reset the results of the last batch.
+    """
+
+    def __init__(self, keywords, matcher=None):
+        self.keywords = keywords
+        self.matcher = matcher if matcher is not None else KeywordMatcher(keywords)
+        self.topic_scores = None
+        self.keyword_counts = None
+
+        matcher = self.matcher
+        topic_index = {topic: index for index, topic in enumerate(matcher.topic_order)}
+        rows, columns = [], []
+        for pattern_id, keyword_ids in enumerate(matcher.pattern_keywords):
+            rows.extend([pattern_id] * len(keyword_ids))
+            columns.extend(keyword_ids)
+        self._pattern_keywords = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, columns)),
+            shape=(len(matcher.patterns), len(matcher.keywords)))
+        self._keyword_topics = sparse.csr_matrix(
+            (np.ones(len(matcher.topics), dtype=np.int64),
+             (np.arange(len(matcher.topics)), [topic_index[topic] for topic in matcher.topics])),
+            shape=(len(matcher.keywords), len(matcher.topic_order)))
+        self._empty_patterns = [pattern_id for pattern_id, pattern in enumerate(matcher.patterns) if not pattern]
+
+        pattern_chars = set("".join(matcher.patterns))
+        self._split_lines = "\n" not in pattern_chars
+        self._separator = "\n" if self._split_lines else next(
+            chr(code) for code in range(1, 0x110000) if chr(code) not in pattern_chars)
+
+    def _count_patterns(self, contents):
+        """
+        Count the non-overlapping occurrences of every pattern in each content.
+
+        Args:
+            contents (list): Lowercased contents.
+
+        Returns:
+            scipy.sparse.csr_matrix: Pattern counts per content.
+        """
+        segments, document_rows, segment_columns = {}, [], []
+        for document, content in enumerate(contents):
+            for segment in (content.split("\n") if self._split_lines else (content,)):
+                if segment:
+                    document_rows.append(document)
+                    segment_columns.append(segments.setdefault(segment, len(segments)))
+
+        lengths = np.fromiter((len(segment) for segment in segments), dtype=np.int64, count=len(segments))
+        starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])) if len(segments) else lengths
+        ends, pattern_ids = self.matcher.find(self._separator.join(segments))
+        segment_ids = np.searchsorted(starts, np.asarray(ends, dtype=np.int64) - 1, side="right") - 1
+
+        shape = (len(segments), len(self.matcher.patterns))
+        segment_counts = sparse.csr_matrix((np.ones(len(ends), dtype=np.int64), (segment_ids, pattern_ids)),
+                                           shape=shape)
+        documents = sparse.csr_matrix((np.ones(len(document_rows), dtype=np.int64),
+                                       (document_rows, segment_columns)), shape=(len(contents), len(segments)))
+        counts = documents @ segment_counts
+
+        if self._empty_patterns:
+            # An empty keyword "occurs" between every two characters, as with `str.count`.
+            rows = np.repeat(np.arange(len(contents)), len(self._empty_patterns))
+            columns = np.tile(self._empty_patterns, len(contents))
+            data = np.repeat([len(content) + 1 for content in contents], len(self._empty_patterns))
+            counts = counts + sparse.csr_matrix((data.astype(np.int64), (rows, columns)), shape=counts.shape)
+        return counts
+
+    def analyze_contents(self, contents):
+        """
+        Analyze a batch of contents, replacing the results of the previous batch.
+
+        Args:
+            contents (list): The contents to analyze.
+        """
+        counts = self._count_patterns([content.lower() for content in contents])
+        self.keyword_counts = (counts @ self._pattern_keywords).tocsr()
+        self.topic_scores = (self.keyword_counts @ self._keyword_topics).tocsr()
+        self.keyword_counts.eliminate_zeros()
+        self.topic_scores.eliminate_zeros()
+
+    @staticmethod
+    def _ranked(matrix, names, depth=None):
+        """
+        Rank the positive entries of each row in descending order, keeping the column order for ties.
+
+        Args:
+            matrix (scipy.sparse.csr_matrix): The counts per document.
+            names (list): The name of each column.
+            depth (int, optional): Limit the number of entries per row. Defaults to None.
+
+        Returns:
+            list: A dictionary of names and counts for each row.
+        """
+        if matrix is None:
+            return []
+        results = []
+        for row in range(matrix.shape[0]):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            columns, values = matrix.indices[start:end], matrix.data[start:end]
+            order = np.lexsort((columns, -values))[:depth]
+            results.append({names[column]: value for column, value
+                            in zip(columns[order].tolist(), values[order].tolist())})
+        return results
+
+    def get_scores(self, depth=None):
+        """
+        Get the topic scores of each content of the last batch in descending order.
+
+        Args:
+            depth (int, optional): Limit the number of results to the specified depth. Defaults to None.
+
+        Returns:
+            list: A dictionary of topic scores for each content, as returned by `Analyzer.get_score`.
+        """
+        return self._ranked(self.topic_scores, self.matcher.topic_order, depth)
+
+    def get_frequent_keywords(self):
+        """
+        Get the occurring keywords of each content of the last batch and their counts.
+
+        Returns:
+            list: A dictionary of keyword counts for each content, as returned by
+            `Analyzer.get_frequent_keywords`.
+        """
+        return self._ranked(self.keyword_counts, self.matcher.keywords)
+
+    def reset(self):
+        """Reset the results of the last batch."""
+        self.topic_scores = None
+        self.keyword_counts = None
@@ -0,0 +1,127 @@
+import math
+
+
+class DomainProfile:
+    """
+    A weighted topic profile of a domain, merged from the topic scores of its pages.
+
+    Each page's scores are normalized to shares that sum to one, so long pages do not outvote short
+    ones, and the page is weighted by the logarithm of its keyword hits, so pages with a few incidental
+    matches count less than pages that are clearly about something. Pages without hits add no evidence.
+
+    The profile is stable when the leading topic beats the runner-up with a weighted t-statistic over the
+    per-page share differences of at least `t_threshold`, over at least `min_pages` pages with hits, and the
+    leader has not changed for the last `patience` pages.
+
+    Args:
+        min_pages (int, optional): The minimum number of pages with hits before the profile can be stable.
+            Defaults to 3.
+        patience (int, optional): The number of latest pages during which the leader must not change.
+            Defaults to 2.
+        t_threshold (float, optional): The minimum t-statistic of the lead. Defaults to 2.0.
+
+    Attributes:
+        min_pages (int): The minimum number of pages with hits before the profile can be stable.
+        patience (int): The number of latest pages during which the leader must not change.
+        t_threshold (float): The minimum t-statistic of the lead.
+        pages (int): The number of added pages, with or without hits.
+
+    Methods:
+        add(score): Add the topic scores of a page.
+        get_score(depth=None): Get the weighted topic shares in descending order.
+        lead_statistic(): Get the t-statistic of the lead of the top topic over the runner-up.
+        is_stable(): Check whether more pages are unlikely to change the leading topic.
+    """
+
+    def __init__(self, min_pages=3, patience=2, t_threshold=2.0):
+        self.min_pages = min_pages
+        self.patience = patience
+        self.t_threshold = t_threshold
+        self.pages = 0
+        self._shares = []
+        self._weights = []
+        self._totals = {}
+        self._leaders = []
+
+    def add(self, score):
+        """
+        Add the topic scores of a page.
+
+        Args:
+            score (dict): Keyword hits per topic of the page.
+        """
+        self.pages += 1
+        hits = sum(count for count in score.values() if count > 0)
+        if not hits:
+            return
+        weight = math.log1p(hits)
+        shares = {topic: count / hits for topic, count in score.items() if count > 0}
+        self._shares.append(shares)
+        self._weights.append(weight)
+        for topic, share in shares.items():
+            self._totals[topic] = self._totals.get(topic, 0) + weight * share
+        self._leaders.append(self._top(1)[0])
+
+    def _top(self, depth):
+        """
+        Get the topics with the highest weighted shares.
+
+        Args:
+            depth (int): The number of topics.
+
+        Returns:
+            list: Up to `depth` topics in descending order of weighted share.
+        """
+        return [topic for topic, _ in sorted(self._totals.items(), key=lambda x: x[1], reverse=True)[:depth]]
+
+    def get_score(self, depth=None):
+        """
+        Get the weighted topic shares in descending order.
+
+        Args:
+            depth (int, optional): Limit the number of results to the specified depth. Defaults to None.
+
+        Returns:
+            dict: The weighted share of each topic in the domain; the shares sum to one.
+        """
+        total_weight = sum(self._weights)
+        ranked = sorted(self._totals.items(), key=lambda x: x[1], reverse=True)
+        if depth is not None:
+            ranked = ranked[:depth]
+        return {topic: total / total_weight for topic, total in ranked}
+
+    def lead_statistic(self):
+        """
+        Get the t-statistic of the lead of the top topic over the runner-up.
+
+        The statistic is the weighted mean of the per-page share differences between the two topics divided
+        by its standard error, using the effective sample size of the page weights.
+
+        Returns:
+            float: The t-statistic, infinite if every page agrees exactly, or 0 with fewer than two pages.
+        """
+        if len(self._shares) < 2:
+            return 0.0
+        top = self._top(2)
+        first, second = top[0], top[1] if len(top) > 1 else None
+        differences = [shares.get(first, 0) - shares.get(second, 0) for shares in self._shares]
+        total_weight = sum(self._weights)
+        mean = sum(w * d for w, d in zip(self._weights, differences)) / total_weight
+        variance = sum(w * (d - mean) ** 2 for w, d in zip(self._weights, differences)) / total_weight
+        effective_pages = total_weight ** 2 / sum(w * w for w in self._weights)
+        if variance == 0:
+            return math.inf if mean > 0 else 0.0
+        return mean / math.sqrt(variance / effective_pages)
+
+    def is_stable(self):
+        """
+        Check whether more pages are unlikely to change the leading topic.
+
+        Returns:
+            bool: True if enough pages agree on the leader and its lead is statistically significant.
+        """
+        if len(self._shares) < max(self.min_pages, self.patience):
+            return False
+        if len(set(self._leaders[-self.patience:])) > 1:
+            return False
+        return self.lead_statistic() >= self.t_threshold
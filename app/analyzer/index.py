@@ -0,0 +1,396 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+from array import array
+
+from app.analyzer.matcher import KeywordMatcher
+from app.utils.hash_table import HashTable
+
+KEYWORDS_FILE = "app/data/data.json"
+CATEGORIES_FILE = "app/data/categories.json"
+INDEX_FILE = "app/data/keywords.idx"
+
+MAGIC = b"WRAINDEX"
+# Bump whenever the layout of the index or the compiled automaton changes.
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_ALIGNMENT = 8
+_STRING_SECTIONS = ("keywords", "topics", "patterns", "category_keys", "category_values")
+_VERSION_RE = re.compile(r"[0-9a-f]{12}")
+
+
+class KeywordIndex:
+    """
+    The keyword table, the category table and the compiled keyword matcher, loaded together.
+
+    Args:
+        keywords (HashTable): The (keyword, topic) table.
+        categories (HashTable): The (topic, category) table.
+        matcher (KeywordMatcher): The matcher compiled from the keywords.
+        version (str): The version of the keyword and category sources.
+        source (str): "index" if loaded from the binary index, "json" if compiled from the JSON sources.
+
+    Attributes:
+        keywords (HashTable): The (keyword, topic) table.
+        categories (HashTable): The (topic, category) table.
+        matcher (KeywordMatcher): The matcher compiled from the keywords.
+        version (str): The version of the keyword and category sources; changes whenever either does.
+        source (str): "index" if loaded from the binary index, "json" if compiled from the JSON sources.
+    """
+
+    def __init__(self, keywords, categories, matcher, version, source):
+        self.keywords = keywords
+        self.categories = categories
+        self.matcher = matcher
+        self.version = version
+        self.source = source
+
+
+def source_hashes(keywords_file, categories_file):
+    """
+    Hash the JSON sources of a keyword index.
+
+    Args:
+        keywords_file (str): The JSON file of (keyword, topic) pairs.
+        categories_file (str): The JSON file of (topic, category) pairs.
+
+    Returns:
+        dict: The SHA-256 hex digest of each source file.
+    """
+    hashes = {}
+    for name, path in (("keywords", keywords_file), ("categories", categories_file)):
+        with open(path, "rb") as file:
+            hashes[name] = hashlib.sha256(file.read()).hexdigest()
+    return hashes
+
+
+def index_version(hashes):
+    """
+    Get the version of a keyword index from the hashes of its sources and the index format.
+
+    Args:
+        hashes (dict): The SHA-256 hex digest of each source file.
+
+    Returns:
+        str: A short version string.
+    """
+    digest = hashlib.sha256(f"{FORMAT_VERSION}:{hashes['keywords']}:{hashes['categories']}".encode())
+    return digest.hexdigest()[:12]
+
+
+def _load_json(keywords_file, categories_file, hashes):
+    """
+    Load the keyword and category tables from their JSON sources and compile the matcher.
+
+    Args:
+        keywords_file (str): The JSON file of (keyword, topic) pairs.
+        categories_file (str): The JSON file of (topic, category) pairs.
+        hashes (dict): The SHA-256 hex digest of each source file.
+
+    Returns:
+        KeywordIndex: The loaded index.
+    """
+    keywords, categories = HashTable(), HashTable()
+    keywords.load(keywords_file)
+    categories.load(categories_file)
+    return KeywordIndex(keywords, categories, KeywordMatcher(keywords), index_version(hashes), "json")
+
+
+def build_index(keywords_file=KEYWORDS_FILE, categories_file=CATEGORIES_FILE, index_file=INDEX_FILE):
+    """
+    Compile the keyword and category tables and the matcher automaton into a binary index file.
+
+    The file starts with a magic number, the format version and a JSON header holding the source hashes
+    and the position of each section. The integer tables of the automaton and the NUL-separated string
+    lists follow as 8-byte aligned sections that a loader can map without parsing. The file is replaced
+    atomically, so processes never see a partially written index.
+
+    Args:
+        keywords_file (str, optional): The JSON file of (keyword, topic) pairs. Defaults to KEYWORDS_FILE.
+        categories_file (str, optional): The JSON file of (topic, category) pairs. Defaults to CATEGORIES_FILE.
+        index_file (str, optional): The index file to write. Defaults to INDEX_FILE.
+
+    Returns:
+        str: The version of the written index.
+
+    Raises:
+        ValueError: If a keyword, topic or category contains a NUL character.
+    """
+    hashes = source_hashes(keywords_file, categories_file)
+    loaded = _load_json(keywords_file, categories_file, hashes)
+    matcher = loaded.matcher
+    topic_index = {topic: index for index, topic in enumerate(matcher.topic_order)}
+    goto_keys, goto_states, fail, output_offsets, output_patterns = matcher.tables()
+    pattern_offsets, pattern_ids = [0], []
+    for keyword_ids in matcher.pattern_keywords:
+        pattern_ids.extend(keyword_ids)
+        pattern_offsets.append(len(pattern_ids))
+
+    strings = {
+        "keywords": matcher.keywords,
+        "topics": matcher.topic_order,
+        "patterns": matcher.patterns,
+        "category_keys": [key for key, _ in loaded.categories],
+        "category_values": [value for _, value in loaded.categories],
+    }
+    sections = {name: ("B", "\0".join(values).encode("utf-8")) for name, values in strings.items()}
+    if any("\0" in value for values in strings.values() for value in values):
+        raise ValueError("Keywords, topics and categories must not contain NUL characters")
+    sections.update({
+        "keyword_topics": ("i", array("i", (topic_index[topic] for topic in matcher.topics)).tobytes()),
+        "pattern_offsets": ("i", array("i", pattern_offsets).tobytes()),
+        "pattern_keywords": ("i", array("i", pattern_ids).tobytes()),
+        "goto_keys": ("q", array("q", goto_keys).tobytes()),
+        "goto_states": ("i", array("i", goto_states).tobytes()),
+        "fail": ("i", array("i", fail).tobytes()),
+        "output_offsets": ("i", array("i", output_offsets).tobytes()),
+        "output_patterns": ("i", array("i", output_patterns).tobytes()),
+    })
+
+    layout, offset = {}, 0
+    for name, (typecode, data) in sections.items():
+        layout[name] = [offset, len(data), typecode]
+        offset += -(-len(data) // _ALIGNMENT) * _ALIGNMENT
+    header = {
+        "version": loaded.version,
+        "sources": hashes,
+        "byteorder": sys.byteorder,
+        "counts": {name: len(values) for name, values in strings.items()},
+        "sections": layout,
+    }
+    metadata = json.dumps(header).encode("utf-8")
+    metadata += b" " * (-(_HEADER.size + len(metadata)) % _ALIGNMENT)
+
+    temporary_file = f"{index_file}.{os.getpid()}.tmp"
+    with open(temporary_file, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata)))
+        file.write(metadata)
+        for _, data in sections.values():
+            file.write(data)
+            file.write(b"\0" * (-len(data) % _ALIGNMENT))
+    os.replace(temporary_file, index_file)
+    return loaded.version
+
+
+def _read_index(index_file, hashes=None, version=None):
+    """
+    Map a binary index file and rebuild the tables and the matcher from it.
+
+    Loading skips compiling the automaton, but most of the index is still copied into each process: the
+    keyword and category HashTables, the transition dict and the per-state output tuples are rebuilt on
+    the heap from the mapped sections (about 4 MiB for the bundled keywords). Only the failure links stay
+    in the shared read-only mapping, so every process on the host shares those pages alone.
+
+    Args:
+        index_file (str): The index file.
+        hashes (dict, optional): The SHA-256 hex digest of each current source file, to check that the
+            index was built from them. Defaults to None (not checked).
+        version (str, optional): The version the index must have. Defaults to None (any).
+
+    Returns:
+        KeywordIndex: The loaded index.
+
+    Raises:
+        ValueError: If the index is not a valid index of the current format, sources and version.
+    """
+    with open(index_file, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapping) < _HEADER.size:
+        raise ValueError("truncated index")
+    magic, format_version, metadata_length = _HEADER.unpack_from(mapping)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError(f"unsupported index format {format_version}")
+    header = json.loads(mapping[_HEADER.size:_HEADER.size + metadata_length])
+    if (hashes is not None and header["sources"] != hashes) or header["byteorder"] != sys.byteorder:
+        raise ValueError("index is stale")
+    if version is not None and header["version"] != version:
+        raise ValueError(f"index has version {header['version']}, expected {version}")
+
+    base = _HEADER.size + metadata_length
+    view = memoryview(mapping)
+    sections = {}
+    for name, (offset, length, typecode) in header["sections"].items():
+        if base + offset + length > len(mapping):
+            raise ValueError("truncated index")
+        sections[name] = view[base + offset:base + offset + length].cast(typecode)
+
+    strings = {}
+    for name in _STRING_SECTIONS:
+        values = bytes(sections[name]).decode("utf-8").split("\0")
+        strings[name] = values if header["counts"][name] else []
+
+    topic_order = strings["topics"]
+    topics = [topic_order[index] for index in sections["keyword_topics"]]
+    keywords, categories = HashTable(), HashTable()
+    for keyword, topic in zip(strings["keywords"], topics):
+        keywords.insert(keyword, topic)
+    for key, value in zip(strings["category_keys"], strings["category_values"]):
+        categories.insert(key, value)
+
+    pattern_offsets, pattern_ids = sections["pattern_offsets"], sections["pattern_keywords"]
+    pattern_keywords = [pattern_ids[pattern_offsets[i]:pattern_offsets[i + 1]].tolist()
+                        for i in range(len(pattern_offsets) - 1)]
+    output_offsets, output_patterns = sections["output_offsets"], sections["output_patterns"]
+    outputs = [output_patterns[start:end] if start != end else ()
+               for start, end in zip(output_offsets, output_offsets[1:])]
+    matcher = KeywordMatcher.restore(strings["keywords"], topics, strings["patterns"], pattern_keywords,
+                                     dict(zip(sections["goto_keys"], sections["goto_states"])),
+                                     sections["fail"], outputs)
+    return KeywordIndex(keywords, categories, matcher, header["version"], "index")
+
+
+def pinned_index_file(index_file, version):
+    """
+    Get the path of the copy of an index file pinned to one version.
+
+    Args:
+        index_file (str): The index file.
+        version (str): The version of the index.
+
+    Returns:
+        str: The path of the pinned copy, e.g. "app/data/keywords.0123456789ab.idx".
+    """
+    root, extension = os.path.splitext(index_file)
+    return f"{root}.{version}{extension}"
+
+
+def pin_index(keywords_file=KEYWORDS_FILE, categories_file=CATEGORIES_FILE, index_file=INDEX_FILE):
+    """
+    Make sure the index of the current sources exists as a pinned copy, and refresh `index_file` with it.
+
+    A pinned copy is never modified, so a process loading a version by name gets exactly that version,
+    whatever happened to the sources and to `index_file` since. The copy is taken from `index_file` if
+    that is up to date, and compiled otherwise.
+
+    Args:
+        keywords_file (str, optional): The JSON file of (keyword, topic) pairs. Defaults to KEYWORDS_FILE.
+        categories_file (str, optional): The JSON file of (topic, category) pairs. Defaults to CATEGORIES_FILE.
+        index_file (str, optional): The index file. Defaults to INDEX_FILE.
+
+    Returns:
+        str: The pinned version.
+    """
+    hashes = source_hashes(keywords_file, categories_file)
+    version = index_version(hashes)
+    pinned_file = pinned_index_file(index_file, version)
+    if os.path.exists(pinned_file):
+        return version
+
+    temporary_file = f"{pinned_file}.{os.getpid()}.tmp"
+    try:
+        _read_index(index_file, hashes, version)
+        shutil.copyfile(index_file, temporary_file)
+        os.replace(temporary_file, pinned_file)
+    except (OSError, ValueError, KeyError, IndexError, TypeError, struct.error):
+        built = build_index(keywords_file, categories_file, pinned_file)
+        if built != version:
+            # A source file changed while the index was being built.
+            os.replace(pinned_file, pinned_index_file(index_file, built))
+            version, pinned_file = built, pinned_index_file(index_file, built)
+        shutil.copyfile(pinned_file, temporary_file)
+        os.replace(temporary_file, index_file)
+    return version
+
+
+def prune_pinned(index_file, keep=3):
+    """
+    Remove the oldest pinned copies of an index file.
+
+    Args:
+        index_file (str): The index file.
+        keep (int, optional): The number of most recently pinned copies to keep. Defaults to 3.
+
+    Returns:
+        int: The number of removed copies.
+    """
+    root, extension = os.path.splitext(index_file)
+    directory, prefix = os.path.split(root)
+    directory = directory or "."
+    pinned = []
+    for name in os.listdir(directory):
+        if (name.startswith(prefix + ".") and name.endswith(extension)
+                and _VERSION_RE.fullmatch(name[len(prefix) + 1:len(name) - len(extension)])):
+            path = os.path.join(directory, name)
+            try:
+                pinned.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                pass
+    pinned.sort(reverse=True)
+    removed = 0
+    for _, path in pinned[keep:]:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def load_pinned_index(keywords_file, categories_file, index_file, version):
+    """
+    Load exactly one version of the keyword index.
+
+    The pinned copy of the version is used. Without one, e.g. if it could not be written, the index is
+    loaded as `load_index` does and accepted only if it has the requested version.
+
+    Args:
+        keywords_file (str): The JSON file of (keyword, topic) pairs.
+        categories_file (str): The JSON file of (topic, category) pairs.
+        index_file (str): The index file.
+        version (str): The version to load.
+
+    Returns:
+        KeywordIndex: The loaded index.
+
+    Raises:
+        ValueError: If the version is not available.
+    """
+    try:
+        return _read_index(pinned_index_file(index_file, version), version=version)
+    except FileNotFoundError:
+        pass
+    index = load_index(keywords_file, categories_file, index_file)
+    if index.version != version:
+        raise ValueError(f"Keyword index version {version} is not available, found {index.version}")
+    return index
+
+
+def load_index(keywords_file=KEYWORDS_FILE, categories_file=CATEGORIES_FILE, index_file=INDEX_FILE):
+    """
+    Load the keyword index, falling back to the JSON sources when the binary index is missing or stale.
+
+    The binary index makes loading faster, not smaller: each process holds its own copy of the tables and
+    the transitions, see `_read_index`.
+
+    Args:
+        keywords_file (str, optional): The JSON file of (keyword, topic) pairs. Defaults to KEYWORDS_FILE.
+        categories_file (str, optional): The JSON file of (topic, category) pairs. Defaults to CATEGORIES_FILE.
+        index_file (str, optional): The binary index file. Defaults to INDEX_FILE.
+
+    Returns:
+        KeywordIndex: The loaded index.
+    """
+    hashes = source_hashes(keywords_file, categories_file)
+    try:
+        return _read_index(index_file, hashes)
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError, IndexError, TypeError, struct.error) as e:
+        logging.warning(f"Ignoring keyword index {index_file}: {str(e)}")
+    return _load_json(keywords_file, categories_file, hashes)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compile the keyword index loaded by the workers.")
+    arg_parser.add_argument("--keywords", default=KEYWORDS_FILE, help="JSON file of keyword -> topic pairs")
+    arg_parser.add_argument("--categories", default=CATEGORIES_FILE, help="JSON file of topic -> category pairs")
+    arg_parser.add_argument("--output", default=INDEX_FILE, help="the index file to write")
+    args = arg_parser.parse_args()
+    print(f"Built keyword index {args.output} version {build_index(args.keywords, args.categories, args.output)}")
@@ -0,0 +1,275 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    A compiled multi-keyword matcher based on the Aho-Corasick automaton.
+
+    The automaton is built once from a keyword set and then scores a page in a single pass over its
+    lowercased content. Counts follow the semantics of `str.count`: occurrences of the same keyword
+    never overlap, while different keywords are counted independently.
+
+    Args:
+        keywords (iterable): An iterable of (keyword, topic) tuples, e.g. a HashTable.
+
+    Attributes:
+        keywords (list): The keywords in iteration order.
+        topics (list): The topic of each keyword, aligned with `keywords`.
+        topic_order (list): Distinct topics in the order they first appear in the keyword set.
+        patterns (list): Distinct lowercased keywords that the automaton matches.
+        pattern_keywords (list): For each pattern, the indexes of the keywords sharing it.
+
+    Methods:
+        count(content): Count non-overlapping occurrences of every pattern in the content.
+        find(content): Find the non-overlapping occurrences of every non-empty pattern in the content.
+        match_vectors(content): Get topic scores and keyword counts for the content as vectors.
+        match(content): Get topic scores and keyword counts for the content.
+        tables(): Get the compiled automaton as flat integer tables.
+        restore(...): Rebuild a matcher from its keywords and compiled automaton.
+    """
+
+    # Transitions are stored in one flat dict keyed by (state << _SHIFT) | ord(char).
+    _SHIFT = 21
+
+    def __init__(self, keywords):
+        self.keywords = []
+        self.topics = []
+        self.topic_order = []
+        self.patterns = []
+        self.pattern_keywords = []
+
+        seen_topics, pattern_index = set(), {}
+        for keyword, topic in keywords:
+            self.keywords.append(keyword)
+            self.topics.append(topic)
+            if topic not in seen_topics:
+                seen_topics.add(topic)
+                self.topic_order.append(topic)
+            pattern = keyword.lower()
+            if pattern not in pattern_index:
+                pattern_index[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+                self.pattern_keywords.append([])
+            self.pattern_keywords[pattern_index[pattern]].append(len(self.keywords) - 1)
+
+        self._build()
+
+    def _build(self):
+        """
+        Build the trie, the failure links and the merged output lists.
+        """
+        shift = self._SHIFT
+        goto, fail, outputs, depth = {}, [0], [[]], [0]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                key = (state << shift) | ord(char)
+                next_state = goto.get(key)
+                if next_state is None:
+                    next_state = len(fail)
+                    goto[key] = next_state
+                    fail.append(0)
+                    outputs.append([])
+                    depth.append(depth[state] + 1)
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        children = [[] for _ in fail]
+        for key, child in goto.items():
+            children[key >> shift].append((key & ((1 << shift) - 1), child))
+
+        queue = deque(child for _, child in children[0])
+        while queue:
+            state = queue.popleft()
+            for code, child in children[state]:
+                queue.append(child)
+                fallback = fail[state]
+                while True:
+                    target = goto.get((fallback << shift) | code)
+                    if target is not None and target != child:
+                        fail[child] = target
+                        break
+                    if fallback == 0:
+                        fail[child] = 0
+                        break
+                    fallback = fail[fallback]
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._set_automaton(goto, fail, outputs)
+
+    def _set_automaton(self, goto, fail, outputs):
+        """
+        Install the transitions, failure links and output lists of the automaton.
+
+        Args:
+            goto (dict): The transitions, keyed by (state << _SHIFT) | ord(char).
+            fail (sequence): The failure link of each state.
+            outputs (iterable): The indexes of the patterns ending in each state.
+        """
+        self._goto = goto
+        self._fail = fail
+        lengths = [len(pattern) for pattern in self.patterns]
+        self._outputs = [tuple([(pattern_id, lengths[pattern_id]) for pattern_id in output]) if output else ()
+                         for output in outputs]
+        self._alphabet = frozenset(map(chr, {key & ((1 << self._SHIFT) - 1) for key in goto}))
+
+    def tables(self):
+        """
+        Get the compiled automaton as flat integer tables, e.g. to store it in a keyword index.
+
+        Returns:
+            Tuple[list, list, list, list, list]: The transition keys, the target state of each transition,
+            the failure link of each state, the offset of each state's outputs (plus the end offset) and
+            the concatenated output pattern indexes.
+        """
+        output_offsets, output_patterns = [0], []
+        for output in self._outputs:
+            output_patterns.extend(pattern_id for pattern_id, _ in output)
+            output_offsets.append(len(output_patterns))
+        return list(self._goto), list(self._goto.values()), list(self._fail), output_offsets, output_patterns
+
+    @classmethod
+    def restore(cls, keywords, topics, patterns, pattern_keywords, goto, fail, outputs):
+        """
+        Rebuild a matcher from its keywords and compiled automaton without compiling it again.
+
+        Args:
+            keywords (list): The keywords in iteration order.
+            topics (list): The topic of each keyword.
+            patterns (list): Distinct lowercased keywords.
+            pattern_keywords (list): For each pattern, the indexes of the keywords sharing it.
+            goto (dict): The transitions, keyed by (state << _SHIFT) | ord(char).
+            fail (sequence): The failure link of each state.
+            outputs (iterable): The indexes of the patterns ending in each state.
+
+        Returns:
+            KeywordMatcher: The matcher.
+        """
+        matcher = cls.__new__(cls)
+        matcher.keywords = keywords
+        matcher.topics = topics
+        matcher.topic_order = list(dict.fromkeys(topics))
+        matcher.patterns = patterns
+        matcher.pattern_keywords = pattern_keywords
+        matcher._set_automaton(goto, fail, outputs)
+        return matcher
+
+    def count(self, content):
+        """
+        Count non-overlapping occurrences of every pattern in the content.
+
+        Args:
+            content (str): Lowercased content to scan.
+
+        Returns:
+            list: Occurrence counts aligned with `patterns`.
+        """
+        shift, goto, fail, outputs, alphabet = self._SHIFT, self._goto, self._fail, self._outputs, self._alphabet
+        counts = [0] * len(self.patterns)
+        last_end = [0] * len(self.patterns)
+        state = 0
+
+        for position, char in enumerate(content, 1):
+            if char not in alphabet:
+                state = 0
+                continue
+            code = ord(char)
+            while True:
+                next_state = goto.get((state << shift) | code)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            for pattern_id, length in outputs[state]:
+                if position - length >= last_end[pattern_id]:
+                    counts[pattern_id] += 1
+                    last_end[pattern_id] = position
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                counts[pattern_id] = len(content) + 1
+        return counts
+
+    def find(self, content):
+        """
+        Find the non-overlapping occurrences of every non-empty pattern in the content.
+
+        The occurrences are exactly those counted by `count`, so a content made of several segments
+        joined by a character that no pattern contains yields the occurrences of each segment.
+
+        Args:
+            content (str): Lowercased content to scan.
+
+        Returns:
+            Tuple[list, list]: The end position of each occurrence and the index of its pattern.
+        """
+        shift, goto, fail, outputs, alphabet = self._SHIFT, self._goto, self._fail, self._outputs, self._alphabet
+        last_end = [0] * len(self.patterns)
+        ends, pattern_ids = [], []
+        state = 0
+
+        for position, char in enumerate(content, 1):
+            if char not in alphabet:
+                state = 0
+                continue
+            code = ord(char)
+            while True:
+                next_state = goto.get((state << shift) | code)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            for pattern_id, length in outputs[state]:
+                if position - length >= last_end[pattern_id]:
+                    last_end[pattern_id] = position
+                    ends.append(position)
+                    pattern_ids.append(pattern_id)
+        return ends, pattern_ids
+
+    def match_vectors(self, content):
+        """
+        Get topic scores and keyword counts for the content as vectors.
+
+        Args:
+            content (str): The content to analyze.
+
+        Returns:
+            tuple: A list of topic scores aligned with `topic_order` and a list of keyword counts aligned
+            with `keywords`.
+        """
+        counts = self.count(content.lower())
+        keyword_counts = [0] * len(self.keywords)
+        for pattern_id, count in enumerate(counts):
+            if count:
+                for keyword_id in self.pattern_keywords[pattern_id]:
+                    keyword_counts[keyword_id] = count
+
+        topic_index = {topic: index for index, topic in enumerate(self.topic_order)}
+        topic_counts = [0] * len(self.topic_order)
+        for keyword_id, count in enumerate(keyword_counts):
+            if count:
+                topic_counts[topic_index[self.topics[keyword_id]]] += count
+        return topic_counts, keyword_counts
+
+    def match(self, content):
+        """
+        Get topic scores and keyword counts for the content.
+
+        Args:
+            content (str): The content to analyze.
+
+        Returns:
+            tuple: A dictionary of topic scores (every topic, in keyword order) and a dictionary of
+            keyword counts (only keywords that occur, in keyword order).
+        """
+        topic_counts, keyword_counts = self.match_vectors(content)
+        frequent_keywords = {self.keywords[keyword_id]: count
+                             for keyword_id, count in enumerate(keyword_counts) if count}
+        return dict(zip(self.topic_order, topic_counts)), frequent_keywords
@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+
+from app.analyzer.index import load_index, load_pinned_index, pin_index, prune_pinned
+
+
+class KeywordRegistry:
+    """
+    A versioned registry of the keyword and category tables that can be reloaded while serving requests.
+
+    Readers take the current `KeywordIndex` snapshot, which is never modified; a reload compiles the
+    binary index and loads it in the background and then swaps the snapshot in with a single assignment,
+    so requests never wait for it and never see a half-loaded taxonomy. The data files can be watched
+    for changes, and a failed reload (e.g. a file caught mid-write) keeps the current version.
+
+    Every loaded version is pinned: a copy of its index file named after the version is kept next to
+    `index_file` (see `index.pin_index`), so worker processes can load exactly the registry's version with
+    `index.load_pinned_index`, even after the data files changed. The three most recent copies are kept.
+
+    Args:
+        keywords_file (str): The JSON file of (keyword, topic) pairs.
+        categories_file (str): The JSON file of (topic, category) pairs.
+        index_file (str): The binary keyword index compiled from both files.
+        watch_interval (float, optional): Seconds between checks of the data files for changes, or None
+            to disable watching. Defaults to None.
+
+    Attributes:
+        keywords_file (str): The JSON file of (keyword, topic) pairs.
+        categories_file (str): The JSON file of (topic, category) pairs.
+        index_file (str): The binary keyword index compiled from both files.
+        watch_interval (float): Seconds between checks of the data files for changes.
+        version (str): The version of the current keyword index.
+
+    Methods:
+        current(): Get the current keyword index.
+        reload(): Rebuild and load the keyword index, swapping it in if it changed.
+        reload_async(): Start a reload in a background thread.
+        close(): Stop watching the data files.
+    """
+
+    def __init__(self, keywords_file, categories_file, index_file, watch_interval=None):
+        self.keywords_file = keywords_file
+        self.categories_file = categories_file
+        self.index_file = index_file
+        self.watch_interval = watch_interval
+        self._reload_lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._index = self._load()
+        self._stop = threading.Event()
+        self._thread = None
+        if watch_interval:
+            self._thread = threading.Thread(target=self._watch_loop, name="keyword-watcher", daemon=True)
+            self._thread.start()
+
+    def current(self):
+        """
+        Get the current keyword index.
+
+        Returns:
+            KeywordIndex: The snapshot to use for a whole request.
+        """
+        return self._index
+
+    @property
+    def version(self):
+        """
+        str: The version of the current keyword index.
+        """
+        return self._index.version
+
+    def _file_signature(self):
+        """
+        Get the modification time and size of the data files.
+
+        Returns:
+            tuple: The signature of both files, None for a missing file.
+        """
+        signature = []
+        for path in (self.keywords_file, self.categories_file):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load(self):
+        """
+        Pin the keyword index of the current data files and load that version.
+
+        Returns:
+            KeywordIndex: The loaded index.
+        """
+        try:
+            version = pin_index(self.keywords_file, self.categories_file, self.index_file)
+        except OSError as e:
+            logging.error(f"Error writing keyword index {self.index_file}: {str(e)}")
+            return load_index(self.keywords_file, self.categories_file, self.index_file)
+        return load_pinned_index(self.keywords_file, self.categories_file, self.index_file, version)
+
+    def reload(self):
+        """
+        Rebuild and load the keyword index, swapping it in if the data files changed.
+
+        Returns:
+            KeywordIndex: The current keyword index after the reload.
+        """
+        with self._reload_lock:
+            self._signature = self._file_signature()
+            try:
+                index = self._load()
+            except Exception as e:
+                logging.error(f"Error reloading keywords, keeping version {self.version}: {str(e)}")
+                return self._index
+            if index.version != self._index.version:
+                self._index = index
+                logging.info(f"Keywords reloaded, version {index.version}")
+                try:
+                    prune_pinned(self.index_file)
+                except OSError as e:
+                    logging.error(f"Error removing old keyword indexes: {str(e)}")
+            return self._index
+
+    def reload_async(self):
+        """
+        Start a reload in a background thread unless one is already running.
+
+        Returns:
+            bool: True if a reload was started.
+        """
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, name="keyword-reload", daemon=True).start()
+        return True
+
+    def _watch_loop(self):
+        """
+        Reload the keyword index whenever the data files change, until closed.
+        """
+        while not self._stop.wait(self.watch_interval):
+            if self._file_signature() != self._signature:
+                self.reload()
+
+    def close(self):
+        """
+        Stop watching the data files.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
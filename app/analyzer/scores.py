@@ -0,0 +1,135 @@
+import heapq
+from operator import itemgetter
+
+
+def encode_counts(counts):
+    """
+    Encode a count vector compactly as a flat list of the positions and values of its non-zero entries.
+
+    Args:
+        counts (list): The counts, aligned with a list of names.
+
+    Returns:
+        list: [position, count, position, count, ...] for every non-zero count, in position order.
+    """
+    encoded = []
+    for position, count in enumerate(counts):
+        if count:
+            encoded.append(position)
+            encoded.append(count)
+    return encoded
+
+
+def encode_scores(topic_counts, keyword_counts):
+    """
+    Encode the full topic score and keyword count vectors of a page for the cache.
+
+    Args:
+        topic_counts (list): Topic scores aligned with `KeywordMatcher.topic_order`.
+        keyword_counts (list): Keyword counts aligned with `KeywordMatcher.keywords`.
+
+    Returns:
+        dict: The encoded `topics` and `keywords` vectors.
+    """
+    return {"topics": encode_counts(topic_counts), "keywords": encode_counts(keyword_counts)}
+
+
+class PageScores:
+    """
+    The topic scores and keyword counts of a page, decoded from a cache entry.
+
+    Every view is served from the same vectors: the top topics for any depth and the frequent keywords
+    are selected with a heap, so only the requested entries are ranked.
+
+    Args:
+        topics (list): (topic, score) pairs of the scored topics, in topic order.
+        keywords (list): (keyword, count) pairs of the occurring keywords, in keyword order.
+        categories (HashTable): The (topic, category) table of the keyword index version of the scores.
+
+    Attributes:
+        topics (list): (topic, score) pairs of the scored topics, in topic order.
+        keywords (list): (keyword, count) pairs of the occurring keywords, in keyword order.
+        categories (HashTable): The (topic, category) table of the keyword index version of the scores.
+
+    Methods:
+        decode(entry, index): Decode an encoded entry with the names of its keyword index.
+        get_score(depth=None): Get the topic scores in descending order.
+        get_themes(depth=None): Get the top themes in descending score order.
+        get_frequent_keywords(depth=None): Get the occurring keywords and their counts in descending order.
+    """
+
+    def __init__(self, topics, keywords, categories):
+        self.topics = topics
+        self.keywords = keywords
+        self.categories = categories
+
+    @classmethod
+    def decode(cls, entry, index):
+        """
+        Decode an encoded entry with the names of the keyword index it was computed under.
+
+        Args:
+            entry (dict): The encoded `topics` and `keywords` vectors.
+            index (KeywordIndex): The keyword index of the entry's version.
+
+        Returns:
+            PageScores: The decoded scores.
+        """
+        topic_names, keyword_names = index.matcher.topic_order, index.matcher.keywords
+        topics, keywords = entry["topics"], entry["keywords"]
+        return cls([(topic_names[topics[i]], topics[i + 1]) for i in range(0, len(topics), 2)],
+                   [(keyword_names[keywords[i]], keywords[i + 1]) for i in range(0, len(keywords), 2)],
+                   index.categories)
+
+    @staticmethod
+    def _top(pairs, depth=None):
+        """
+        Rank (name, count) pairs in descending order of count, keeping the original order for ties.
+
+        Args:
+            pairs (list): The (name, count) pairs.
+            depth (int, optional): The number of pairs to select. Defaults to None (all).
+
+        Returns:
+            list: The selected pairs.
+        """
+        if depth is None:
+            return sorted(pairs, key=itemgetter(1), reverse=True)
+        return heapq.nlargest(depth, pairs, key=itemgetter(1))
+
+    def get_score(self, depth=None):
+        """
+        Get the topic scores in descending order, as `Analyzer.get_score` does.
+
+        Args:
+            depth (int, optional): Limit the number of results to the specified depth. Defaults to None.
+
+        Returns:
+            dict: The scores of the top topics.
+        """
+        return dict(self._top(self.topics, depth))
+
+    def get_themes(self, depth=None):
+        """
+        Get the top themes in descending score order.
+
+        Args:
+            depth (int, optional): Limit the number of results to the specified depth. Defaults to None.
+
+        Returns:
+            list: The top themes.
+        """
+        return [topic for topic, _ in self._top(self.topics, depth)]
+
+    def get_frequent_keywords(self, depth=None):
+        """
+        Get the occurring keywords and their counts in descending order, as `Analyzer.get_frequent_keywords`
+        does.
+
+        Args:
+            depth (int, optional): Limit the number of results to the specified depth. Defaults to None.
+
+        Returns:
+            dict: The counts of the most frequent keywords.
+        """
+        return dict(self._top(self.keywords, depth))
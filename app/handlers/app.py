@@ -1,22 +1,49 @@
+import asyncio
+import hmac
+import json
 import logging
-from typing import Dict, List
+import os
+import time
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from app.analyzer.analyzer import Analyzer
-from app.parser import parser, ContentParser
-from app.utils.Cache import Cache
-from app.utils.hash_table import HashTable
+from app.analyzer.domain import DomainProfile
+from app.handlers import service
+from app.handlers.execution import Overloaded
+from app.handlers.service import classify_page, flight_key, format_result, lookup_result, metrics, url_pipeline
+from app.parser import parser
+from app.parser.urls import canonicalize
+from app.utils.JobQueue import JobQueue, LeaseLost
+from app.utils.Metrics import Counter, Gauge
 
-app = FastAPI()
+DOMAIN_MAX_PAGES = int(os.getenv("WRA_DOMAIN_MAX_PAGES", "20"))
+DOMAIN_MIN_PAGES = int(os.getenv("WRA_DOMAIN_MIN_PAGES", "3"))
+DOMAIN_PATIENCE = int(os.getenv("WRA_DOMAIN_PATIENCE", "2"))
+DOMAIN_T_THRESHOLD = float(os.getenv("WRA_DOMAIN_T_THRESHOLD", "2.0"))
+ADMIN_TOKEN = os.getenv("WRA_ADMIN_TOKEN")
+JOB_WORKERS = int(os.getenv("WRA_JOB_WORKERS", "2"))
+JOB_TTL = float(os.getenv("WRA_JOB_TTL", str(7 * 24 * 3600)))
+JOB_LEASE = float(os.getenv("WRA_JOB_LEASE", "60"))
+JOB_POLL_INTERVAL = 1.0
+JOB_RESULTS_BATCH = 50
 
-keywords, categories = HashTable(), HashTable()
-keywords.load("app/data/data.json")
-categories.load("app/data/categories.json")
-cache = Cache(cache_file="app/data/cache.json")
+app = FastAPI()
 logging.basicConfig(filename="app.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+jobs = None
+job_ready = None
+job_workers = []
+running_jobs = {}
+request_seconds = metrics.histogram("wra_request_duration_seconds", "Seconds spent answering HTTP requests.",
+                                    labels=("endpoint",))
+requests_total = metrics.counter("wra_requests_total", "HTTP requests answered, by endpoint and status code.",
+                                 labels=("endpoint", "status"))
+requests_in_flight = metrics.gauge("wra_requests_in_flight", "HTTP requests being answered.")
+requests_in_flight.set(0)
+
 
 class GetPagesRequest(BaseModel):
     url: str
@@ -28,6 +55,450 @@ class GetPagesResponse(BaseModel):
     data: Dict[str, List[str]]
 
 
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+    priority: str = "normal"
+
+
+class CheckUrlsJob(BaseModel):
+    urls: List[str]
+    depth: int = 1
+    keywords: int = 0
+
+
+class CheckDomainJob(BaseModel):
+    url: str
+    depth: int = 1
+    max_pages: int = DOMAIN_MAX_PAGES
+
+
+
+
+async def classify_domain(url, max_pages):
+    """
+    Build the topic profile of a domain from its start page and crawled pages.
+
+    Pages go through the same cached pipeline as /check_urls: cached results are served without a fetch,
+    and new results are stored. They are merged into the profile as they finish, and once the leading
+    topic is statistically stable, the remaining pages are cancelled.
+
+    Args:
+        url (str): The start URL of the domain.
+        max_pages (int): The maximum number of pages to analyze, including the start page.
+
+    Returns:
+        DomainProfile: The merged topic profile of the domain.
+
+    Raises:
+        Overloaded: If a worker pool is full.
+    """
+    crawler = await service.execution.fetch.run(parser.parse_urls, url, max_pages - 1, service.browser_pool,
+                                                service.http_fetcher, service.scheduler)
+    links = list(dict.fromkeys([canonicalize(url) or url] + crawler.site_links))[:max_pages]
+
+    profile = DomainProfile(min_pages=DOMAIN_MIN_PAGES, patience=DOMAIN_PATIENCE, t_threshold=DOMAIN_T_THRESHOLD)
+    results = url_pipeline().stream(links)
+    try:
+        async for _, link, scores, error in results:
+            if isinstance(error, Overloaded):
+                raise error
+            if error is not None:
+                logging.error(f"{link}: Error: {str(error)}")
+                continue
+            profile.add(scores.get_score())
+            if profile.is_stable():
+                break
+    finally:
+        await results.aclose()
+    return profile
+
+
+async def crawl_links(url, depth=1):
+    """
+    Crawl the links of a site starting from a URL.
+
+    Args:
+        url (str): The starting URL.
+        depth (int): The depth to crawl (default is 1).
+
+    Returns:
+        list: The links retrieved.
+    """
+    p = await service.execution.fetch.run(parser.parse_urls, url, depth, service.browser_pool, service.http_fetcher,
+                                          service.scheduler)
+    return p.site_links[:depth]
+
+
+async def domain_result(url, depth=1, max_pages=DOMAIN_MAX_PAGES):
+    """
+    Classify a domain and build its response entry.
+
+    Args:
+        url (str): The URL of the domain.
+        depth (int): The depth for analysis (default is 1).
+        max_pages (int): The maximum number of pages to analyze.
+
+    Returns:
+        Dict: The categories and themes of the domain, the number of analyzed pages and whether the profile
+        was stable.
+    """
+    categories = service.registry.current().categories
+    profile = await classify_domain(url, max(1, max_pages))
+    themes = list(profile.get_score(depth=depth).keys())
+    return {
+        "categories": [categories.get(theme) for theme in themes],
+        "themes": themes,
+        "pages": profile.pages,
+        "stable": profile.is_stable()
+    }
+
+
+def overloaded_response(error):
+    """
+    Build the response for a request shed because a worker pool is full.
+
+    Args:
+        error (Overloaded): The error raised by the full pool.
+
+    Returns:
+        JSONResponse: A 429 Too Many Requests response asking the client to retry.
+    """
+    logging.warning(str(error))
+    return JSONResponse(status_code=429, headers={"Retry-After": "1"},
+                        content={"code": 429, "data": {"error": f"Error: {str(error)}"}})
+
+
+async def result_lines(pipeline, urls, depth, keywords=0):
+    """
+    Yield the response entry of each URL as soon as it is classified.
+
+    Args:
+        pipeline (BatchPipeline): The pipeline processing the batch.
+        urls (list): The URLs to check.
+        depth (int): The depth for analysis.
+        keywords (int): The number of most frequent keywords to include (default is 0).
+
+    Yields:
+        Dict: The input index and either the result or the error for one URL.
+    """
+    async for index, url, data, error in pipeline.stream(urls):
+        try:
+            if error is not None:
+                raise error
+            line = {"index": index, **format_result(url, data, depth, keywords)}
+        except Exception as e:
+            error_message = f"Error: {str(e)}"
+            logging.error(f"{url}: {error_message}")
+            line = {"index": index, "url": url, "error": error_message}
+        yield line
+
+
+async def stream_results(pipeline, urls, depth, keywords=0):
+    """
+    Yield one NDJSON line per URL as soon as it is classified.
+
+    Args:
+        pipeline (BatchPipeline): The pipeline processing the batch.
+        urls (list): The URLs to check.
+        depth (int): The depth for analysis.
+        keywords (int): The number of most frequent keywords to include (default is 0).
+
+    Yields:
+        str: A JSON document with the input index and either the result or the error for one URL.
+    """
+    async for line in result_lines(pipeline, urls, depth, keywords):
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+
+async def run_blocking(function, *args):
+    """
+    Run a blocking job queue operation in the default executor.
+
+    Args:
+        function (callable): The function to run.
+        *args: Positional arguments for the function.
+
+    Returns:
+        The return value of the function.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+async def run_get_pages_job(job_id, url, depth=1):
+    """
+    Crawl the links of a site for a job, storing one result per link.
+
+    Args:
+        job_id (str): The id of the job.
+        url (str): The starting URL.
+        depth (int): The depth to crawl (default is 1).
+    """
+    links = await crawl_links(url, depth)
+    await run_blocking(jobs.set_progress, job_id, 0, len(links))
+    await run_blocking(jobs.add_results, job_id, 0, links)
+
+
+async def run_check_urls_job(job_id, urls, depth=1, keywords=0):
+    """
+    Classify the URLs of a job, storing one result per URL in the order they finish.
+
+    Results are stored in batches of JOB_RESULTS_BATCH, or every JOB_POLL_INTERVAL seconds, so progress and
+    the first results can be polled while the job runs.
+
+    Args:
+        job_id (str): The id of the job.
+        urls (list): The URLs to check.
+        depth (int): The depth for analysis (default is 1).
+        keywords (int): The number of most frequent keywords to include per URL (default is 0).
+    """
+    await run_blocking(jobs.set_progress, job_id, 0, len(urls))
+    done, batch, flushed_at = 0, [], time.monotonic()
+    async for line in result_lines(url_pipeline(), urls, depth, keywords):
+        batch.append(line)
+        if len(batch) >= JOB_RESULTS_BATCH or time.monotonic() - flushed_at >= JOB_POLL_INTERVAL:
+            await run_blocking(jobs.add_results, job_id, done, batch)
+            done, batch, flushed_at = done + len(batch), [], time.monotonic()
+    await run_blocking(jobs.add_results, job_id, done, batch)
+
+
+async def run_check_domain_job(job_id, url, depth=1, max_pages=DOMAIN_MAX_PAGES):
+    """
+    Classify a domain for a job, storing its profile as the single result.
+
+    Args:
+        job_id (str): The id of the job.
+        url (str): The URL of the domain.
+        depth (int): The depth for analysis (default is 1).
+        max_pages (int): The maximum number of pages to analyze.
+    """
+    await run_blocking(jobs.set_progress, job_id, 0, 1)
+    await run_blocking(jobs.add_results, job_id, 0, [await domain_result(url, depth, max_pages)])
+
+
+# Job kinds: the model validating the parameters and the coroutine function running the job.
+JOB_KINDS = {
+    "get_pages": (GetPagesRequest, run_get_pages_job),
+    "check_urls": (CheckUrlsJob, run_check_urls_job),
+    "check_domain": (CheckDomainJob, run_check_domain_job),
+}
+
+
+async def run_job(job):
+    """
+    Run a claimed job, waiting and retrying while a worker pool is full.
+
+    Args:
+        job (dict): The claimed job.
+    """
+    _, runner = JOB_KINDS[job["kind"]]
+    while True:
+        try:
+            return await runner(job["id"], **job["params"])
+        except Overloaded as e:
+            logging.warning(f"Job {job['id']}: {str(e)}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def renew_lease(job_id, task):
+    """
+    Renew the lease of a running job until it ends, and stop the job once the lease is lost.
+
+    The lease is lost when the job is cancelled, possibly through another server process, or when it was
+    reclaimed because this process could not renew it in time.
+
+    Args:
+        job_id (str): The id of the job.
+        task (asyncio.Task): The task running the job.
+    """
+    while True:
+        await asyncio.sleep(JOB_LEASE / 3)
+        try:
+            await run_blocking(jobs.renew, job_id)
+        except LeaseLost as e:
+            logging.warning(str(e))
+            task.cancel()
+            return
+
+
+async def recover_jobs():
+    """
+    Queue the jobs whose lease expired again, once per lease period until the server stops.
+    """
+    while True:
+        recovered = await run_blocking(jobs.recover)
+        if recovered:
+            logging.info(f"Queued {recovered} interrupted jobs again")
+        await asyncio.sleep(JOB_LEASE)
+
+
+async def job_worker():
+    """
+    Claim and run queued jobs one at a time until the server stops.
+
+    A job cancelled through the API is stopped on its next write or lease renewal, without being marked as
+    finished again. Jobs interrupted by a stop keep their running status until their lease expires, and
+    are then queued again by `recover_jobs`.
+    """
+    while True:
+        job_ready.clear()
+        job = await run_blocking(jobs.claim)
+        if job is None:
+            try:
+                await asyncio.wait_for(job_ready.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        task = running_jobs[job["id"]] = asyncio.ensure_future(run_job(job))
+        heartbeat = asyncio.ensure_future(renew_lease(job["id"], task))
+        try:
+            await asyncio.wait({task})
+        finally:
+            heartbeat.cancel()
+            running_jobs.pop(job["id"], None)
+        if task.cancelled():
+            continue
+        error = task.exception()
+        if isinstance(error, LeaseLost):
+            logging.warning(str(error))
+            continue
+        if error is not None:
+            logging.error(f"Job {job['id']}: Error: {str(error)}")
+        await run_blocking(jobs.finish, job["id"], f"Error: {str(error)}" if error is not None else None)
+        await run_blocking(jobs.compact, JOB_TTL)
+
+
+def collect_metrics():
+    """
+    Build the metrics of the state that components count themselves: the cache, the worker pools, the
+    browser pool, coalesced computations and per-host fetch outcomes.
+
+    Returns:
+        list: The metrics, read at scrape time.
+    """
+    cache_stats = service.cache.stats()
+    pool_stats = service.execution.stats()
+    flight_stats = service.flights.stats()
+    host_stats = service.fetch_policy.host_stats()
+    return [
+        Counter.snapshot("wra_cache_hits_total", "Cache hits, by tier.",
+                         {"memory": cache_stats["memory_hits"], "store": cache_stats["store_hits"]}, label="tier"),
+        Counter.snapshot("wra_cache_misses_total", "Cache lookups that found no entry.", cache_stats["misses"]),
+        Counter.snapshot("wra_cache_evictions_total", "Entries evicted from the memory tier.",
+                         cache_stats["evictions"]),
+        Gauge.snapshot("wra_cache_entries", "Entries in the memory tier.", cache_stats["entries"]),
+        Gauge.snapshot("wra_cache_bytes", "Approximate size of the memory tier.", cache_stats["bytes"]),
+        Gauge.snapshot("wra_pool_workers", "Workers of each pool.",
+                       {name: stats["workers"] for name, stats in pool_stats.items()}, label="pool"),
+        Gauge.snapshot("wra_pool_running", "Items running in each pool.",
+                       {name: stats["running"] for name, stats in pool_stats.items()}, label="pool"),
+        Gauge.snapshot("wra_pool_queued", "Items waiting for a worker of each pool.",
+                       {name: stats["queued"] for name, stats in pool_stats.items()}, label="pool"),
+        Counter.snapshot("wra_pool_completed_total", "Items finished by each pool.",
+                         {name: stats["completed"] for name, stats in pool_stats.items()}, label="pool"),
+        Counter.snapshot("wra_pool_rejected_total", "Items rejected because the queue of the pool was full.",
+                         {name: stats["rejected"] for name, stats in pool_stats.items()}, label="pool"),
+        Gauge.snapshot("wra_browser_sessions_max", "Maximum number of browser sessions.",
+                       service.browser_pool.max_size),
+        Gauge.snapshot("wra_browser_sessions_live", "Live browser sessions.", service.browser_pool.live),
+        Gauge.snapshot("wra_browser_sessions_in_use", "Checked out browser sessions.",
+                       service.browser_pool.in_use()),
+        Counter.snapshot("wra_browser_restarts_total", "Browser sessions replaced after a crash.",
+                         service.browser_pool.restarts),
+        Gauge.snapshot("wra_flights_in_flight", "Page computations shared by concurrent requests.",
+                       flight_stats["in_flight"]),
+        Counter.snapshot("wra_flights_coalesced_total", "Requests that joined a computation in flight.",
+                         flight_stats["coalesced"]),
+        Counter.snapshot("wra_host_fetch_attempts_total", "Fetch attempts, by host.",
+                         {host: stats["attempts"] for host, stats in host_stats.items()}, label="host"),
+        Counter.snapshot("wra_host_fetch_errors_total", "Failed fetch attempts, by host.",
+                         {host: stats["errors"] for host, stats in host_stats.items()}, label="host"),
+        Counter.snapshot("wra_host_fetch_rejected_total", "Fetches rejected by an open circuit, by host.",
+                         {host: stats["rejected"] for host, stats in host_stats.items()}, label="host"),
+        Gauge.snapshot("wra_open_circuits", "Hosts whose requests currently fail fast.",
+                       len(service.fetch_policy.open_circuits())),
+    ]
+
+
+metrics.add_collector(collect_metrics)
+
+
+def job_not_found(job_id):
+    """
+    Build the response for an unknown job.
+
+    Args:
+        job_id (str): The requested job id.
+
+    Returns:
+        JSONResponse: A 404 Not Found response.
+    """
+    return JSONResponse(status_code=404, content={"code": 404, "data": {"error": f"Error: Unknown job {job_id}"}})
+
+
+@app.on_event("startup")
+async def startup():
+    """
+    Build the page pipeline and the job queue, remove expired jobs and start the job workers and the
+    recovery of interrupted jobs.
+    """
+    global jobs, job_ready
+    service.start()
+    jobs = JobQueue(db_file="app/data/jobs.db", lease=JOB_LEASE)
+    job_ready = asyncio.Event()
+    jobs.compact(JOB_TTL)
+    job_workers.append(asyncio.ensure_future(recover_jobs()))
+    job_workers.extend(asyncio.ensure_future(job_worker()) for _ in range(JOB_WORKERS))
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """
+    Stop the job workers, the worker pools and the keyword file watcher, quit the pooled browser sessions,
+    close pooled connections and stop cache compaction when the server stops.
+    """
+    for task in list(running_jobs.values()) + job_workers:
+        task.cancel()
+    service.stop()
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """
+    Count the requests in flight and record the latency and status of every request by endpoint.
+
+    Args:
+        request (Request): The request.
+        call_next (callable): Answers the request.
+
+    Returns:
+        Response: The response.
+    """
+    requests_in_flight.inc()
+    started, status = time.perf_counter(), 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        requests_in_flight.dec()
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+        requests_total.inc(endpoint=endpoint, status=status)
+
+
+@app.get('/metrics')
+async def get_metrics():
+    """
+    Get the request, stage latency, cache, pool and per-host metrics in the Prometheus text format.
+
+    Returns:
+        Response: The metrics.
+    """
+    return Response(content=metrics.render(), media_type=metrics.content_type)
+
+
 @app.get('/ping')
 async def ping():
     """
@@ -36,6 +507,40 @@ async def ping():
     return {"message": "pong"}
 
 
+@app.get('/cache_stats')
+async def cache_stats():
+    """
+    Get the hit, miss and eviction counters of the URL result cache.
+
+    Returns:
+        Dict: A dictionary containing the cache counters and the size of the memory tier.
+    """
+    return {"code": 200, "data": service.cache.stats()}
+
+
+@app.post('/admin/reload_keywords')
+async def reload_keywords(x_admin_token: Optional[str] = Header(None)):
+    """
+    Rebuild the keyword index from the data files in the background and swap it in when it is ready.
+
+    Requests keep using the current version until the swap; cached results of the old version are
+    recomputed on their next check.
+
+    Args:
+        x_admin_token (str): The admin token. The endpoint is disabled unless WRA_ADMIN_TOKEN is set.
+
+    Returns:
+        Dict: A dictionary containing the current keyword index version and whether a reload was started.
+    """
+    if not ADMIN_TOKEN:
+        error_message = "Error: Admin endpoints are disabled, set WRA_ADMIN_TOKEN"
+        return JSONResponse(status_code=403, content={"code": 403, "data": {"error": error_message}})
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse(status_code=403, content={"code": 403, "data": {"error": "Error: Invalid admin token"}})
+    started = service.registry.reload_async()
+    return {"code": 200, "data": {"version": service.registry.version, "reloading": started}}
+
+
 @app.get('/get_pages', response_model=GetPagesResponse)
 async def get_pages(request_data: GetPagesRequest):
     """
@@ -50,11 +555,10 @@ async def get_pages(request_data: GetPagesRequest):
         :param request_data:
     """
     try:
-        url = request_data.url
-        depth = request_data.depth
-        p = parser.parse_urls(url, depth)
-        links = p.site_links[:depth]
+        links = await crawl_links(request_data.url, request_data.depth)
         return {"code": 200, "data": {"links": links}}
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         error_message = f"Error: {str(e)}"
         logging.error(error_message)
@@ -62,38 +566,29 @@ async def get_pages(request_data: GetPagesRequest):
 
 
 @app.get("/check_url")
-async def check_url(url: str, depth: int = 1):
+async def check_url(url: str, depth: int = 1, keywords: int = 0):
     """
     Check a single URL for categories and themes.
 
     Args:
         url (str): The URL to check.
         depth (int): The depth for analysis (default is 1).
+        keywords (int): The number of most frequent keywords to include (default is 0).
 
     Returns:
         Dict: A dictionary containing the categories and themes found.
     """
     try:
-        cache.load_cache()
-        cached_data = cache.get_data(url)
-        if cached_data:
-            categories_resp, themes_resp = cached_data
-            categories_resp = categories_resp[:depth]
-            themes_resp = themes_resp[:depth]
-        else:
-            analyzer = Analyzer(keywords=keywords)
-            p = ContentParser.ContentParser(url=url)
-            p.fetch_content()
-            p.parse_content()
-            analyzer.analyze_content(p.content)
-            categories_resp = [categories.get(key) for key in list(analyzer.get_score(depth=depth).keys())]
-            themes_resp = list(analyzer.get_score(depth=depth).keys())
-            cache.set_data(url, [[categories.get(key) for key in list(analyzer.get_score().keys())],
-                                 list(analyzer.get_score(depth=depth).keys())])
-            cache.save_cache()
+        scores = await lookup_result(url)
+        if not scores:
+            scores = await service.flights.do(flight_key("analyze", url), classify_page, url)
+        result = format_result(url, scores, depth, keywords)
+        del result["url"]
         if depth == 1:
-            return {"category": categories_resp[0], "theme": themes_resp[0]}
-        return {"code": 200, "data": {"categories": categories_resp, "themes": themes_resp}}
+            return result
+        return {"code": 200, "data": result}
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         error_message = f"Error: {str(e)}"
         logging.error(error_message)
@@ -101,47 +596,32 @@ async def check_url(url: str, depth: int = 1):
 
 
 @app.post("/check_urls")
-async def check_urls(request_data: Dict[str, List[str]], depth: int = 1):
+async def check_urls(request_data: Dict[str, List[str]], depth: int = 1, stream: bool = False, keywords: int = 0):
     """
     Check multiple URLs for categories and themes.
 
     Args:
         request_data (Dict[str, List[str]]): JSON data with a list of URLs.
         depth (int): The depth for analysis (default is 1).
+        stream (bool): Stream one NDJSON line per URL as soon as it finishes (default is False).
+        keywords (int): The number of most frequent keywords to include per URL (default is 0).
 
     Returns:
-        Dict: A dictionary containing the results for each URL.
+        Dict: A dictionary containing the results for each URL, or an NDJSON stream of per-URL
+        results and errors when `stream` is set.
     """
     try:
         urls = request_data.get("urls", [])
-        results = []
-
-        for url in urls:
-            cache.load_cache()
-            cached_data = cache.get_data(url)
-            if cached_data:
-                categories_resp, themes_resp = cached_data
-                categories_resp = categories_resp[:depth]
-                themes_resp = themes_resp[:depth]
-            else:
-                analyzer = Analyzer(keywords=keywords)
-                p = ContentParser.ContentParser(url=url)
-                p.fetch_content()
-                p.parse_content()
-                analyzer.analyze_content(p.content)
-                categories_resp = [categories.get(key) for key in list(analyzer.get_score(depth=depth).keys())]
-                themes_resp = list(analyzer.get_score(depth=depth).keys())
-                cache.set_data(url, [[categories.get(key) for key in list(analyzer.get_score().keys())],
-                                     list(analyzer.get_score(depth=depth).keys())])
-                cache.save_cache()
-
-            if depth == 1:
-                result = {"url": url, "category": categories_resp[0], "theme": themes_resp[0]}
-            else:
-                result = {"url": url, "categories": categories_resp, "themes": themes_resp}
-            results.append(result)
+        pipeline = url_pipeline()
+        if stream:
+            return StreamingResponse(stream_results(pipeline, urls, depth, keywords),
+                                     media_type="application/x-ndjson")
 
+        results = [format_result(url, scores, depth, keywords)
+                   for url, scores in zip(urls, await pipeline.run(urls))]
         return {"code": 200, "data": results}
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         error_message = f"Error: {str(e)}"
         logging.error(error_message)
@@ -149,29 +629,117 @@ async def check_urls(request_data: Dict[str, List[str]], depth: int = 1):
 
 
 @app.get('/check_domain')
-async def check_domain(url: str, depth: int = 1):
+async def check_domain(url: str, depth: int = 1, max_pages: int = DOMAIN_MAX_PAGES):
     """
     Check a domain for categories and themes based on its linked pages.
 
+    The start page and crawled pages are analyzed concurrently and their topic scores merged into a
+    weighted domain profile. Analysis stops early once the leading topic is statistically stable.
+
     Args:
         url (str): The URL of the domain.
         depth (int): The depth for analysis (default is 1).
+        max_pages (int): The maximum number of pages to analyze.
 
     Returns:
-        Dict: A dictionary containing the categories and themes found in the domain.
+        Dict: A dictionary containing the categories and themes found in the domain, the number of
+        analyzed pages and whether the profile was stable.
     """
     try:
-        results = {"categories": [], "themes": []}
-        p = parser.parse_urls(url, depth)
-        links = p.site_links[:depth]
-        for link in links:
-            result = await check_url(link, depth=depth)
-            results = {
-                "categories": [category for category in result["data"]["categories"]],
-                "themes": [theme for theme in result["data"]["themes"]]
-            }
-        return {"code": 200, "data": results}
+        return {"code": 200, "data": await domain_result(url, depth, max_pages)}
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        error_message = f"Error: {str(e)}"
+        logging.error(error_message)
+        return {"code": 500, "data": {"error": error_message}}
+
+
+@app.post('/jobs')
+async def submit_job(request_data: JobRequest):
+    """
+    Queue a long-running crawl or batch as a background job.
+
+    Args:
+        request_data (JobRequest): The kind of the job ("get_pages", "check_urls" or "check_domain"), the
+            parameters of the matching endpoint and the priority class ("high", "normal" or "low").
+
+    Returns:
+        Dict: A dictionary containing the state of the queued job, including its id.
+    """
+    try:
+        if request_data.kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {request_data.kind}, expected one of {', '.join(JOB_KINDS)}")
+        params = JOB_KINDS[request_data.kind][0](**request_data.params).model_dump()
+        job_id = await run_blocking(jobs.submit, request_data.kind, params, request_data.priority)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"code": 400, "data": {"error": f"Error: {str(e)}"}})
     except Exception as e:
         error_message = f"Error: {str(e)}"
         logging.error(error_message)
         return {"code": 500, "data": {"error": error_message}}
+    job_ready.set()
+    return {"code": 200, "data": await run_blocking(jobs.get, job_id)}
+
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str):
+    """
+    Get the status and progress of a job.
+
+    Args:
+        job_id (str): The id of the job.
+
+    Returns:
+        Dict: A dictionary containing the state of the job.
+    """
+    job = await run_blocking(jobs.get, job_id)
+    if job is None:
+        return job_not_found(job_id)
+    return {"code": 200, "data": job}
+
+
+@app.get('/jobs/{job_id}/results')
+async def get_job_results(job_id: str, offset: int = 0, limit: int = 100):
+    """
+    Get a page of the results of a job. Results are available as soon as they are stored, while the job runs.
+
+    Args:
+        job_id (str): The id of the job.
+        offset (int): The number of results to skip (default is 0).
+        limit (int): The maximum number of results, at most 1000 (default is 100).
+
+    Returns:
+        Dict: A dictionary containing the status and progress of the job, the results of the page and the
+        offset of the next page.
+    """
+    job = await run_blocking(jobs.get, job_id)
+    if job is None:
+        return job_not_found(job_id)
+    offset, limit = max(0, offset), min(max(1, limit), 1000)
+    results = await run_blocking(jobs.get_results, job_id, offset, limit)
+    return {"code": 200, "data": {"status": job["status"], "progress": job["progress"], "offset": offset,
+                                  "results": results, "next_offset": offset + len(results)}}
+
+
+@app.delete('/jobs/{job_id}')
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job. Results stored so far are kept.
+
+    Args:
+        job_id (str): The id of the job.
+
+    Returns:
+        Dict: A dictionary containing the state of the cancelled job.
+    """
+    if not await run_blocking(jobs.cancel, job_id):
+        job = await run_blocking(jobs.get, job_id)
+        if job is None:
+            return job_not_found(job_id)
+        error_message = f"Error: Job {job_id} is already {job['status']}"
+        return JSONResponse(status_code=409, content={"code": 409, "data": {"error": error_message}})
+    task = running_jobs.get(job_id)
+    if task is not None:
+        task.cancel()
+    return {"code": 200, "data": await run_blocking(jobs.get, job_id)}
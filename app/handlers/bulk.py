@@ -0,0 +1,470 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+
+import openpyxl
+import requests
+
+from app.handlers import service
+from app.handlers.execution import Overloaded
+from app.parser.FetchPolicy import RETRYABLE_ERRORS, RETRYABLE_STATUSES, CircuitOpen
+
+FORMATS = {".xlsx": "xlsx", ".csv": "csv", ".txt": "txt", ".jsonl": "jsonl"}
+CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 10
+# Fetch errors that may not happen on a rerun: timeouts (including deadlines and browser checkouts), connection
+# errors and hosts skipped by an open circuit. 429 and 5xx answers are transient as well, see `is_transient`.
+TRANSIENT_ERRORS = RETRYABLE_ERRORS + (TimeoutError, CircuitOpen)
+
+
+def is_transient(error):
+    """
+    Check whether a page failed with an error that may not happen on a rerun.
+
+    Args:
+        error (Exception): The error of the page.
+
+    Returns:
+        bool: True for TRANSIENT_ERRORS and for 429 and 5xx answers.
+    """
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUSES
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def file_format(path, fmt=None):
+    """
+    Get the format of an input or output file from its extension, unless given explicitly.
+
+    Args:
+        path (str): The path of the file.
+        fmt (str, optional): The explicit format. Defaults to None.
+
+    Returns:
+        str: One of "xlsx", "csv", "txt" or "jsonl".
+
+    Raises:
+        ValueError: If the format cannot be derived from the extension.
+    """
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown file format of {path}, pass it explicitly")
+    return FORMATS[extension]
+
+
+def read_urls(path, fmt, sheet=None, column=1, header=True):
+    """
+    Stream the URLs of an input file row by row, without loading the whole file.
+
+    XLSX workbooks are opened in read-only mode, so rows are parsed as they are iterated. Empty cells and
+    lines, and lines of text files starting with '#', are skipped.
+
+    Args:
+        path (str): The input file.
+        fmt (str): The input format: "xlsx", "csv" or "txt".
+        sheet (str, optional): The worksheet of an XLSX workbook. Defaults to the active one.
+        column (int, optional): The 1-based column holding the URLs in XLSX and CSV files. Defaults to 1.
+        header (bool, optional): Skip the first row of XLSX and CSV files. Defaults to True.
+
+    Yields:
+        Tuple[int, str]: The 1-based row or line number in the file and the URL.
+    """
+    if fmt == "xlsx":
+        workbook = openpyxl.load_workbook(path, read_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.active
+            rows = worksheet.iter_rows(min_row=2 if header else 1, min_col=column, max_col=column, values_only=True)
+            for row_number, row in enumerate(rows, 2 if header else 1):
+                if row and row[0] is not None and str(row[0]).strip():
+                    yield row_number, str(row[0]).strip()
+        finally:
+            workbook.close()
+    elif fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row_number, row in enumerate(csv.reader(f), 1):
+                if header and row_number == 1:
+                    continue
+                if len(row) >= column and row[column - 1].strip():
+                    yield row_number, row[column - 1].strip()
+    elif fmt == "txt":
+        with open(path, encoding="utf-8-sig") as f:
+            for row_number, line in enumerate(f, 1):
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield row_number, line
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+
+
+class Checkpoint:
+    """
+    A log of the completed input URLs of a bulk job and the size of the output after each of them.
+
+    Every completed URL appends its sequence number (its position among the input URLs) and the output
+    size, so a rerun skips completed URLs and truncates rows written after the last logged one. URLs left
+    for the next run after a transient error are logged too, and kept in a retry set until they complete.
+    URLs finish out of order, but only within a chunk, so the settled (completed or left for the next run)
+    URLs are kept as a watermark below which every URL is settled plus the few settled URLs above it.
+
+    Args:
+        path (str): The checkpoint file.
+
+    Attributes:
+        path (str): The checkpoint file.
+        watermark (int): The number of leading input URLs that are all settled.
+        completed (int): The number of completed input URLs.
+        offset (int): The size of the output file when the last completed URL was logged.
+        retry (set): The sequence numbers of the URLs left for the next run.
+
+    Methods:
+        is_done(sequence): Check whether an input URL was completed.
+        mark(sequence, offset): Log a completed input URL.
+        defer(sequence): Log an input URL left for the next run.
+        close(): Close the checkpoint file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.watermark = 0
+        self.completed = 0
+        self.offset = 0
+        self.retry = set()
+        self._done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut off by a crash; its row is redone.
+                        break
+                    if entry.get("retry"):
+                        self._defer(entry["seq"])
+                    else:
+                        self._complete(entry["seq"])
+                        self.offset = entry["offset"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _complete(self, sequence):
+        """
+        Count an input URL as completed and settle it, unless it was settled when it was left for a rerun.
+
+        Args:
+            sequence (int): The sequence number of the URL.
+        """
+        self.completed += 1
+        if sequence in self.retry:
+            self.retry.remove(sequence)
+        else:
+            self._settle(sequence)
+
+    def _defer(self, sequence):
+        """
+        Settle an input URL left for the next run and add it to the retry set.
+
+        Args:
+            sequence (int): The sequence number of the URL.
+        """
+        if sequence not in self.retry:
+            self.retry.add(sequence)
+            self._settle(sequence)
+
+    def _settle(self, sequence):
+        """
+        Add a settled input URL to the watermark and the settled set.
+
+        Args:
+            sequence (int): The sequence number of the URL.
+        """
+        self._done.add(sequence)
+        while self.watermark in self._done:
+            self._done.remove(self.watermark)
+            self.watermark += 1
+
+    def is_done(self, sequence):
+        """
+        Check whether an input URL was completed.
+
+        Args:
+            sequence (int): The sequence number of the URL.
+
+        Returns:
+            bool: True if the URL was completed.
+        """
+        return (sequence < self.watermark or sequence in self._done) and sequence not in self.retry
+
+    def mark(self, sequence, offset):
+        """
+        Log a completed input URL after its row was written.
+
+        Args:
+            sequence (int): The sequence number of the URL.
+            offset (int): The size of the output file after its row.
+        """
+        self._complete(sequence)
+        self.offset = offset
+        self._file.write(json.dumps({"seq": sequence, "offset": offset}) + "\n")
+        self._file.flush()
+
+    def defer(self, sequence):
+        """
+        Log an input URL that got no row because of a transient error, so the next run tries it again.
+
+        Args:
+            sequence (int): The sequence number of the URL.
+        """
+        self._defer(sequence)
+        self._file.write(json.dumps({"seq": sequence, "retry": True}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """
+        Close the checkpoint file.
+        """
+        self._file.close()
+
+
+class RowWriter:
+    """
+    Appends result rows to a CSV or JSONL file, flushing every row so a crash loses at most the row being
+    written.
+
+    Args:
+        path (str): The output file.
+        fmt (str): The output format: "csv" or "jsonl".
+        columns (list): The columns of a row.
+        offset (int): The size of the file up to the last completed row; anything after it is truncated.
+
+    Methods:
+        write(row): Append a row and get the new size of the file.
+        close(): Close the file.
+    """
+
+    def __init__(self, path, fmt, columns, offset):
+        self.fmt = fmt
+        self.columns = columns
+        self._file = open(path, "a+", newline="", encoding="utf-8")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        self._csv = csv.writer(self._file) if fmt == "csv" else None
+        if self._csv is not None and offset == 0:
+            self._csv.writerow(columns)
+
+    def write(self, row):
+        """
+        Append a row and flush it.
+
+        Args:
+            row (dict): The values of the row by column.
+
+        Returns:
+            int: The size of the file after the row.
+        """
+        if self._csv is not None:
+            self._csv.writerow([format_cell(row.get(column)) for column in self.columns])
+        else:
+            self._file.write(json.dumps({column: row.get(column) for column in self.columns},
+                                        ensure_ascii=False) + "\n")
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self._file.close()
+
+
+def format_cell(value):
+    """
+    Format a value for a spreadsheet cell: lists are joined with "; " and keyword counts as "keyword: count".
+
+    Args:
+        value: The value of the cell.
+
+    Returns:
+        The cell value.
+    """
+    if isinstance(value, list):
+        return "; ".join("" if item is None else str(item) for item in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{key}: {count}" for key, count in value.items())
+    return value
+
+
+def export_xlsx(rows_file, output, columns):
+    """
+    Convert the JSONL rows of a job into an XLSX workbook, written in write-only mode so rows are not kept
+    in memory.
+
+    Args:
+        rows_file (str): The JSONL file of result rows.
+        output (str): The XLSX file to write.
+        columns (list): The columns of a row.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Results")
+    worksheet.append(columns)
+    with open(rows_file, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            worksheet.append([format_cell(row.get(column)) for column in columns])
+    workbook.save(output + ".tmp")
+    os.replace(output + ".tmp", output)
+
+
+def output_columns(depth, keywords):
+    """
+    Get the columns of a result row.
+
+    Args:
+        depth (int): The depth for analysis.
+        keywords (int): The number of most frequent keywords included.
+
+    Returns:
+        list: The column names.
+    """
+    columns = ["row", "url"] + (["category", "theme"] if depth == 1 else ["categories", "themes"])
+    return columns + (["keywords"] if keywords > 0 else []) + ["error"]
+
+
+def chunks(iterable, size):
+    """
+    Split an iterable into lists of at most `size` items.
+
+    Args:
+        iterable (iterable): The items.
+        size (int): The maximum size of a chunk.
+
+    Yields:
+        list: The next chunk.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def run_job(urls, writer, checkpoint, depth=1, keywords=0, concurrency=service.BATCH_CONCURRENCY,
+                  cpu_concurrency=service.BATCH_CPU_CONCURRENCY, chunk_size=CHUNK_SIZE):
+    """
+    Classify a stream of input URLs and write one row per URL as soon as it finishes.
+
+    URLs go through the same cache, fetch policy, host scheduler and worker pools as `/check_urls`, a chunk
+    at a time so memory stays bounded for any number of rows. Completed URLs are skipped, and every
+    written row is logged in the checkpoint. Pages that fail get a row with their error, so they are not
+    retried on resume, unless the error is transient (see `is_transient`): such pages get no row and are
+    logged for a retry, so the next run tries them again. The components of the pipeline must have been built with
+    `service.start()`.
+
+    Args:
+        urls (iterable): (row number, URL) pairs of the input.
+        writer (RowWriter): The writer of result rows.
+        checkpoint (Checkpoint): The checkpoint of the job.
+        depth (int, optional): The depth for analysis. Defaults to 1.
+        keywords (int, optional): The number of most frequent keywords to include. Defaults to 0.
+        concurrency (int, optional): The maximum number of pages fetched at once.
+        cpu_concurrency (int, optional): The maximum number of pages parsed and analyzed at once.
+        chunk_size (int, optional): The number of input URLs scheduled together. Defaults to CHUNK_SIZE.
+
+    Returns:
+        Tuple[int, int, int]: The number of URLs processed in this run, of URLs that failed and of URLs left
+        for the next run after a transient error.
+
+    Raises:
+        Overloaded: If a worker pool is full; completed URLs are kept and the job can be resumed.
+    """
+    pipeline = service.url_pipeline(concurrency, cpu_concurrency)
+    pending = ((sequence, row_number, url) for sequence, (row_number, url) in enumerate(urls)
+               if not checkpoint.is_done(sequence))
+    processed = failed = deferred = 0
+    started = last_report = time.monotonic()
+    for chunk in chunks(pending, chunk_size):
+        async for index, url, scores, error in pipeline.stream([url for _, _, url in chunk]):
+            if isinstance(error, Overloaded):
+                raise error
+            sequence, row_number, _ = chunk[index]
+            if is_transient(error):
+                print(f"{url}: Error: {str(error)}, left for the next run")
+                checkpoint.defer(sequence)
+                deferred += 1
+                continue
+            row = {"row": row_number, "url": url}
+            try:
+                if error is not None:
+                    raise error
+                row.update(service.format_result(url, scores, depth, keywords))
+            except Exception as e:
+                row["error"] = f"Error: {str(e)}"
+                failed += 1
+            checkpoint.mark(sequence, writer.write(row))
+            processed += 1
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                print(f"Processed {processed} URLs ({failed} failed, {deferred} left for the next run, "
+                      f"{checkpoint.completed} completed in total), "
+                      f"{processed / (last_report - started):.1f} URLs/s")
+    return processed, failed, deferred
+
+
+def main(args):
+    """
+    Run a bulk classification job from the command line arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+    """
+    input_format = file_format(args.input, args.input_format)
+    output_format = file_format(args.output, args.output_format)
+    rows_file = args.output + ".rows.jsonl" if output_format == "xlsx" else args.output
+    columns = output_columns(args.depth, args.keywords)
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint")
+    writer = RowWriter(rows_file, "jsonl" if output_format == "xlsx" else output_format, columns,
+                       checkpoint.offset)
+    if checkpoint.completed:
+        print(f"Resuming after {checkpoint.completed} completed URLs")
+    service.start(watch_keywords=False, compact_cache=False)
+    try:
+        urls = read_urls(args.input, input_format, sheet=args.sheet, column=args.column, header=not args.no_header)
+        processed, failed, deferred = asyncio.run(run_job(urls, writer, checkpoint, depth=args.depth,
+                                                          keywords=args.keywords, concurrency=args.concurrency,
+                                                          cpu_concurrency=args.cpu_concurrency,
+                                                          chunk_size=args.chunk_size))
+    finally:
+        writer.close()
+        checkpoint.close()
+        service.stop()
+    if output_format == "xlsx":
+        export_xlsx(rows_file, args.output, columns)
+    print(f"Processed {processed} URLs ({failed} failed, {deferred} left for the next run), "
+          f"{checkpoint.completed} completed in total: {args.output}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Classify a list of URLs offline, resuming where a previous "
+                                                     "run of the same job stopped.")
+    arg_parser.add_argument("input", help="XLSX, CSV or text file of URLs")
+    arg_parser.add_argument("output", help="CSV, JSONL or XLSX file of results")
+    arg_parser.add_argument("--input-format", choices=["xlsx", "csv", "txt"], help="defaults to the extension")
+    arg_parser.add_argument("--output-format", choices=["csv", "jsonl", "xlsx"], help="defaults to the extension")
+    arg_parser.add_argument("--sheet", help="worksheet of an XLSX input (default is the active one)")
+    arg_parser.add_argument("--column", type=int, default=1, help="1-based column of the URLs in XLSX and CSV")
+    arg_parser.add_argument("--no-header", action="store_true", help="the first XLSX or CSV row is a URL")
+    arg_parser.add_argument("--depth", type=int, default=1, help="number of themes per URL")
+    arg_parser.add_argument("--keywords", type=int, default=0, help="number of most frequent keywords per URL")
+    arg_parser.add_argument("--concurrency", type=int, default=service.BATCH_CONCURRENCY,
+                            help="pages fetched at once")
+    arg_parser.add_argument("--cpu-concurrency", type=int, default=service.BATCH_CPU_CONCURRENCY,
+                            help="pages parsed and analyzed at once")
+    arg_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="input URLs scheduled together")
+    arg_parser.add_argument("--checkpoint", help="checkpoint file (default is OUTPUT.checkpoint)")
+    main(arg_parser.parse_args())
@@ -0,0 +1,170 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """
+    Raised when work is submitted to a pool whose queue is full.
+
+    Attributes:
+        pool (str): The name of the overloaded pool.
+    """
+
+    def __init__(self, pool):
+        super().__init__(f"The {pool} pool is overloaded, try again later")
+        self.pool = pool
+
+
+class BoundedPool:
+    """
+    An executor with a limit on the amount of work waiting for a worker.
+
+    Work beyond the running workers and `max_queue` waiting items is rejected with `Overloaded` instead of
+    queueing without bound, so callers can shed load early. The pool is used from the event loop only.
+
+    Args:
+        name (str): The name of the pool, used in errors and statistics.
+        executor (Executor): The executor that runs the work.
+        workers (int): The number of workers of the executor.
+        max_queue (int): The maximum number of items waiting for a worker.
+
+    Attributes:
+        name (str): The name of the pool.
+        executor (Executor): The executor that runs the work.
+        workers (int): The number of workers of the executor.
+        max_queue (int): The maximum number of items waiting for a worker.
+        in_flight (int): The number of running and waiting items.
+        completed (int): The number of finished items.
+        rejected (int): The number of items rejected because the queue was full.
+
+    Methods:
+        run(function, *args): Run a blocking function in the pool.
+        queued(): Get the number of items waiting for a worker.
+        stats(): Get the utilization counters of the pool.
+        shutdown(wait=True): Stop the workers.
+    """
+
+    def __init__(self, name, executor, workers, max_queue):
+        self.name = name
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, function, *args):
+        """
+        Run a blocking function in the pool.
+
+        Args:
+            function (callable): The function to run. Must be picklable for process pools.
+            *args: Positional arguments for the function.
+
+        Returns:
+            The return value of the function.
+
+        Raises:
+            Overloaded: If the queue of the pool is full.
+        """
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.name)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def queued(self):
+        """
+        Get the number of items waiting for a worker.
+
+        Returns:
+            int: The number of waiting items.
+        """
+        return max(0, self.in_flight - self.workers)
+
+    def stats(self):
+        """
+        Get the utilization counters of the pool.
+
+        Returns:
+            dict: The pool size, queue limit and the running, waiting, finished and rejected item counts.
+        """
+        return {"workers": self.workers, "max_queue": self.max_queue, "running": min(self.in_flight, self.workers),
+                "queued": self.queued(), "completed": self.completed, "rejected": self.rejected}
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers.
+
+        Args:
+            wait (bool, optional): Wait for running work to finish. Defaults to True.
+        """
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class ExecutionLayer:
+    """
+    Dedicated worker pools that keep blocking work off the event loop.
+
+    Fetching (HTTP requests, browser renders, crawls) and cache access run in two separate thread pools,
+    so slow pages cannot starve cache lookups. CPU-bound parsing and scoring run in a process pool,
+    so they neither hold the GIL of the server process nor block each other. Every pool has its own queue
+    limit and rejects work with `Overloaded` when it is full.
+
+    Args:
+        fetch_workers (int, optional): The number of fetch threads. Defaults to 16.
+        fetch_queue (int, optional): The maximum number of fetches waiting for a thread. Defaults to 64.
+        cache_workers (int, optional): The number of cache threads. Defaults to 4.
+        cache_queue (int, optional): The maximum number of cache operations waiting for a thread.
+            Defaults to 256.
+        cpu_workers (int, optional): The number of CPU workers. Defaults to 2.
+        cpu_queue (int, optional): The maximum number of CPU tasks waiting for a worker. Defaults to 32.
+        cpu_processes (bool, optional): Run CPU tasks in processes rather than threads. Defaults to True.
+        cpu_initializer (callable, optional): Prepares the state of each CPU worker. Defaults to None.
+        cpu_initargs (tuple, optional): Arguments for `cpu_initializer`. Defaults to ().
+
+    Attributes:
+        fetch (BoundedPool): The pool for fetching.
+        cache (BoundedPool): The pool for cache access.
+        cpu (BoundedPool): The pool for parsing and scoring.
+
+    Methods:
+        stats(): Get the utilization counters of every pool.
+        shutdown(): Stop all pools.
+    """
+
+    def __init__(self, fetch_workers=16, fetch_queue=64, cache_workers=4, cache_queue=256, cpu_workers=2,
+                 cpu_queue=32, cpu_processes=True, cpu_initializer=None, cpu_initargs=()):
+        self.fetch = BoundedPool("fetch", ThreadPoolExecutor(fetch_workers, thread_name_prefix="fetch"),
+                                 fetch_workers, fetch_queue)
+        self.cache = BoundedPool("cache", ThreadPoolExecutor(cache_workers, thread_name_prefix="cache"),
+                                 cache_workers, cache_queue)
+        if cpu_processes:
+            # Spawned rather than forked: the server process runs threads that must not be copied mid-lock.
+            cpu_executor = ProcessPoolExecutor(cpu_workers, mp_context=multiprocessing.get_context("spawn"),
+                                               initializer=cpu_initializer, initargs=cpu_initargs)
+        else:
+            cpu_executor = ThreadPoolExecutor(cpu_workers, thread_name_prefix="cpu", initializer=cpu_initializer,
+                                              initargs=cpu_initargs)
+        self.cpu = BoundedPool("cpu", cpu_executor, cpu_workers, cpu_queue)
+
+    def stats(self):
+        """
+        Get the utilization counters of every pool.
+
+        Returns:
+            dict: The counters of each pool, keyed by pool name.
+        """
+        return {pool.name: pool.stats() for pool in (self.fetch, self.cache, self.cpu)}
+
+    def shutdown(self):
+        """
+        Stop all pools without waiting for queued work.
+        """
+        for pool in (self.fetch, self.cache, self.cpu):
+            pool.shutdown(wait=False)
@@ -0,0 +1,185 @@
+import asyncio
+
+
+class BatchPipeline:
+    """
+    A concurrent pipeline that classifies a batch of URLs in separate fetch, parse and analyze stages.
+
+    Identical URLs are processed once, cache hits skip every stage, and blocking stage functions run in
+    an executor so the event loop stays responsive. With `flights`, a URL already being processed by a
+    concurrent request is not processed again; its result is shared. Stage functions may also be
+    coroutine functions that schedule their work themselves. Results are returned in input order.
+
+    Args:
+        fetch (callable): Fetches a URL and returns the fetched page.
+        parse (callable): Extracts the text content of a fetched page and returns the parsed page.
+        analyze (callable): Takes a URL and its parsed page and returns the result for the URL.
+        lookup (callable, optional): Returns a cached result for a URL or None. Defaults to None.
+        concurrency (int, optional): The maximum number of URLs being fetched at once. Defaults to 4.
+        cpu_concurrency (int, optional): The maximum number of URLs being parsed or analyzed at once.
+            Defaults to 2.
+        executor (Executor, optional): The executor for blocking stage functions. Defaults to the loop's
+            default executor.
+        order (callable, optional): Reorders the distinct URLs of a batch before they are started, e.g.
+            `HostScheduler.round_robin`. Defaults to None, which keeps the input order.
+        flights (SingleFlight, optional): Shares the stages of a URL with concurrent callers, in this or
+            other pipelines, that use the same key. Defaults to None.
+        key (callable, optional): Maps a URL to its key in `flights`, e.g. its canonical form. Defaults to
+            None, which uses the URL itself.
+
+    Methods:
+        run(urls, window=None): Process a batch of URLs and return their results in input order.
+        stream(urls, window=None): Yield results as soon as each URL finishes.
+        process(url): Process a single URL through the cache and the three stages.
+    """
+
+    def __init__(self, fetch, parse, analyze, lookup=None, concurrency=4, cpu_concurrency=2, executor=None,
+                 order=None, flights=None, key=None):
+        self.fetch = fetch
+        self.parse = parse
+        self.analyze = analyze
+        self.lookup = lookup
+        self.concurrency = concurrency
+        self.cpu_concurrency = cpu_concurrency
+        self.executor = executor
+        self.order = order
+        self.flights = flights
+        self.key = key
+
+    async def _call(self, function, *args):
+        """
+        Run a blocking function in the executor, or await a coroutine function.
+
+        Args:
+            function (callable): The function to run.
+            *args: Positional arguments for the function.
+
+        Returns:
+            The return value of the function.
+        """
+        if asyncio.iscoroutinefunction(function):
+            return await function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _process(self, url, fetch_slots, cpu_slots):
+        """
+        Process a single URL through the cache and, unless a concurrent caller already does, the stages.
+
+        Args:
+            url (str): The URL to process.
+            fetch_slots (asyncio.Semaphore): Limits concurrent fetches.
+            cpu_slots (asyncio.Semaphore): Limits concurrent parsing and analysis.
+
+        Returns:
+            The result for the URL.
+        """
+        if self.lookup is not None:
+            cached = await self._call(self.lookup, url)
+            if cached:
+                return cached
+        if self.flights is not None:
+            key = self.key(url) if self.key is not None else url
+            return await self.flights.do(key, self._run_stages, url, fetch_slots, cpu_slots)
+        return await self._run_stages(url, fetch_slots, cpu_slots)
+
+    async def _run_stages(self, url, fetch_slots, cpu_slots):
+        """
+        Fetch, parse and analyze a single URL, respecting the per-stage concurrency limits.
+
+        Args:
+            url (str): The URL to process.
+            fetch_slots (asyncio.Semaphore): Limits concurrent fetches.
+            cpu_slots (asyncio.Semaphore): Limits concurrent parsing and analysis.
+
+        Returns:
+            The result for the URL.
+        """
+        async with fetch_slots:
+            page = await self._call(self.fetch, url)
+        async with cpu_slots:
+            page = await self._call(self.parse, page)
+            return await self._call(self.analyze, url, page)
+
+    async def process(self, url):
+        """
+        Process a single URL through the cache and the three stages.
+
+        Args:
+            url (str): The URL to process.
+
+        Returns:
+            The result for the URL.
+        """
+        return await self._process(url, asyncio.Semaphore(self.concurrency), asyncio.Semaphore(self.cpu_concurrency))
+
+    async def run(self, urls, window=None):
+        """
+        Process a batch of URLs and return their results in input order.
+
+        At most `window` distinct URLs are in flight at once, as in `stream`, so a large batch does not
+        flood the pools behind the stage functions, which may reject work beyond their queue.
+
+        Args:
+            urls (list): The URLs to process. Duplicates are processed once.
+            window (int, optional): The maximum number of URLs in flight. Defaults to twice `concurrency`.
+
+        Returns:
+            list: The result for each input URL, in input order.
+
+        Raises:
+            Exception: The first error raised while processing any URL.
+        """
+        fetch_slots, cpu_slots = asyncio.Semaphore(self.concurrency), asyncio.Semaphore(self.cpu_concurrency)
+        window_slots = asyncio.Semaphore(window or 2 * self.concurrency)
+        unique_urls = list(dict.fromkeys(urls))
+        if self.order is not None:
+            unique_urls = self.order(unique_urls)
+
+        async def process(url):
+            async with window_slots:
+                return await self._process(url, fetch_slots, cpu_slots)
+
+        results = await asyncio.gather(*(process(url) for url in unique_urls))
+        by_url = dict(zip(unique_urls, results))
+        return [by_url[url] for url in urls]
+
+    async def stream(self, urls, window=None):
+        """
+        Yield results as soon as each URL finishes, capturing per-URL errors instead of failing the batch.
+
+        At most `window` distinct URLs are in flight at once, so memory stays bounded for huge batches.
+        Pending work is cancelled if the consumer stops iterating.
+
+        Args:
+            urls (list): The URLs to process. Duplicates are processed once and reported for every index.
+            window (int, optional): The maximum number of URLs in flight. Defaults to twice `concurrency`.
+
+        Yields:
+            Tuple[int, str, object, Exception]: The input index, the URL, the result (or None) and the
+            error raised while processing the URL (or None).
+        """
+        fetch_slots, cpu_slots = asyncio.Semaphore(self.concurrency), asyncio.Semaphore(self.cpu_concurrency)
+        window = window or 2 * self.concurrency
+        indexes = {}
+        for index, url in enumerate(urls):
+            indexes.setdefault(url, []).append(index)
+
+        pending_urls, pending = iter(indexes if self.order is None else self.order(list(indexes))), {}
+        try:
+            while True:
+                for url in pending_urls:
+                    pending[asyncio.ensure_future(self._process(url, fetch_slots, cpu_slots))] = url
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    error = task.exception()
+                    result = None if error else task.result()
+                    for index in indexes[url]:
+                        yield index, url, result, error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,334 @@
+import functools
+import logging
+import os
+
+from app.analyzer.registry import KeywordRegistry
+from app.analyzer.scores import PageScores
+from app.handlers import workers
+from app.handlers.execution import ExecutionLayer
+from app.handlers.pipeline import BatchPipeline
+from app.handlers.singleflight import SingleFlight
+from app.parser import ContentParser
+from app.parser.BrowserPool import BrowserPool
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.HostScheduler import HostScheduler
+from app.parser.HttpFetcher import HttpFetcher
+from app.parser.urls import canonicalize
+from app.utils.Metrics import MetricsRegistry
+from app.utils.SQLiteCache import SQLiteCache
+from app.utils.TieredCache import TieredCache
+
+BROWSER_POOL_SIZE = int(os.getenv("WRA_BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_PAGES = int(os.getenv("WRA_BROWSER_MAX_PAGES", "50"))
+BROWSER_CHECKOUT_TIMEOUT = float(os.getenv("WRA_BROWSER_CHECKOUT_TIMEOUT", "60"))
+HTTP_POOL_SIZE = int(os.getenv("WRA_HTTP_POOL_SIZE", "10"))
+HTTP_TIMEOUT = float(os.getenv("WRA_HTTP_TIMEOUT", "10"))
+CONNECT_TIMEOUT = float(os.getenv("WRA_CONNECT_TIMEOUT", "5"))
+PAGE_LOAD_TIMEOUT = float(os.getenv("WRA_PAGE_LOAD_TIMEOUT", "30"))
+FETCH_DEADLINE = float(os.getenv("WRA_FETCH_DEADLINE", "30"))
+FETCH_RETRIES = int(os.getenv("WRA_FETCH_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("WRA_RETRY_BACKOFF", "0.5"))
+BREAKER_THRESHOLD = int(os.getenv("WRA_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("WRA_BREAKER_RESET", "30"))
+HOST_RATE = float(os.getenv("WRA_HOST_RATE", "2"))
+HOST_BURST = int(os.getenv("WRA_HOST_BURST", "4"))
+RESPECT_ROBOTS = os.getenv("WRA_RESPECT_ROBOTS", "1") != "0"
+ROBOTS_TTL = float(os.getenv("WRA_ROBOTS_TTL", "3600"))
+BATCH_CONCURRENCY = int(os.getenv("WRA_BATCH_CONCURRENCY", str(BROWSER_POOL_SIZE)))
+BATCH_CPU_CONCURRENCY = int(os.getenv("WRA_BATCH_CPU_CONCURRENCY", "2"))
+CACHE_MAX_ENTRIES = int(os.getenv("WRA_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("WRA_CACHE_MAX_BYTES", str(64 * 2 ** 20)))
+CACHE_TTL = float(os.getenv("WRA_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_COMPACTION_INTERVAL = float(os.getenv("WRA_CACHE_COMPACTION_INTERVAL", "3600"))
+FETCH_WORKERS = int(os.getenv("WRA_FETCH_WORKERS", "16"))
+FETCH_QUEUE = int(os.getenv("WRA_FETCH_QUEUE", "64"))
+CACHE_WORKERS = int(os.getenv("WRA_CACHE_WORKERS", "4"))
+CACHE_QUEUE = int(os.getenv("WRA_CACHE_QUEUE", "256"))
+CPU_WORKERS = int(os.getenv("WRA_CPU_WORKERS", "2"))
+CPU_QUEUE = int(os.getenv("WRA_CPU_QUEUE", "32"))
+CPU_PROCESSES = os.getenv("WRA_CPU_PROCESSES", "1") != "0"
+METRICS_MAX_HOSTS = int(os.getenv("WRA_METRICS_MAX_HOSTS", "20"))
+KEYWORDS_WATCH_INTERVAL = float(os.getenv("WRA_KEYWORDS_WATCH_INTERVAL", "5"))
+KEYWORDS_FILE = "app/data/data.json"
+CATEGORIES_FILE = "app/data/categories.json"
+INDEX_FILE = "app/data/keywords.idx"
+LEGACY_CACHE_FILE = "app/data/cache.json"
+
+registry = None
+cache = None
+browser_pool = None
+scheduler = None
+fetch_policy = None
+http_fetcher = None
+execution = None
+flights = None
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram("wra_stage_duration_seconds", "Seconds spent in each stage of handling a page.",
+                                  labels=("stage",))
+result_lookups = metrics.counter("wra_result_lookups_total", "Lookups of page results in the cache, by outcome.",
+                                 labels=("result",))
+
+
+def start(watch_keywords=True, compact_cache=True):
+    """
+    Build the keyword registry, the cache, the fetch clients and the worker pools that classify pages.
+
+    Nothing is built on import, so the web app, the bulk CLI and the processes of the CPU pool, which
+    import this module again, only pay for what they use.
+
+    Args:
+        watch_keywords (bool, optional): Reload the keyword index when its data files change. Defaults to True.
+        compact_cache (bool, optional): Compact the persistent cache tier periodically. Defaults to True.
+    """
+    global registry, cache, browser_pool, scheduler, fetch_policy, http_fetcher, execution, flights
+    if os.path.exists(LEGACY_CACHE_FILE):
+        logging.warning(f"Ignoring {LEGACY_CACHE_FILE}: its entries lack the score vectors results are served "
+                        f"from, so their pages are analyzed again; the file can be deleted")
+    registry = KeywordRegistry(KEYWORDS_FILE, CATEGORIES_FILE, INDEX_FILE,
+                               watch_interval=KEYWORDS_WATCH_INTERVAL if watch_keywords else None)
+    cache = TieredCache(SQLiteCache(db_file="app/data/cache.db"), max_entries=CACHE_MAX_ENTRIES,
+                        max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL,
+                        compaction_interval=CACHE_COMPACTION_INTERVAL if compact_cache else None)
+    browser_pool = BrowserPool(max_size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES,
+                               checkout_timeout=BROWSER_CHECKOUT_TIMEOUT)
+    scheduler = HostScheduler(rate=HOST_RATE, burst=HOST_BURST, respect_robots=RESPECT_ROBOTS,
+                              robots_ttl=ROBOTS_TTL, timeout=HTTP_TIMEOUT)
+    fetch_policy = FetchPolicy(connect_timeout=CONNECT_TIMEOUT, read_timeout=HTTP_TIMEOUT,
+                               page_load_timeout=PAGE_LOAD_TIMEOUT, deadline=FETCH_DEADLINE, retries=FETCH_RETRIES,
+                               backoff=RETRY_BACKOFF, failure_threshold=BREAKER_THRESHOLD,
+                               reset_timeout=BREAKER_RESET, counted_hosts=METRICS_MAX_HOSTS)
+    http_fetcher = HttpFetcher(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, scheduler=scheduler,
+                               policy=fetch_policy)
+    execution = ExecutionLayer(fetch_workers=FETCH_WORKERS, fetch_queue=FETCH_QUEUE, cache_workers=CACHE_WORKERS,
+                               cache_queue=CACHE_QUEUE, cpu_workers=CPU_WORKERS, cpu_queue=CPU_QUEUE,
+                               cpu_processes=CPU_PROCESSES, cpu_initializer=workers.init_worker,
+                               cpu_initargs=(KEYWORDS_FILE, CATEGORIES_FILE, INDEX_FILE, registry.version))
+    flights = SingleFlight()
+
+
+def stop():
+    """
+    Stop the worker pools and the keyword file watcher, quit the pooled browser sessions, close pooled
+    connections and stop cache compaction.
+    """
+    execution.shutdown()
+    registry.close()
+    browser_pool.close()
+    http_fetcher.close()
+    scheduler.close()
+    cache.close()
+
+
+def download_page(url, validators):
+    """
+    Fetch a page over HTTP or through the browser pool, unless the server confirms it did not change.
+
+    Args:
+        url (str): The URL to fetch.
+        validators (dict): The previously stored validators of the URL, or None.
+
+    Returns:
+        ContentParser: The parser holding the HTML content (None if not modified).
+    """
+    p = ContentParser.ContentParser(url=url, pool=browser_pool, fetcher=http_fetcher, scheduler=scheduler)
+    if validators is None:
+        p.fetch_content()
+    else:
+        p.fetch_content(etag=validators["etag"], last_modified=validators["last_modified"])
+    for stage, seconds in p.timings.items():
+        stage_seconds.observe(seconds, stage=stage)
+    return p
+
+
+def current_result(entry):
+    """
+    Decode a cached result if it was computed under the current keyword index version.
+
+    Args:
+        entry (dict): An encoded result from the cache, or None.
+
+    Returns:
+        PageScores: The topic scores and keyword counts of the page, or None if unknown or computed under
+        another version.
+    """
+    index = registry.current()
+    if isinstance(entry, dict) and entry.get("version") == index.version and "topics" in entry:
+        return PageScores.decode(entry, index)
+    return None
+
+
+async def fetch_page(url):
+    """
+    Fetch a page in the fetch pool, sending previously stored validators with the request.
+
+    On 304 Not Modified the page is neither downloaded nor rendered. Validators of a result computed
+    under another keyword index version are not sent, so the page is analyzed again. The request slot of
+    the page's origin is awaited before the fetch pool is entered, so pool threads do not sleep on pacing.
+
+    Args:
+        url (str): The URL to fetch.
+
+    Returns:
+        Tuple[ContentParser, dict]: The parser holding the HTML content (None if not modified) and the
+        previously stored validators of the URL (None if unknown).
+    """
+    with stage_seconds.time(stage="validators_lookup"):
+        validators = await execution.cache.run(cache.get_validators, url)
+    if validators is not None:
+        validators["scores"] = current_result(validators["data"])
+        if validators["scores"] is None:
+            validators = None
+    await scheduler.prepay_async(url)
+    return await execution.fetch.run(download_page, url, validators), validators
+
+
+async def parse_page(page):
+    """
+    Extract the text content from the HTML of a fetched page in the CPU pool.
+
+    Args:
+        page (Tuple[ContentParser, dict]): The fetched page and its previous validators.
+
+    Returns:
+        Tuple[ContentParser, dict]: The same page with its text content parsed.
+    """
+    p, validators = page
+    if p.html_content:
+        with stage_seconds.time(stage="parse"):
+            p.content = await execution.cpu.run(workers.parse_html, p.html_content)
+    return p, validators
+
+
+def store_result(url, p, data, fingerprint):
+    """
+    Store the result of a page and its validators in the cache.
+
+    Args:
+        url (str): The URL of the page.
+        p (ContentParser): The parsed page.
+        data (dict): The encoded scores of the page, tagged with the keyword index version.
+        fingerprint (str): The fingerprint of the text content of the page, or None.
+    """
+    cache.set_data(url, data)
+    cache.set_validators(url, data, etag=p.etag, last_modified=p.last_modified, fingerprint=fingerprint)
+
+
+async def lookup_result(url):
+    """
+    Get the cached result of a URL in the cache pool.
+
+    Args:
+        url (str): The URL to look up.
+
+    Returns:
+        PageScores: The cached scores of the URL, or None if unknown or computed under another keyword
+        index version.
+    """
+    with stage_seconds.time(stage="cache_lookup"):
+        scores = current_result(await execution.cache.run(cache.get_data, url))
+    result_lookups.inc(result="miss" if scores is None else "hit")
+    return scores
+
+
+async def analyze_page(url, page):
+    """
+    Analyze the text content of a page in the CPU pool and store the result and its validators in the cache.
+
+    Analysis is skipped when the server answered 304 Not Modified or the text content has the same
+    fingerprint as the previously analyzed version. The full score vectors are stored, so one entry
+    serves every depth.
+
+    Args:
+        url (str): The URL of the page.
+        page (Tuple[ContentParser, dict]): The parsed page and its previous validators.
+
+    Returns:
+        PageScores: The topic scores and keyword counts of the page.
+
+    Raises:
+        Exception: The fetch error if the page could not be fetched; nothing is stored then.
+        RuntimeError: If the keyword index was swapped while the page was being analyzed.
+    """
+    p, validators = page
+    if p.html_content is None and not p.not_modified:
+        raise p.error or RuntimeError(f"Could not fetch {url}")
+    fingerprint = p.get_fingerprint() if p.html_content else None
+    if validators is not None and (p.not_modified or fingerprint == validators["fingerprint"]):
+        entry, scores = validators["data"], validators["scores"]
+        fingerprint = validators["fingerprint"]
+    else:
+        with stage_seconds.time(stage="analyze"):
+            entry = await execution.cpu.run(workers.analyze_text, p.content, registry.version)
+        scores = current_result(entry)
+        if scores is None:
+            raise RuntimeError("Keyword index changed during analysis, retry the request")
+    with stage_seconds.time(stage="cache_write"):
+        await execution.cache.run(store_result, url, p, entry, fingerprint)
+    return scores
+
+
+def flight_key(kind, url):
+    """
+    Build the key under which concurrent computations for the same page are coalesced.
+
+    Args:
+        kind (str): The kind of computation, e.g. "analyze".
+        url (str): The URL of the page; spellings of the same canonical URL share a key.
+
+    Returns:
+        tuple: The key.
+    """
+    return kind, canonicalize(url) or url
+
+
+async def classify_page(url):
+    """
+    Fetch, parse and analyze a page that is not in the cache.
+
+    Args:
+        url (str): The URL of the page.
+
+    Returns:
+        PageScores: The topic scores and keyword counts of the page.
+    """
+    return await analyze_page(url, await parse_page(await fetch_page(url)))
+
+
+def format_result(url, scores, depth=1, keywords=0):
+    """
+    Build the per-URL response entry from the cached scores of the URL.
+
+    Args:
+        url (str): The checked URL.
+        scores (PageScores): The cached scores of the URL.
+        depth (int): The depth for analysis (default is 1).
+        keywords (int): The number of most frequent keywords to include (default is 0).
+
+    Returns:
+        Dict: The response entry for the URL.
+    """
+    themes_resp = scores.get_themes(depth)
+    categories_resp = [scores.categories.get(theme) for theme in themes_resp]
+    if depth == 1:
+        result = {"url": url, "category": categories_resp[0], "theme": themes_resp[0]}
+    else:
+        result = {"url": url, "categories": categories_resp, "themes": themes_resp}
+    if keywords > 0:
+        result["keywords"] = scores.get_frequent_keywords(keywords)
+    return result
+
+
+def url_pipeline(concurrency=BATCH_CONCURRENCY, cpu_concurrency=BATCH_CPU_CONCURRENCY):
+    """
+    Build the pipeline classifying a batch of URLs through the cache and the worker pools.
+
+    Args:
+        concurrency (int, optional): The maximum number of pages fetched at once.
+        cpu_concurrency (int, optional): The maximum number of pages parsed and analyzed at once.
+
+    Returns:
+        BatchPipeline: The pipeline.
+    """
+    return BatchPipeline(fetch=fetch_page, parse=parse_page, analyze=analyze_page, lookup=lookup_result,
+                         concurrency=concurrency, cpu_concurrency=cpu_concurrency,
+                         order=scheduler.round_robin, flights=flights, key=functools.partial(flight_key, "analyze"))
@@ -0,0 +1,77 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight computation.
+
+    The first caller for a key starts the computation as a task; callers arriving while it runs await the
+    same task and receive its result or its error. The task is shielded from its callers, so a caller
+    that disconnects does not cancel the work the others are waiting for; it is cancelled only when every
+    caller has gone. Once the task finishes the key is forgotten, so later calls start a new computation
+    (usually answered from the cache by then).
+
+    Methods:
+        do(key, function, *args): Run a coroutine function once for all concurrent callers with the key.
+        stats(): Get the number of computations in flight and of coalesced calls.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._coalesced = 0
+
+    def _forget(self, key, task):
+        """
+        Forget a finished computation and retrieve its error, so it is not reported as never retrieved.
+
+        Args:
+            key: The key of the computation.
+            task (asyncio.Task): The finished task.
+        """
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, function, *args):
+        """
+        Run a coroutine function once for all concurrent callers with the same key.
+
+        Args:
+            key: A hashable key identifying the computation, e.g. a canonical URL.
+            function (callable): The coroutine function computing the result.
+            *args: Positional arguments for the function.
+
+        Returns:
+            The result of the shared computation.
+
+        Raises:
+            Exception: The error raised by the shared computation.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            # [task, number of callers waiting for it]
+            flight = self._flights[key] = [asyncio.ensure_future(function(*args)), 0]
+            flight[0].add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._coalesced += 1
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            flight[1] -= 1
+            if not flight[1] and not task.done():
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                task.cancel()
+
+    def stats(self):
+        """
+        Get the number of computations in flight and of calls that joined one.
+
+        Returns:
+            dict: The `in_flight` and `coalesced` counters.
+        """
+        return {"in_flight": len(self._flights), "coalesced": self._coalesced}
@@ -0,0 +1,82 @@
+import logging
+
+from app.analyzer.index import load_index, load_pinned_index
+from app.analyzer.scores import encode_scores
+from app.parser.TextExtractor import extract_leaf_div_text
+
+_files = None
+_version = None
+_keywords = None
+_matcher = None
+
+
+def init_worker(keywords_file, categories_file, index_file, version=None):
+    """
+    Load the keyword table and the compiled keyword matcher of this worker.
+
+    Runs once per worker of the CPU pool, so tasks only carry page text between processes. The table
+    and the matcher come from the pinned copy of the keyword index version the pool was created under
+    (see `KeywordRegistry`), never from whatever index is on disk when a worker starts. If that version
+    is gone, loading is left to the first task, which names the version it needs.
+
+    Args:
+        keywords_file (str): The JSON file of (keyword, topic) pairs.
+        categories_file (str): The JSON file of (topic, category) pairs.
+        index_file (str): The binary keyword index compiled from both files.
+        version (str, optional): The keyword index version to load. Defaults to None (load on first task).
+    """
+    global _files
+    _files = (keywords_file, categories_file, index_file)
+    if version is not None:
+        try:
+            _use_version(version)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading keyword index version {version}: {str(e)}")
+
+
+def _use_version(version):
+    """
+    Load the keyword index version a task was scheduled under, if this worker holds another one.
+
+    Args:
+        version (str): The keyword index version of the task, or None to use the loaded one (or the one
+            on disk if none is loaded yet).
+
+    Raises:
+        ValueError: If the version is not available.
+    """
+    global _version, _keywords, _matcher
+    if _matcher is not None and version in (None, _version):
+        return
+    index = load_index(*_files) if version is None else load_pinned_index(*_files, version)
+    _version, _keywords, _matcher = index.version, index.keywords, index.matcher
+
+
+def parse_html(html_content):
+    """
+    Extract the text content of the leaf divs of a page.
+
+    Args:
+        html_content (str): The HTML of the page.
+
+    Returns:
+        str: The text content of the page.
+    """
+    return extract_leaf_div_text(html_content)
+
+
+def analyze_text(content, version=None):
+    """
+    Score the text content of a page by topic and count its keywords.
+
+    Args:
+        content (str): The text content of the page.
+        version (str, optional): The keyword index version to analyze with. Defaults to the loaded one.
+
+    Returns:
+        dict: The full topic score and keyword count vectors, encoded with `scores.encode_scores` and
+        tagged with the keyword index `version` they were computed under.
+    """
+    _use_version(version)
+    return {"version": _version, **encode_scores(*_matcher.match_vectors(content))}
+
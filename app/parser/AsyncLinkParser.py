@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.urls import SeenSet, canonicalize
+
+
+class AsyncLinkParser:
+    """
+    A class for parsing links from web pages with a concurrent asyncio crawler.
+
+    The crawl is a breadth-first search over a deque frontier. Links are canonicalized and deduplicated
+    by fingerprint, so fragments, tracking parameters and other spelling variants are crawled once. Pages are
+    fetched concurrently over a keep-alive connection pool, limited globally and per host, and a new page
+    starts as soon as any page finishes. Requests run on a pooled `requests.Session` in worker threads,
+    driven by the event loop.
+
+    Args:
+        headers (dict, optional): HTTP headers to use in requests. Defaults to a common User-Agent header.
+        concurrency (int, optional): The maximum number of pages fetched at once. Defaults to 16.
+        per_host (int, optional): The maximum number of pages fetched at once from one host. Defaults to 4.
+        timeout (float, optional): The read timeout in seconds of the default policy. Defaults to 10.
+        rules (dict, optional): Per-domain canonicalization rules, see `urls.canonicalize`. Defaults to None.
+        seen_factory (callable, optional): Creates the seen-URL structure of a crawl, e.g. a BloomFilter for
+            a fixed memory budget. Defaults to SeenSet.
+        scheduler (HostScheduler, optional): Paces requests per origin and skips links disallowed by
+            robots.txt. Defaults to None.
+        policy (FetchPolicy, optional): Timeouts, retries and circuit breaking of requests. Defaults to a
+            policy with `timeout` as read timeout.
+        session (requests.Session, optional): A shared session to send requests with, e.g. the one of an
+            HttpFetcher; it is left open. Defaults to a session created for, and closed after, each crawl.
+
+    Attributes:
+        headers (dict): HTTP headers for requests.
+        concurrency (int): The maximum number of pages fetched at once.
+        per_host (int): The maximum number of pages fetched at once from one host.
+        timeout (float): The read timeout in seconds of the default policy.
+        rules (dict): Per-domain canonicalization rules.
+        seen_factory (callable): Creates the seen-URL structure of a crawl.
+        scheduler (HostScheduler): Paces requests per origin, or None.
+        policy (FetchPolicy): Timeouts, retries and circuit breaking of requests.
+        site_links (list): A list to store the parsed website links.
+        type (str): The type of link parser, which is set to "Async".
+
+    Methods:
+        crawl(start_url, max_pages=10, seed_html=None): Crawl web pages starting from a given URL, up to a specified maximum number of pages.
+        crawl_async(start_url, max_pages=10, seed_html=None): Coroutine version of `crawl`.
+        print(): Print the parsed website links.
+        clear(): Clear the list of parsed links.
+        get(index): Get a link at a specific index in the parsed links list.
+        remove(index): Remove a link at a specific index from the parsed links list.
+        length(): Get the number of parsed links in the list.
+    """
+
+    def __init__(self, headers=None, concurrency=16, per_host=4, timeout=10, rules=None, seen_factory=SeenSet,
+                 scheduler=None, policy=None, session=None):
+        self.headers = headers or {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.rules = rules
+        self.seen_factory = seen_factory
+        self.scheduler = scheduler
+        self.policy = policy or FetchPolicy(read_timeout=timeout)
+        self.site_links = []
+        self.type = "Async"
+        self._session = session
+        self._own_session = session is None
+
+    def _open_session(self):
+        """
+        Create the pooled session of a crawl, unless a shared session was given.
+        """
+        if self._own_session:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+
+    def _close_session(self):
+        """
+        Close the pooled session of a crawl, unless it is shared.
+        """
+        if self._own_session and self._session is not None:
+            self._session.close()
+            self._session = None
+
+    @staticmethod
+    def _extract_links(url, html_content):
+        """
+        Extract the absolute URLs of the links of a page.
+
+        Args:
+            url (str): The URL of the page.
+            html_content (str): The HTML content of the page.
+
+        Returns:
+            list: The absolute URLs linked from the page, in document order.
+        """
+        soup = BeautifulSoup(html_content, 'html.parser')
+        return [urljoin(url, link['href']) for link in soup.find_all('a', href=True)]
+
+    def _fetch_links(self, url):
+        """
+        Fetch a page and extract the absolute URLs of its links.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            list: The absolute URLs linked from the page, in document order.
+        """
+        response = self.policy.call(url, lambda timeout: self._session.get(url, headers=self.headers,
+                                                                           timeout=timeout))
+        if response.status_code != 200:
+            return []
+        return self._extract_links(url, response.text)
+
+    def _allowed_links(self, urls):
+        """
+        Keep the URLs that robots.txt allows crawling.
+
+        Args:
+            urls (list): The URLs to check.
+
+        Returns:
+            list: The allowed URLs, in the same order.
+        """
+        if self.scheduler is None:
+            return urls
+        return [url for url in urls if self.scheduler.allowed(url)]
+
+    async def crawl_async(self, start_url, max_pages=10, seed_html=None):
+        """
+        Crawl web pages starting from a given URL, up to a specified maximum number of pages.
+
+        Args:
+            start_url (str): The starting URL for crawling.
+            max_pages (int, optional): The maximum number of pages to crawl. Defaults to 10.
+            seed_html (str, optional): Already fetched HTML of the starting URL, used instead of fetching
+                it again. Defaults to None.
+        """
+        loop = asyncio.get_running_loop()
+        global_slots = asyncio.Semaphore(self.concurrency)
+        host_slots = {}
+        start_url = canonicalize(start_url, self.rules) or start_url
+        seen, pages_to_visit = self.seen_factory(), deque([start_url])
+        for url in (start_url, *self.site_links):
+            seen.add(url)
+
+        async def visit(url, executor):
+            if url == start_url and seed_html is not None:
+                return await loop.run_in_executor(executor, self._extract_links, url, seed_html)
+            if self.scheduler is not None:
+                await self.scheduler.acquire_async(url)
+            host = urlsplit(url).netloc
+            if host not in host_slots:
+                host_slots[host] = asyncio.Semaphore(self.per_host)
+            async with global_slots, host_slots[host]:
+                try:
+                    return await loop.run_in_executor(executor, self._fetch_links, url)
+                except Exception as e:
+                    logging.error(f"Error fetching URL {url}: {str(e)}")
+                    return []
+
+        self._open_session()
+        executor, pending = ThreadPoolExecutor(max_workers=self.concurrency), set()
+        try:
+            while len(self.site_links) < max_pages:
+                while pages_to_visit and len(pending) < self.concurrency:
+                    pending.add(asyncio.ensure_future(visit(pages_to_visit.popleft(), executor)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                new_links = []
+                for task in done:
+                    for abs_url in task.result():
+                        abs_url = canonicalize(abs_url, self.rules)
+                        if abs_url is not None and seen.add(abs_url):
+                            new_links.append(abs_url)
+                new_links = await loop.run_in_executor(executor, self._allowed_links, new_links)
+                pages_to_visit.extend(new_links)
+                self.site_links.extend(new_links)
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._close_session()
+
+    def crawl(self, start_url, max_pages=10, seed_html=None):
+        """
+        Crawl web pages starting from a given URL, up to a specified maximum number of pages.
+
+        Runs the crawl on its own event loop, in a helper thread if the caller is already inside one.
+
+        Args:
+            start_url (str): The starting URL for crawling.
+            max_pages (int, optional): The maximum number of pages to crawl. Defaults to 10.
+            seed_html (str, optional): Already fetched HTML of the starting URL, used instead of fetching
+                it again. Defaults to None.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.crawl_async(start_url, max_pages, seed_html))
+            return
+        thread = threading.Thread(target=asyncio.run, args=(self.crawl_async(start_url, max_pages, seed_html),))
+        thread.start()
+        thread.join()
+
+    def print(self):
+        """Print the parsed website links."""
+        for link in self.site_links:
+            print(link)
+
+    def clear(self):
+        """Clear the list of parsed links."""
+        self.site_links = []
+
+    def get(self, index):
+        """
+        Get a link at a specific index in the parsed links list.
+
+        Args:
+            index (int): The index of the link to retrieve.
+
+        Returns:
+            str or None: The link at the specified index or None if the index is out of bounds.
+        """
+        if 0 <= index < len(self.site_links):
+            return self.site_links[index]
+        else:
+            return None
+
+    def remove(self, index):
+        """
+        Remove a link at a specific index from the parsed links list.
+
+        Args:
+            index (int): The index of the link to remove.
+        """
+        if 0 <= index < len(self.site_links):
+            self.site_links.pop(index)
+
+    def length(self):
+        """
+        Get the number of parsed links in the list.
+
+        Returns:
+            int: The number of parsed links.
+        """
+        return len(self.site_links)
@@ -0,0 +1,224 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+
+def create_chrome_driver():
+    """
+    Create a headless Chrome WebDriver with the user agent used by the parsers.
+
+    Returns:
+        webdriver.Chrome: A new Chrome WebDriver session.
+    """
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.96 Safari/537.36")
+    return webdriver.Chrome(options=chrome_options)
+
+
+class BrowserPoolTimeout(TimeoutError):
+    """Raised when no browser session becomes available within the checkout timeout."""
+
+
+class BrowserSession:
+    """
+    A long-lived WebDriver session owned by a BrowserPool.
+
+    Args:
+        driver: The WebDriver instance.
+
+    Attributes:
+        driver: The WebDriver instance.
+        pages (int): The number of pages loaded by this session.
+        created_at (float): The creation time of the session.
+    """
+
+    __slots__ = ("driver", "pages", "created_at")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserPool:
+    """
+    A bounded pool of reusable headless browser sessions shared by the Selenium-based parsers.
+
+    Sessions are created lazily, health-checked on checkout, restarted when they crash and recycled
+    after a fixed number of page loads.
+
+    Args:
+        max_size (int, optional): The maximum number of live browser sessions. Defaults to 2.
+        max_pages (int, optional): The number of page loads after which a session is recycled. Defaults to 50.
+        checkout_timeout (float, optional): Seconds to wait for a free session. Defaults to 60.
+        driver_factory (callable, optional): A callable returning a new WebDriver. Defaults to headless Chrome.
+
+    Attributes:
+        max_size (int): The maximum number of live browser sessions.
+        max_pages (int): The number of page loads after which a session is recycled.
+        checkout_timeout (float): Seconds to wait for a free session.
+        driver_factory (callable): A callable returning a new WebDriver.
+        live (int): The number of live (idle or checked out) sessions.
+        restarts (int): The number of sessions replaced because they crashed or failed a health check.
+
+    Methods:
+        acquire(timeout=None): Check out a healthy session.
+        release(session): Return a session to the pool.
+        session(timeout=None): Context manager that checks out a driver and returns it afterwards.
+        in_use(): Get the number of checked out sessions.
+        close(): Quit all idle sessions and reject further checkouts.
+    """
+
+    def __init__(self, max_size=2, max_pages=50, checkout_timeout=60, driver_factory=None):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        self.driver_factory = driver_factory or create_chrome_driver
+        self.live = 0
+        self.restarts = 0
+        self._idle = []
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _is_healthy(self, session):
+        """
+        Check that the browser behind a session still responds.
+
+        Args:
+            session (BrowserSession): The session to check.
+
+        Returns:
+            bool: True if the driver answered, False otherwise.
+        """
+        try:
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, session):
+        """
+        Quit a session's driver, ignoring errors from an already dead browser.
+
+        Args:
+            session (BrowserSession): The session to discard.
+        """
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """
+        Check out a healthy session, creating one if the pool is below its size limit.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free session. Defaults to `checkout_timeout`.
+
+        Returns:
+            BrowserSession: The checked out session.
+
+        Raises:
+            BrowserPoolTimeout: If no session became available in time.
+            RuntimeError: If the pool is closed.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                while not self._idle and self.live >= self.max_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise BrowserPoolTimeout(f"No browser session available within {timeout} seconds")
+                    self._condition.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                session = self._idle.pop() if self._idle else None
+                if session is None:
+                    self.live += 1
+
+            if session is None:
+                try:
+                    return BrowserSession(self.driver_factory())
+                except Exception:
+                    with self._condition:
+                        self.live -= 1
+                        self._condition.notify()
+                    raise
+
+            if self._is_healthy(session):
+                return session
+
+            self._discard(session)
+            with self._condition:
+                self.live -= 1
+                self.restarts += 1
+                self._condition.notify()
+
+    def release(self, session, healthy=True):
+        """
+        Return a session to the pool, recycling it if it crashed or reached its page limit.
+
+        Args:
+            session (BrowserSession): The session to return.
+            healthy (bool, optional): False if the session is known to be broken. Defaults to True.
+        """
+        session.pages += 1
+        recycle = not healthy or session.pages >= self.max_pages or self._closed
+        if recycle:
+            self._discard(session)
+        with self._condition:
+            if recycle:
+                self.live -= 1
+                if not healthy:
+                    self.restarts += 1
+            else:
+                self._idle.append(session)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Check out a driver for the duration of a `with` block.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free session. Defaults to `checkout_timeout`.
+
+        Yields:
+            The WebDriver of the checked out session.
+        """
+        session = self.acquire(timeout)
+        try:
+            yield session.driver
+        except Exception:
+            self.release(session, healthy=self._is_healthy(session))
+            raise
+        else:
+            self.release(session)
+
+    def in_use(self):
+        """
+        Get the number of checked out sessions.
+
+        Returns:
+            int: The number of sessions currently in use.
+        """
+        with self._condition:
+            return self.live - len(self._idle)
+
+    def close(self):
+        """
+        Quit all idle sessions and reject further checkouts. Checked out sessions are quit on release.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self.live -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            self._discard(session)
@@ -1,7 +1,12 @@
+import logging
 import requests
 from bs4 import BeautifulSoup
+from collections import deque
 from urllib.parse import urljoin
 
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.urls import SeenSet, canonicalize
+
 
 class ClassicLinkParser:
     """
@@ -9,9 +14,19 @@ class ClassicLinkParser:
 
     Args:
         headers (dict, optional): HTTP headers to use in requests. Defaults to a common User-Agent header.
+        rules (dict, optional): Per-domain canonicalization rules, see `urls.canonicalize`. Defaults to None.
+        seen_factory (callable, optional): Creates the seen-URL structure of a crawl. Defaults to SeenSet.
+        scheduler (HostScheduler, optional): Paces requests per origin and skips links disallowed by
+            robots.txt. Defaults to None.
+        policy (FetchPolicy, optional): Timeouts, retries and circuit breaking of requests. Defaults to a
+            default policy.
 
     Attributes:
         headers (dict): HTTP headers for requests.
+        rules (dict): Per-domain canonicalization rules.
+        seen_factory (callable): Creates the seen-URL structure of a crawl.
+        scheduler (HostScheduler): Paces requests per origin, or None.
+        policy (FetchPolicy): Timeouts, retries and circuit breaking of requests.
         site_links (list): A list to store the parsed website links.
         type (str): The type of link parser, which is set to "Classic" by default.
 
@@ -24,9 +39,13 @@ class ClassicLinkParser:
         length(): Get the number of parsed links in the list.
     """
 
-    def __init__(self, headers=None):
+    def __init__(self, headers=None, rules=None, seen_factory=SeenSet, scheduler=None, policy=None):
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
+        self.rules = rules
+        self.seen_factory = seen_factory
+        self.scheduler = scheduler
+        self.policy = policy or FetchPolicy()
         self.site_links = []
         self.type = "Classic"
 
@@ -38,24 +57,51 @@ class ClassicLinkParser:
             start_url (str): The starting URL for crawling.
             max_pages (int, optional): The maximum number of pages to crawl. Defaults to 10.
         """
-        visited_urls, pages_to_visit = set(), [start_url]
+        start_url = canonicalize(start_url, self.rules) or start_url
+        seen, pages_to_visit = self.seen_factory(), deque([start_url])
+        for url in (start_url, *self.site_links):
+            seen.add(url)
 
         while pages_to_visit and len(self.site_links) < max_pages:
-            url = pages_to_visit.pop(0)
-            if url in visited_urls:
-                continue
-            visited_urls.add(url)
+            url = pages_to_visit.popleft()
             try:
-                response = requests.get(url, headers=self.headers)
+                response = self.policy.call(url, lambda timeout: self._get(url, timeout))
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, 'html.parser')
                     for link in soup.find_all('a', href=True):
-                        href, abs_url = link['href'], urljoin(url, link['href'])
-                        if abs_url not in visited_urls and abs_url not in self.site_links:
+                        abs_url = canonicalize(urljoin(url, link['href']), self.rules)
+                        if abs_url is not None and seen.add(abs_url) and self._allowed(abs_url):
                             pages_to_visit.append(abs_url)
                             self.site_links.append(abs_url)
             except Exception as e:
-                print(f"Error fetching URL {url}: {str(e)}")
+                logging.error(f"Error fetching URL {url}: {str(e)}")
+
+    def _get(self, url, timeout):
+        """
+        Send one GET request once the scheduler allows it.
+
+        Args:
+            url (str): The URL to fetch.
+            timeout (tuple): The connect and read timeouts in seconds.
+
+        Returns:
+            requests.Response: The response.
+        """
+        if self.scheduler is not None:
+            self.scheduler.acquire(url)
+        return requests.get(url, headers=self.headers, timeout=timeout)
+
+    def _allowed(self, url):
+        """
+        Check whether robots.txt allows crawling a URL.
+
+        Args:
+            url (str): The URL to check.
+
+        Returns:
+            bool: True if the URL may be crawled.
+        """
+        return self.scheduler is None or self.scheduler.allowed(url)
 
     def print(self):
         """Print the parsed website links."""
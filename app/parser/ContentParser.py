@@ -1,31 +1,73 @@
+import hashlib
+import logging
+import time
+
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.HttpFetcher import HttpFetcher
+from app.parser.TextExtractor import extract_leaf_div_text
 
 
 class ContentParser:
     """
-    A class for parsing content from a web page using Selenium and BeautifulSoup.
+    A class for parsing content from a web page using Selenium and a streaming HTML text extractor.
+
+    With an HttpFetcher the page is first fetched over plain HTTP, and only JavaScript shells are rendered
+    in a browser; the decision is remembered per host.
 
     Args:
         url (str): The URL of the web page to parse.
+        pool (BrowserPool, optional): A pool of browser sessions to fetch with. Defaults to None, in which
+            case a new Chrome WebDriver is started for every fetch.
+        fetcher (HttpFetcher, optional): A pooled HTTP client to try before the browser. Defaults to None,
+            in which case every page is rendered in the browser.
+        scheduler (HostScheduler, optional): Paces browser renders per origin. Defaults to None.
+        policy (FetchPolicy, optional): Timeouts, retries and circuit breaking of browser renders. Defaults
+            to the policy of the fetcher, or a default policy without one.
 
     Attributes:
         url (str): The URL of the web page to parse.
-        html_content (str): The HTML content of the web page.
+        pool (BrowserPool): The pool of browser sessions to fetch with.
+        fetcher (HttpFetcher): The pooled HTTP client to try before the browser.
+        scheduler (HostScheduler): Paces browser renders per origin.
+        policy (FetchPolicy): Timeouts, retries and circuit breaking of browser renders.
+        html_content (str): The HTML content of the web page, None if it was not fetched.
         content (str): The parsed text content of the web page.
+        etag (str): The ETag header of the web page, if the server sent one.
+        last_modified (str): The Last-Modified header of the web page, if the server sent one.
+        not_modified (bool): True if the server answered the last conditional request with 304 Not Modified.
+        fetched_with (str): `HttpFetcher.HTTP` or `HttpFetcher.BROWSER`, depending on how the page was fetched.
+        timings (dict): Seconds spent in each network step of the last fetch: "probe" (the conditional HEAD
+            request), "fetch_http" and "fetch_browser".
+        error (Exception): The error of the last failed fetch attempt, or None.
 
     Methods:
         set_url(url): Set the URL of the web page.
-        fetch_content(): Fetch the HTML content of the web page using Selenium.
-        parse_content(): Parse the text content from the HTML using BeautifulSoup.
+        check_modified(etag=None, last_modified=None): Ask the server whether the page changed.
+        fetch_content(etag=None, last_modified=None): Fetch the HTML content of the web page.
+        fetch_http(etag=None, last_modified=None): Fetch the HTML content of the web page over plain HTTP.
+        fetch_browser(): Fetch the HTML content of the web page using Selenium.
+        parse_content(): Parse the text content of the leaf divs from the HTML.
+        get_fingerprint(): Get a fingerprint of the parsed text content.
         reset(): Reset the content parser's attributes.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, pool=None, fetcher=None, scheduler=None, policy=None):
         self.url = url
+        self.pool = pool
+        self.fetcher = fetcher
+        self.scheduler = scheduler
+        self.policy = policy or (fetcher.policy if fetcher is not None else FetchPolicy())
         self.html_content = None
         self.content = ""
+        self.etag = None
+        self.last_modified = None
+        self.not_modified = False
+        self.fetched_with = None
+        self.timings = {}
+        self.error = None
 
     def set_url(self, url):
         """
@@ -36,35 +78,197 @@ class ContentParser:
         """
         self.url = url
 
-    def fetch_content(self):
+    def _record_validators(self, response, etag, last_modified):
+        """
+        Record the validators of a response and whether it was a 304 Not Modified.
+
+        Args:
+            response (requests.Response): The response to a (conditional) request.
+            etag (str): The ETag that was sent, or None.
+            last_modified (str): The Last-Modified date that was sent, or None.
+        """
+        self.not_modified = response.status_code == 304 and bool(etag or last_modified)
+        self.etag = response.headers.get("ETag", etag if self.not_modified else None)
+        self.last_modified = response.headers.get("Last-Modified", last_modified if self.not_modified else None)
+
+    def check_modified(self, etag=None, last_modified=None):
+        """
+        Ask the server whether the web page changed since the given validators, and record its current ones.
+
+        Sends a conditional HEAD request with If-None-Match and If-Modified-Since. Errors are treated as
+        "modified" so the caller falls back to a full fetch.
+
+        Args:
+            etag (str, optional): The previously seen ETag. Defaults to None.
+            last_modified (str, optional): The previously seen Last-Modified date. Defaults to None.
+
+        Returns:
+            bool: False if the server answered 304 Not Modified, True otherwise.
+        """
+        fetcher = self.fetcher or HttpFetcher(policy=self.policy)
+        started = time.perf_counter()
+        try:
+            response = fetcher.head(self.url, etag, last_modified)
+        except Exception as e:
+            logging.warning(f"Error revalidating URL {self.url}: {str(e)}")
+            return True
+        finally:
+            self.timings["probe"] = time.perf_counter() - started
+        self._record_validators(response, etag, last_modified)
+        return not self.not_modified
+
+    def fetch_content(self, etag=None, last_modified=None):
+        """
+        Fetch the HTML content of the web page, skipping the download if the server reports it unchanged.
+
+        Without an HttpFetcher the page is rendered with Selenium. With one, hosts known to need a browser
+        are revalidated with a HEAD request and rendered; other pages are fetched with a conditional GET
+        and only rendered if the response turns out to be a JavaScript shell, which makes the browser the
+        remembered choice for the host. A failed request is retried once in the browser without changing
+        that choice, but an error status (e.g. 404 or 503) is not rendered. Errors are not raised: if no
+        attempt succeeded, `html_content` stays None and `error` holds the last error.
+
+        Args:
+            etag (str, optional): The previously seen ETag. Defaults to None.
+            last_modified (str, optional): The previously seen Last-Modified date. Defaults to None.
+        """
+        self.timings = {}
+        self.error = None
+        if self.fetcher is None:
+            if (etag or last_modified) and not self.check_modified(etag, last_modified):
+                return
+            self.fetch_browser()
+            return
+
+        if self.fetcher.get_strategy(self.url) == HttpFetcher.BROWSER:
+            if not self.check_modified(etag, last_modified):
+                return
+            self.fetch_browser()
+            return
+
+        server_rendered = self.fetch_http(etag, last_modified)
+        if server_rendered or self.not_modified:
+            self.fetcher.set_strategy(self.url, HttpFetcher.HTTP)
+            return
+        if isinstance(self.error, requests.HTTPError):
+            return
+        if server_rendered is not None:
+            self.fetcher.set_strategy(self.url, HttpFetcher.BROWSER)
+        self.fetch_browser()
+
+    def fetch_http(self, etag=None, last_modified=None):
+        """
+        Fetch the HTML content of the web page over plain HTTP with a conditional GET.
+
+        Args:
+            etag (str, optional): The previously seen ETag. Defaults to None.
+            last_modified (str, optional): The previously seen Last-Modified date. Defaults to None.
+
+        Returns:
+            bool or None: True if the page was fetched and is server-rendered, False if it was not modified
+            or is a JavaScript shell that needs a browser, None if the request failed or the server answered
+            with an error status, which is then recorded in `error` as a `requests.HTTPError`.
+        """
+        started = time.perf_counter()
+        try:
+            response = self.fetcher.get(self.url, etag, last_modified)
+        except Exception as e:
+            logging.error(f"Error fetching URL {self.url} over HTTP: {str(e)}")
+            self.error = e
+            return None
+        finally:
+            self.timings["fetch_http"] = time.perf_counter() - started
+        self._record_validators(response, etag, last_modified)
+        if self.not_modified:
+            return False
+        if response.status_code != 200:
+            self.error = requests.HTTPError(f"{response.status_code} error fetching URL {self.url}",
+                                            response=response)
+            logging.error(f"Error fetching URL {self.url} over HTTP: {str(self.error)}")
+            return None
+        html_content = self.fetcher.decode(response)
+        if self.fetcher.is_js_shell(html_content):
+            return False
+        self.html_content = html_content
+        self.fetched_with = HttpFetcher.HTTP
+        return True
+
+    def _render(self, driver, timeout):
+        """
+        Load the web page in a browser within a page load timeout.
+
+        Args:
+            driver: The WebDriver to load the page with.
+            timeout (float): The page load timeout in seconds.
+
+        Returns:
+            str: The rendered HTML content.
+        """
+        if self.scheduler is not None:
+            self.scheduler.acquire(self.url)
+        driver.set_page_load_timeout(timeout)
+        driver.get(self.url)
+        return driver.page_source
+
+    def fetch_browser(self):
         """
         Fetch the HTML content of the web page using Selenium and Chrome WebDriver.
         """
+        started = time.perf_counter()
+        try:
+            self._fetch_browser()
+        finally:
+            self.timings["fetch_browser"] = time.perf_counter() - started
+
+    def _fetch_browser(self):
+        """
+        Render the web page in a pooled browser session, or in a new Chrome WebDriver without a pool.
+        """
+        if self.pool is not None:
+            def attempt(timeout):
+                with self.pool.session() as driver:
+                    return self._render(driver, timeout)
+
+            try:
+                self.html_content = self.policy.call(self.url, attempt, page_load=True)
+                self.fetched_with = HttpFetcher.BROWSER
+            except Exception as e:
+                logging.error(f"Error fetching URL {self.url} with Selenium: {str(e)}")
+                self.error = e
+            return
+
         chrome_options = Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.96 Safari/537.36")
         try:
             driver = webdriver.Chrome(options=chrome_options)
-            driver.get(self.url)
-            self.html_content = driver.page_source
-            driver.quit()
+            try:
+                self.html_content = self.policy.call(self.url, lambda timeout: self._render(driver, timeout),
+                                                     page_load=True)
+                self.fetched_with = HttpFetcher.BROWSER
+            finally:
+                driver.quit()
         except Exception as e:
-            print(f"Error fetching URL {self.url} with Selenium: {str(e)}")
+            logging.error(f"Error fetching URL {self.url} with Selenium: {str(e)}")
+            self.error = e
 
     def parse_content(self):
         """
-        Parse the text content from the HTML using BeautifulSoup.
+        Parse the text content of the leaf divs from the HTML in a single streaming pass.
         """
         if self.html_content:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
-            divs = soup.find_all('div')
-            for div in divs:
-                if not div.find_all('div'):
-                    text = div.get_text(strip=True)
-                    if text:
-                        self.content += text + '\n'
+            self.content += extract_leaf_div_text(self.html_content)
         # self.content = self.content[2000:]
 
+    def get_fingerprint(self):
+        """
+        Get a fingerprint of the parsed text content.
+
+        Returns:
+            str: The SHA-1 hex digest of the parsed text content.
+        """
+        return hashlib.sha1(self.content.encode()).hexdigest()
+
     def reset(self):
         """
         Reset the content parser's attributes.
@@ -72,3 +276,9 @@ class ContentParser:
         self.content = ""
         self.url = ""
         self.html_content = ""
+        self.etag = None
+        self.last_modified = None
+        self.not_modified = False
+        self.fetched_with = None
+        self.timings = {}
+        self.error = None
@@ -0,0 +1,300 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from selenium.common.exceptions import TimeoutException
+
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, TimeoutException)
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+HOST_FAILURE_STATUSES = frozenset({502, 503, 504})
+
+
+def retry_after(response):
+    """
+    Get the delay a response asks for in its Retry-After header.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        float or None: The delay in seconds, or None if the header is missing or malformed.
+    """
+    value = getattr(response, "headers", {}).get("Retry-After", "").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of fetching from a host whose circuit breaker is open.
+
+    Attributes:
+        host (str): The host that is considered dead.
+    """
+
+    def __init__(self, host):
+        super().__init__(f"Circuit open for {host}, skipping request")
+        self.host = host
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the total deadline of a request runs out before it succeeds."""
+
+
+class FetchPolicy:
+    """
+    A shared policy for every network fetch: timeouts, a total deadline, retries and circuit breaking.
+
+    Each request gets a connect timeout, a read (or page load) timeout and a total deadline covering all of
+    its attempts; timeouts never exceed the time left before the deadline. Connection errors, timeouts
+    and 429/5xx answers are retried a bounded number of times after the delay asked for by their Retry-After
+    header, or else after a backoff with full jitter; a delay reaching past the deadline ends the retries.
+    Hosts that keep failing with connection errors, timeouts or 502-504 answers get their circuit opened:
+    requests to them fail fast with `CircuitOpen` for `reset_timeout` seconds, then a single trial request
+    decides whether the circuit closes again. Attempts, failed attempts and requests rejected by an open circuit are
+    counted per host for the first `counted_hosts` hosts, and together under "other" for the rest, so the
+    counters only ever grow and their number stays bounded.
+
+    Args:
+        connect_timeout (float, optional): Seconds to establish a connection. Defaults to 5.
+        read_timeout (float, optional): Seconds to wait for response data. Defaults to 10.
+        page_load_timeout (float, optional): Seconds to wait for a browser page load. Defaults to 30.
+        deadline (float, optional): Seconds for all attempts of one request together. Defaults to 30.
+        retries (int, optional): The number of retries after the first attempt. Defaults to 2.
+        backoff (float, optional): The base backoff in seconds, doubled after every attempt. Defaults to 0.5.
+        max_backoff (float, optional): The maximum backoff in seconds. Defaults to 5.
+        failure_threshold (int, optional): Consecutive host failures that open its circuit. Defaults to 5.
+        reset_timeout (float, optional): Seconds an open circuit rejects requests. Defaults to 30.
+        max_hosts (int, optional): The number of hosts whose circuit state is remembered. Defaults to 10000.
+        counted_hosts (int, optional): The number of hosts counted separately. Defaults to 20.
+        clock (callable, optional): Returns the current time in seconds. Defaults to `time.monotonic`.
+        sleep (callable, optional): Sleeps for a number of seconds. Defaults to `time.sleep`.
+
+    Attributes:
+        connect_timeout (float): Seconds to establish a connection.
+        read_timeout (float): Seconds to wait for response data.
+        page_load_timeout (float): Seconds to wait for a browser page load.
+        deadline (float): Seconds for all attempts of one request together.
+        retries (int): The number of retries after the first attempt.
+        backoff (float): The base backoff in seconds.
+        max_backoff (float): The maximum backoff in seconds.
+        failure_threshold (int): Consecutive host failures that open its circuit.
+        reset_timeout (float): Seconds an open circuit rejects requests.
+        max_hosts (int): The number of hosts whose circuit state is remembered.
+        counted_hosts (int): The number of hosts counted separately.
+
+    Methods:
+        call(url, attempt, page_load=False): Run a fetch under the policy.
+        is_open(url): Check whether the circuit of the URL's host is open.
+        open_circuits(): Get the hosts whose circuit is open.
+        host_stats(): Get the attempt, error and rejection counters per host.
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=10, page_load_timeout=30, deadline=30, retries=2, backoff=0.5,
+                 max_backoff=5, failure_threshold=5, reset_timeout=30, max_hosts=10000, counted_hosts=20,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.page_load_timeout = page_load_timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_hosts = max_hosts
+        self.counted_hosts = counted_hosts
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        # host -> [consecutive failures, time the circuit opened or None, trial request in flight]
+        self._circuits = OrderedDict()
+        # host -> [attempts, failed attempts, requests rejected by an open circuit]
+        self._hosts = {}
+        self._other_hosts = [0, 0, 0]
+
+    def _allow(self, host):
+        """
+        Check whether a request to a host may be sent, letting a single trial through a circuit due for reset.
+
+        Args:
+            host (str): The host.
+
+        Returns:
+            bool: True if the request may be sent.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit[1] is None:
+                return True
+            if self._clock() - circuit[1] < self.reset_timeout or circuit[2]:
+                return False
+            circuit[2] = True
+            return True
+
+    def _record(self, host, failed):
+        """
+        Record the outcome of a request to a host.
+
+        Args:
+            host (str): The host.
+            failed (bool): True if the host failed to answer properly.
+        """
+        with self._lock:
+            if not failed:
+                self._circuits.pop(host, None)
+                return
+            circuit = self._circuits.get(host) or [0, None, False]
+            circuit[0] += 1
+            if circuit[2] or circuit[0] >= self.failure_threshold:
+                circuit[1], circuit[2] = self._clock(), False
+            self._circuits[host] = circuit
+            self._circuits.move_to_end(host)
+            while len(self._circuits) > self.max_hosts:
+                self._circuits.popitem(last=False)
+
+    def _count(self, host, index):
+        """
+        Increase one of the counters of a host, or of "other" once `counted_hosts` hosts have counters.
+
+        Args:
+            host (str): The host.
+            index (int): 0 for an attempt, 1 for a failed attempt, 2 for a rejected request.
+        """
+        with self._lock:
+            counters = self._hosts.get(host)
+            if counters is None:
+                if len(self._hosts) < self.counted_hosts:
+                    counters = self._hosts[host] = [0, 0, 0]
+                else:
+                    counters = self._other_hosts
+            counters[index] += 1
+
+    def _end_trial(self, host):
+        """
+        Let another trial through a circuit whose trial request ended without a verdict on the host.
+
+        Args:
+            host (str): The host.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None:
+                circuit[2] = False
+
+    def is_open(self, url):
+        """
+        Check whether the circuit of the URL's host is open.
+
+        Args:
+            url (str): A URL on the host.
+
+        Returns:
+            bool: True if requests to the host currently fail fast.
+        """
+        with self._lock:
+            circuit = self._circuits.get(urlsplit(url).netloc.lower())
+            return circuit is not None and circuit[1] is not None and \
+                self._clock() - circuit[1] < self.reset_timeout
+
+    def open_circuits(self):
+        """
+        Get the hosts whose circuit is open.
+
+        Returns:
+            list: The hosts whose requests currently fail fast.
+        """
+        with self._lock:
+            now = self._clock()
+            return [host for host, circuit in self._circuits.items()
+                    if circuit[1] is not None and now - circuit[1] < self.reset_timeout]
+
+    def host_stats(self):
+        """
+        Get the attempt, error and rejection counters per host.
+
+        Returns:
+            dict: The `attempts`, `errors` (connection errors, timeouts, other exceptions and 429/5xx
+            answers) and `rejected` (by an open circuit) counters, keyed by host, plus "other" for the hosts
+            beyond `counted_hosts` once any was counted.
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+            if any(self._other_hosts):
+                hosts["other"] = self._other_hosts
+            return {host: {"attempts": counters[0], "errors": counters[1], "rejected": counters[2]}
+                    for host, counters in hosts.items()}
+
+    def call(self, url, attempt, page_load=False):
+        """
+        Run a fetch under the policy.
+
+        Args:
+            url (str): The URL being fetched; its host selects the circuit breaker.
+            attempt (callable): Performs one attempt. Called with a `(connect, read)` timeout tuple for
+                requests, or with the page load timeout in seconds if `page_load` is set.
+            page_load (bool, optional): The attempt loads the page in a browser. Defaults to False.
+
+        Returns:
+            The return value of the last attempt. A response with a retryable status is returned once the
+            retries are used up.
+
+        Raises:
+            CircuitOpen: If the host's circuit is open.
+            DeadlineExceeded: If the deadline ran out before an attempt could be made.
+            Exception: The error of the last attempt if every attempt failed.
+        """
+        host = urlsplit(url).netloc.lower()
+        deadline = self._clock() + self.deadline
+        for attempt_number in range(self.retries + 1):
+            if not self._allow(host):
+                self._count(host, 2)
+                raise CircuitOpen(host)
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"Deadline of {self.deadline} seconds exceeded for {url}")
+            if page_load:
+                timeout = min(self.page_load_timeout, remaining)
+            else:
+                timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+            last_attempt = attempt_number == self.retries
+            self._count(host, 0)
+            try:
+                result = attempt(timeout)
+            except RETRYABLE_ERRORS:
+                self._count(host, 1)
+                self._record(host, failed=True)
+                if last_attempt:
+                    raise
+                result = None
+            except Exception:
+                self._count(host, 1)
+                self._end_trial(host)
+                raise
+            else:
+                status = getattr(result, "status_code", None)
+                if status is not None and (status in RETRYABLE_STATUSES or status >= 500):
+                    self._count(host, 1)
+                self._record(host, failed=status in HOST_FAILURE_STATUSES)
+                if last_attempt or status not in RETRYABLE_STATUSES:
+                    return result
+
+            delay = retry_after(result) if result is not None else None
+            if delay is None:
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt_number))
+            if self._clock() + delay >= deadline:
+                if result is not None:
+                    return result
+                raise DeadlineExceeded(f"Deadline of {self.deadline} seconds exceeded for {url}")
+            if result is not None:
+                result.close()
+            self._sleep(delay)
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from app.parser.HttpFetcher import DEFAULT_HEADERS
+
+
+class HostScheduler:
+    """
+    A shared fetch scheduler that keeps every fetch path polite to each origin.
+
+    Requests to an origin (scheme and host) are paced by a token bucket that refills `rate` tokens per
+    second up to `burst`. The `robots.txt` of each origin is fetched once, cached for `robots_ttl` seconds
+    and used to skip disallowed URLs; its `Crawl-delay` or `Request-rate` slows the origin's bucket
+    down further. No lock is held while waiting for a token, so a wait never delays other origins by
+    itself, and `round_robin` interleaves a batch by origin so many domains are fetched in parallel
+    instead of one after another.
+
+    `acquire` sleeps in the calling thread. Callers that hand fetches to a bounded thread pool wait with
+    `prepay_async` before submitting instead, so pool threads are not held by one slow origin: the slot
+    taken there is spent by the next `acquire` of the origin, which then returns at once.
+
+    Args:
+        rate (float, optional): The sustained number of requests per second to one origin. Defaults to 2.
+        burst (int, optional): The number of requests allowed at once after an idle period. Defaults to 4.
+        user_agent (str, optional): The user agent whose robots.txt rules apply. Defaults to "*".
+        respect_robots (bool, optional): Honour robots.txt rules and crawl delays. Defaults to True.
+        robots_ttl (float, optional): Seconds a fetched robots.txt is reused. Defaults to 3600.
+        timeout (float, optional): The timeout in seconds of robots.txt requests. Defaults to 10.
+        max_hosts (int, optional): The number of origins whose state is remembered. Defaults to 10000.
+        clock (callable, optional): Returns the current time in seconds. Defaults to `time.monotonic`.
+        sleep (callable, optional): Sleeps for a number of seconds. Defaults to `time.sleep`.
+
+    Attributes:
+        rate (float): The sustained number of requests per second to one origin.
+        burst (int): The number of requests allowed at once after an idle period.
+        user_agent (str): The user agent whose robots.txt rules apply.
+        respect_robots (bool): Whether robots.txt rules and crawl delays are honoured.
+        robots_ttl (float): Seconds a fetched robots.txt is reused.
+        timeout (float): The timeout in seconds of robots.txt requests.
+        max_hosts (int): The number of origins whose state is remembered.
+
+    Methods:
+        allowed(url): Check whether robots.txt allows fetching a URL.
+        reserve(url): Reserve the next request slot of the URL's origin.
+        acquire(url): Wait for the next request slot of the URL's origin.
+        acquire_async(url): Coroutine version of `acquire`.
+        prepay_async(url): Wait for a request slot and leave it to the next `acquire` of the origin.
+        backoff(url, delay): Pause requests to the URL's origin.
+        round_robin(urls): Interleave URLs by origin.
+        close(): Close the pooled connections used for robots.txt.
+    """
+
+    def __init__(self, rate=2.0, burst=4, user_agent="*", respect_robots=True, robots_ttl=3600, timeout=10,
+                 max_hosts=10000, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.user_agent = user_agent
+        self.respect_robots = respect_robots
+        self.robots_ttl = robots_ttl
+        self.timeout = timeout
+        self.max_hosts = max_hosts
+        self._clock = clock
+        self._sleep = sleep
+        self._session = requests.Session()
+        self._session.headers.update(DEFAULT_HEADERS)
+        self._lock = threading.Lock()
+        # origin -> [tokens, last refill time, rate, burst, prepaid slots]
+        self._buckets = OrderedDict()
+        # origin -> (RobotFileParser, fetch time)
+        self._robots = OrderedDict()
+        self._robots_locks = {}
+
+    @staticmethod
+    def origin(url):
+        """
+        Get the origin of a URL.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            str: The lowercased scheme and host of the URL, e.g. "https://example.com".
+        """
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def _remember(self, table, origin, value):
+        """
+        Store per-origin state, forgetting the least recently used origins beyond `max_hosts`.
+
+        Args:
+            table (OrderedDict): The per-origin table.
+            origin (str): The origin.
+            value: The state to store.
+        """
+        table[origin] = value
+        table.move_to_end(origin)
+        while len(table) > self.max_hosts:
+            table.popitem(last=False)
+
+    def _fetch_robots(self, origin):
+        """
+        Download and parse the robots.txt of an origin.
+
+        As in `RobotFileParser.read`, a 401 or 403 answer disallows everything, while other errors and a
+        missing file allow everything.
+
+        Args:
+            origin (str): The origin.
+
+        Returns:
+            RobotFileParser: The parsed rules.
+        """
+        robots = RobotFileParser(origin + "/robots.txt")
+        try:
+            response = self._session.get(origin + "/robots.txt", timeout=self.timeout)
+        except Exception as e:
+            logging.warning(f"Error fetching robots.txt of {origin}: {str(e)}")
+            robots.allow_all = True
+            return robots
+        if response.status_code in (401, 403):
+            robots.disallow_all = True
+        elif response.status_code >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(response.text.splitlines())
+        return robots
+
+    def _get_robots(self, origin):
+        """
+        Get the cached robots.txt rules of an origin, fetching them once per `robots_ttl`.
+
+        Args:
+            origin (str): The origin.
+
+        Returns:
+            RobotFileParser: The parsed rules.
+        """
+        with self._lock:
+            cached = self._robots.get(origin)
+            if cached is not None and self._clock() - cached[1] < self.robots_ttl:
+                return cached[0]
+            origin_lock = self._robots_locks.setdefault(origin, threading.Lock())
+
+        with origin_lock:
+            with self._lock:
+                cached = self._robots.get(origin)
+                if cached is not None and self._clock() - cached[1] < self.robots_ttl:
+                    return cached[0]
+            robots = self._fetch_robots(origin)
+            with self._lock:
+                self._remember(self._robots, origin, (robots, self._clock()))
+                self._robots_locks.pop(origin, None)
+                bucket = self._buckets.get(origin)
+                if bucket is not None:
+                    bucket[2], bucket[3] = self._limits(robots)
+            return robots
+
+    def _limits(self, robots):
+        """
+        Get the rate and burst of an origin, slowed down by its robots.txt crawl delay.
+
+        Args:
+            robots (RobotFileParser): The parsed rules of the origin, or None.
+
+        Returns:
+            Tuple[float, int]: The requests per second and the burst size.
+        """
+        if robots is None:
+            return self.rate, self.burst
+        delay = robots.crawl_delay(self.user_agent)
+        request_rate = robots.request_rate(self.user_agent)
+        if request_rate is not None and request_rate.requests:
+            delay = max(float(delay or 0), request_rate.seconds / request_rate.requests)
+        if delay:
+            return min(self.rate, 1 / float(delay)), 1
+        return self.rate, self.burst
+
+    def allowed(self, url):
+        """
+        Check whether robots.txt allows fetching a URL.
+
+        Args:
+            url (str): The URL to check.
+
+        Returns:
+            bool: True if the URL may be fetched.
+        """
+        if not self.respect_robots:
+            return True
+        return self._get_robots(self.origin(url)).can_fetch(self.user_agent, url)
+
+    def reserve(self, url):
+        """
+        Reserve the next request slot of the URL's origin without waiting for it. A slot prepaid with
+        `prepay_async` is used first.
+
+        Args:
+            url (str): The URL to fetch.
+
+        Returns:
+            float: The number of seconds to wait before sending the request.
+        """
+        origin = self.origin(url)
+        robots = self._get_robots(origin) if self.respect_robots else None
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(origin)
+            if bucket is None:
+                rate, burst = self._limits(robots)
+                bucket = [burst, now, rate, burst, 0]
+            if bucket[4] > 0:
+                bucket[4] -= 1
+                return 0.0
+            tokens, last, rate, burst, _ = bucket
+            tokens = min(burst, tokens + (now - last) * rate) - 1
+            bucket[0], bucket[1] = tokens, now
+            self._remember(self._buckets, origin, bucket)
+        return max(0.0, -tokens / rate)
+
+    def acquire(self, url):
+        """
+        Wait for the next request slot of the URL's origin.
+
+        Args:
+            url (str): The URL to fetch.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    async def acquire_async(self, url):
+        """
+        Wait for the next request slot of the URL's origin without blocking the event loop.
+
+        Args:
+            url (str): The URL to fetch.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        delay = await asyncio.get_running_loop().run_in_executor(None, self.reserve, url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    async def prepay_async(self, url):
+        """
+        Wait for the next request slot of the URL's origin without blocking the event loop, and leave it
+        to the next `acquire` of the origin. At most `burst` slots are kept per origin, and a backoff
+        drops them.
+
+        Args:
+            url (str): The URL about to be fetched in another thread.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        delay = await self.acquire_async(url)
+        with self._lock:
+            bucket = self._buckets.get(self.origin(url))
+            if bucket is not None:
+                bucket[4] = min(bucket[3], bucket[4] + 1)
+        return delay
+
+    def backoff(self, url, delay):
+        """
+        Pause requests to the URL's origin, e.g. after a 429 or 503 answer with Retry-After.
+
+        Args:
+            url (str): A URL on the origin.
+            delay (float): The number of seconds before the next request may be sent.
+        """
+        origin = self.origin(url)
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(origin) or [self.burst, now, self.rate, self.burst, 0]
+            bucket[0], bucket[1], bucket[4] = min(bucket[0], 1 - delay * bucket[2]), now, 0
+            self._remember(self._buckets, origin, bucket)
+
+    def round_robin(self, urls):
+        """
+        Interleave URLs by origin, keeping their order within each origin.
+
+        Args:
+            urls (iterable): The URLs to order.
+
+        Returns:
+            list: The URLs, taking one from each origin in turn.
+        """
+        queues = OrderedDict()
+        for url in urls:
+            queues.setdefault(self.origin(url), []).append(url)
+        ordered, position = [], 0
+        while queues:
+            for origin in list(queues):
+                queue = queues[origin]
+                ordered.append(queue[position])
+                if position + 1 >= len(queue):
+                    del queues[origin]
+            position += 1
+        return ordered
+
+    def close(self):
+        """
+        Close the pooled connections used for robots.txt.
+        """
+        self._session.close()
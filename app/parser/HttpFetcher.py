@@ -0,0 +1,222 @@
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.parser.FetchPolicy import FetchPolicy
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.96 Safari/537.36'}
+
+_SCRIPT_RE = re.compile(r"<(script|style|noscript|template)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.IGNORECASE)
+
+
+class HttpFetcher:
+    """
+    A pooled HTTP client that fetches pages without a browser and remembers which hosts need one.
+
+    Pages are fetched with plain keep-alive HTTP requests. A page whose HTML is a JavaScript shell, i.e.
+    has almost no visible text or far more script than text, needs a browser render; that decision is
+    remembered per host so later URLs on the same host go straight to the right fetch path.
+
+    Args:
+        pool_size (int, optional): The number of keep-alive connections kept per host. Defaults to 10.
+        timeout (float, optional): The read timeout in seconds of the default policy. Defaults to 10.
+        min_text_length (int, optional): Pages with less visible text are JavaScript shells. Defaults to 200.
+        max_script_ratio (float, optional): Pages with more script characters per visible text character
+            are JavaScript shells. Defaults to 20.
+        max_hosts (int, optional): The number of per-host decisions to remember. Defaults to 10000.
+        headers (dict, optional): HTTP headers to send. Defaults to a common User-Agent header.
+        scheduler (HostScheduler, optional): Paces requests per origin. Defaults to None.
+        policy (FetchPolicy, optional): Timeouts, retries and circuit breaking of requests. Defaults to a
+            policy with `timeout` as read timeout.
+
+    Attributes:
+        session (requests.Session): The pooled HTTP session.
+        timeout (float): The read timeout in seconds of the default policy.
+        min_text_length (int): The minimum visible text length of a server-rendered page.
+        max_script_ratio (float): The maximum script-to-text ratio of a server-rendered page.
+        max_hosts (int): The number of per-host decisions to remember.
+        scheduler (HostScheduler): Paces requests per origin, or None.
+        policy (FetchPolicy): Timeouts, retries and circuit breaking of requests.
+
+    Methods:
+        get(url, etag=None, last_modified=None): Send a (conditional) GET request.
+        head(url, etag=None, last_modified=None): Send a (conditional) HEAD request.
+        decode(response): Decode the body of a response.
+        is_js_shell(html): Check whether HTML needs JavaScript to show its content.
+        get_strategy(url): Get the remembered fetch strategy of the URL's host.
+        set_strategy(url, strategy): Remember the fetch strategy of the URL's host.
+        close(): Close the pooled connections.
+    """
+
+    HTTP = "http"
+    BROWSER = "browser"
+
+    def __init__(self, pool_size=10, timeout=10, min_text_length=200, max_script_ratio=20, max_hosts=10000,
+                 headers=None, scheduler=None, policy=None):
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = timeout
+        self.min_text_length = min_text_length
+        self.max_script_ratio = max_script_ratio
+        self.max_hosts = max_hosts
+        self.scheduler = scheduler
+        self.policy = policy or FetchPolicy(read_timeout=timeout)
+        self._strategies = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _conditional_headers(etag, last_modified):
+        """
+        Build If-None-Match and If-Modified-Since headers from validators.
+
+        Args:
+            etag (str): The previously seen ETag, or None.
+            last_modified (str): The previously seen Last-Modified date, or None.
+
+        Returns:
+            dict: The conditional request headers.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _send(self, method, url, etag, last_modified, **kwargs):
+        """
+        Send a request under the fetch policy, pacing every attempt with the scheduler and pausing the
+        origin if it asks to slow down.
+
+        Args:
+            method (callable): The session method to call.
+            url (str): The URL to request.
+            etag (str): The previously seen ETag, or None.
+            last_modified (str): The previously seen Last-Modified date, or None.
+            **kwargs: Additional keyword arguments for the session method.
+
+        Returns:
+            requests.Response: The response.
+        """
+        headers = self._conditional_headers(etag, last_modified)
+
+        def attempt(timeout):
+            if self.scheduler is not None:
+                self.scheduler.acquire(url)
+            response = method(url, headers=headers, timeout=timeout, **kwargs)
+            if self.scheduler is not None and response.status_code in (429, 503):
+                retry_after = response.headers.get("Retry-After", "")
+                self.scheduler.backoff(url, float(retry_after) if retry_after.isdigit() else 1 / self.scheduler.rate)
+            return response
+
+        return self.policy.call(url, attempt)
+
+    def get(self, url, etag=None, last_modified=None):
+        """
+        Send a GET request, conditional if validators are given.
+
+        Args:
+            url (str): The URL to fetch.
+            etag (str, optional): The previously seen ETag. Defaults to None.
+            last_modified (str, optional): The previously seen Last-Modified date. Defaults to None.
+
+        Returns:
+            requests.Response: The response.
+        """
+        return self._send(self.session.get, url, etag, last_modified)
+
+    def head(self, url, etag=None, last_modified=None):
+        """
+        Send a HEAD request, conditional if validators are given.
+
+        Args:
+            url (str): The URL to check.
+            etag (str, optional): The previously seen ETag. Defaults to None.
+            last_modified (str, optional): The previously seen Last-Modified date. Defaults to None.
+
+        Returns:
+            requests.Response: The response.
+        """
+        return self._send(self.session.head, url, etag, last_modified, allow_redirects=True)
+
+    @staticmethod
+    def decode(response):
+        """
+        Decode the body of a response, honouring a <meta charset> when the headers name no charset.
+
+        Args:
+            response (requests.Response): The response to decode.
+
+        Returns:
+            str: The decoded body.
+        """
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            match = _META_CHARSET_RE.search(response.content[:4096])
+            response.encoding = match.group(1).decode("ascii") if match else response.apparent_encoding
+        try:
+            return response.text
+        except LookupError:
+            response.encoding = response.apparent_encoding
+            return response.text
+
+    def is_js_shell(self, html):
+        """
+        Check whether HTML needs JavaScript to show its content.
+
+        Args:
+            html (str): The HTML to check.
+
+        Returns:
+            bool: True if the page has too little visible text or too much script per text character.
+        """
+        without_scripts = _SCRIPT_RE.sub(" ", html)
+        text_length = len(_SPACE_RE.sub(" ", _TAG_RE.sub(" ", without_scripts)).strip())
+        if text_length < self.min_text_length:
+            return True
+        script_length = len(html) - len(without_scripts)
+        return script_length > self.max_script_ratio * text_length
+
+    def get_strategy(self, url):
+        """
+        Get the remembered fetch strategy of the URL's host.
+
+        Args:
+            url (str): A URL on the host.
+
+        Returns:
+            str or None: `HttpFetcher.HTTP`, `HttpFetcher.BROWSER` or None if the host was not probed yet.
+        """
+        with self._lock:
+            return self._strategies.get(urlsplit(url).netloc.lower())
+
+    def set_strategy(self, url, strategy):
+        """
+        Remember the fetch strategy of the URL's host.
+
+        Args:
+            url (str): A URL on the host.
+            strategy (str): `HttpFetcher.HTTP` or `HttpFetcher.BROWSER`.
+        """
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            self._strategies[host] = strategy
+            self._strategies.move_to_end(host)
+            while len(self._strategies) > self.max_hosts:
+                self._strategies.popitem(last=False)
+
+    def close(self):
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
@@ -1,8 +1,13 @@
+import logging
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from bs4 import BeautifulSoup
+from collections import deque
 from urllib.parse import urljoin
 
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.urls import SeenSet, canonicalize
+
 
 class SeleniumLinkParser:
     """
@@ -10,9 +15,20 @@ class SeleniumLinkParser:
 
     Args:
         driver_path (str): The path to the Chrome WebDriver executable (optional).
+        pool (BrowserPool): A pool of browser sessions to fetch with (optional).
+        rules (dict): Per-domain canonicalization rules, see `urls.canonicalize` (optional).
+        seen_factory (callable): Creates the seen-URL structure of a crawl (default is SeenSet).
+        scheduler (HostScheduler): Paces page loads per origin and skips links disallowed by robots.txt
+            (optional).
+        policy (FetchPolicy): Page load timeouts, retries and circuit breaking (default is a default policy).
 
     Attributes:
         driver_path (str): The path to the Chrome WebDriver executable.
+        pool (BrowserPool): The pool of browser sessions to fetch with.
+        rules (dict): Per-domain canonicalization rules.
+        seen_factory (callable): Creates the seen-URL structure of a crawl.
+        scheduler (HostScheduler): Paces page loads per origin, or None.
+        policy (FetchPolicy): Page load timeouts, retries and circuit breaking.
         site_links (list): A list of parsed links.
         type (str): The type of link parser (Selenium).
 
@@ -26,8 +42,13 @@ class SeleniumLinkParser:
         length(): Get the number of parsed links.
     """
 
-    def __init__(self, driver_path=""):
+    def __init__(self, driver_path="", pool=None, rules=None, seen_factory=SeenSet, scheduler=None, policy=None):
         self.driver_path = driver_path
+        self.pool = pool
+        self.rules = rules
+        self.seen_factory = seen_factory
+        self.scheduler = scheduler
+        self.policy = policy or FetchPolicy()
         self.site_links = []
         self.type = "Selenium"
 
@@ -41,41 +62,78 @@ class SeleniumLinkParser:
         Returns:
             str: The HTML content of the web page.
         """
+        if self.pool is not None:
+            def attempt(timeout):
+                with self.pool.session() as driver:
+                    return self._render(driver, url, timeout)
+
+            return self.policy.call(url, attempt, page_load=True)
+
         chrome_options = ChromeOptions()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.96 Safari/537.36")
         driver = webdriver.Chrome(options=chrome_options)
-        driver.get(url)
-        html_content = driver.page_source
-        driver.quit()
-        self.site_links.clear()
+        try:
+            html_content = self.policy.call(url, lambda timeout: self._render(driver, url, timeout), page_load=True)
+        finally:
+            driver.quit()
         return html_content
 
+    def _render(self, driver, url, timeout):
+        """
+        Load a web page in a browser within a page load timeout.
+
+        Args:
+            driver: The WebDriver to load the page with.
+            url (str): The URL of the web page.
+            timeout (float): The page load timeout in seconds.
+
+        Returns:
+            str: The rendered HTML content.
+        """
+        if self.scheduler is not None:
+            self.scheduler.acquire(url)
+        driver.set_page_load_timeout(timeout)
+        driver.get(url)
+        return driver.page_source
+
     def crawl(self, start_url, max_pages=10):
         """
-        Crawl web pages to extract links.
+        Crawl web pages to extract links, replacing the links of any previous crawl.
 
         Args:
             start_url (str): The starting URL for crawling.
             max_pages (int): The maximum number of pages to crawl (default is 10).
         """
-        visited_urls, pages_to_visit = set(), [start_url]
+        self.site_links.clear()
+        start_url = canonicalize(start_url, self.rules) or start_url
+        seen, pages_to_visit = self.seen_factory(), deque([start_url])
+        seen.add(start_url)
 
         while pages_to_visit and len(self.site_links) < max_pages:
-            url = pages_to_visit.pop(0)
-            if url in visited_urls:
-                continue
-            visited_urls.add(url)
+            url = pages_to_visit.popleft()
             try:
                 html_content = self.get_content(url)
                 soup = BeautifulSoup(html_content, 'html.parser')
                 for link in soup.find_all('a', href=True):
-                    href, abs_url = link['href'], urljoin(url, link['href'])
-                    if abs_url not in visited_urls and abs_url not in self.site_links:
+                    abs_url = canonicalize(urljoin(url, link['href']), self.rules)
+                    if abs_url is not None and seen.add(abs_url) and self._allowed(abs_url):
                         pages_to_visit.append(abs_url)
                         self.site_links.append(abs_url)
             except Exception as e:
-                print(f"Error fetching URL {url}: {str(e)}")
+                logging.error(f"Error fetching URL {url}: {str(e)}")
+
+    def _allowed(self, url):
+        """
+        Check whether robots.txt allows crawling a URL.
+
+        Args:
+            url (str): The URL to check.
+
+        Returns:
+            bool: True if the URL may be crawled.
+        """
+        return self.scheduler is None or self.scheduler.allowed(url)
 
     def print(self):
         """
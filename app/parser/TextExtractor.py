@@ -0,0 +1,179 @@
+from html.parser import HTMLParser
+
+from bs4.dammit import EntitySubstitution
+
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta', 'param',
+    'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+})
+NON_TEXT_CONTAINERS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+
+
+class LeafDivTextExtractor(HTMLParser):
+    """
+    A streaming extractor of the text of leaf divs (divs without nested divs).
+
+    Produces the same text as building a BeautifulSoup tree with `html.parser` and calling
+    `get_text(strip=True)` on every div without descendant divs, but in one pass over the markup and
+    without building a tree: each open div only remembers whether a child div was opened and the stripped
+    strings it collected. Tags are nested, strings are split and entities are decoded the way
+    BeautifulSoup's `html.parser` builder does it, and text inside script, style, template and ruby
+    annotation elements is skipped as `get_text` skips it.
+
+    Methods:
+        extract(html_content): Get the text of all leaf divs, one per line.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+
+    def reset(self):
+        super().reset()
+        self._stack = []
+        self._divs = []
+        self._hidden = 0
+        self._data = []
+        self._closed_voids = {}
+        self._lines = []
+
+    def _flush(self):
+        """
+        End the current string and add it to the innermost open div if that is still a leaf.
+        """
+        if self._data:
+            text = ''.join(self._data).strip()
+            self._data = []
+            if text and not self._hidden:
+                self._add(text)
+
+    def _add(self, text):
+        """
+        Add a stripped string to the innermost open div if that is still a leaf.
+
+        Args:
+            text (str): The string to add.
+        """
+        if self._divs and self._divs[-1][0]:
+            self._divs[-1][1].append(text)
+
+    def _close(self, tag):
+        """
+        Finish an element, emitting the text of a leaf div.
+
+        Args:
+            tag (str): The name of the closed element.
+        """
+        if tag == 'div':
+            leaf, pieces = self._divs.pop()
+            if leaf and pieces:
+                self._lines.append(''.join(pieces))
+        elif tag in NON_TEXT_CONTAINERS:
+            self._hidden -= 1
+
+    def _start(self, tag, close_void):
+        self._flush()
+        if close_void and tag in VOID_ELEMENTS:
+            # Void elements are closed right away; a later explicit end tag for them is ignored.
+            self._closed_voids[tag] = self._closed_voids.get(tag, 0) + 1
+            return
+        self._stack.append(tag)
+        if tag == 'div':
+            if self._divs:
+                self._divs[-1][0] = False
+            self._divs.append([True, []])
+        elif tag in NON_TEXT_CONTAINERS:
+            self._hidden += 1
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, True)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._closed_voids.get(tag):
+            self._closed_voids[tag] -= 1
+            return
+        self._flush()
+        if tag not in self._stack:
+            return
+        while True:
+            popped = self._stack.pop()
+            self._close(popped)
+            if popped == tag:
+                break
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        if name[0] in 'xX':
+            code = int(name.lstrip(name[0]), 16)
+        else:
+            code = int(name)
+        data = None
+        if 128 <= code < 160:
+            # Numeric references in this range usually mean Windows-1252 characters.
+            try:
+                data = bytes([code]).decode('windows-1252')
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self._data.append(data or '\N{REPLACEMENT CHARACTER}')
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self._data.append(character if character is not None else '&' + name)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith('CDATA['):
+            text = data[len('CDATA['):].strip()
+            if text:
+                self._add(text)
+
+    def extract(self, html_content):
+        """
+        Get the text of all leaf divs, one per line.
+
+        Args:
+            html_content (str): The HTML to extract text from.
+
+        Returns:
+            str: The stripped text of every non-empty leaf div in document order, each followed by a newline.
+        """
+        self.feed(html_content)
+        self.close()
+        self._flush()
+        while self._stack:
+            self._close(self._stack.pop())
+        lines = self._lines
+        self.reset()
+        return ''.join(line + '\n' for line in lines)
+
+
+def extract_leaf_div_text(html_content):
+    """
+    Get the text of all leaf divs of a page, one per line.
+
+    Args:
+        html_content (str): The HTML to extract text from.
+
+    Returns:
+        str: The stripped text of every non-empty leaf div in document order, each followed by a newline.
+    """
+    return LeafDivTextExtractor().extract(html_content)
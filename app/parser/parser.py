@@ -1,18 +1,98 @@
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
 from app.parser.SeleniumLinkParser import SeleniumLinkParser
-from app.parser.ClassicLinkParser import ClassicLinkParser
+from app.parser.AsyncLinkParser import AsyncLinkParser
+from app.parser.HttpFetcher import HttpFetcher
 from bs4 import BeautifulSoup
-import requests
 
+MAX_REMEMBERED_DOMAINS = 10000
+
+_strategies = OrderedDict()
+_strategies_lock = threading.Lock()
+
+
+def get_strategy(url):
+    """
+    Get the remembered link parser type of the URL's domain.
+
+    Args:
+        url (str): A URL on the domain.
+
+    Returns:
+        str or None: "Selenium", "Async" or None if the domain was not probed yet.
+    """
+    with _strategies_lock:
+        return _strategies.get(urlsplit(url).netloc.lower())
+
+
+def set_strategy(url, strategy):
+    """
+    Remember the link parser type of the URL's domain.
 
-def parse_urls(url, depth=1):
-    if len(BeautifulSoup(requests.get(url).text, "html.parser").find_all('a', href=True)) <= 3:
-        p = SeleniumLinkParser()
-        p.crawl(url, depth)
-        return p
-    else:
-        p = ClassicLinkParser()
-        p.crawl(url, depth)
-        return p
+    Args:
+        url (str): A URL on the domain.
+        strategy (str): "Selenium" or "Async".
+    """
+    domain = urlsplit(url).netloc.lower()
+    with _strategies_lock:
+        _strategies[domain] = strategy
+        _strategies.move_to_end(domain)
+        while len(_strategies) > MAX_REMEMBERED_DOMAINS:
+            _strategies.popitem(last=False)
+
+
+def parse_urls(url, depth=1, pool=None, fetcher=None, scheduler=None, policy=None):
+    """
+    Crawl links starting from a URL with the link parser that suits its domain.
+
+    The first call for a domain downloads the start page once and counts its anchors: pages with at most
+    three links need a browser, others are crawled over HTTP starting from the already downloaded page.
+    The choice is remembered per domain after a 200 response, so later calls skip this probe; error and
+    anti-bot pages only decide the current call.
+
+    Args:
+        url (str): The starting URL.
+        depth (int): The maximum number of pages to crawl (default is 1).
+        pool (BrowserPool, optional): A pool of browser sessions for the Selenium crawler.
+        fetcher (HttpFetcher, optional): A pooled HTTP client for the probe request, whose connections the
+            HTTP crawl reuses. Defaults to a client created and closed by this call.
+        scheduler (HostScheduler, optional): Paces the crawl per origin and skips links disallowed by
+            robots.txt.
+        policy (FetchPolicy, optional): Timeouts, retries and circuit breaking of the crawl. Defaults to the
+            policy of the fetcher.
+
+    Returns:
+        SeleniumLinkParser or AsyncLinkParser: The link parser holding the crawled links.
+    """
+    own_fetcher = fetcher is None
+    fetcher = fetcher or HttpFetcher(scheduler=scheduler, policy=policy)
+    policy = policy or fetcher.policy
+    try:
+        strategy, seed_html = get_strategy(url), None
+        if strategy is None:
+            response = fetcher.get(url)
+            html_content = fetcher.decode(response)
+            if len(BeautifulSoup(html_content, "html.parser").find_all('a', href=True)) <= 3:
+                strategy = "Selenium"
+            else:
+                strategy = "Async"
+            if response.status_code == 200:
+                seed_html = html_content
+                set_strategy(url, strategy)
+
+        if strategy == "Selenium":
+            p = SeleniumLinkParser(pool=pool, scheduler=scheduler, policy=policy)
+            p.crawl(url, depth)
+            return p
+        else:
+            p = AsyncLinkParser(scheduler=scheduler, policy=policy, session=fetcher.session)
+            p.crawl(url, depth, seed_html=seed_html)
+            return p
+    finally:
+        if own_fetcher:
+            fetcher.close()
 
 
 if __name__ == "__main__":
@@ -20,4 +100,4 @@ if __name__ == "__main__":
     print(p.type + " " + str(p.length()))
 
     p = parse_urls("https://pet-mir.ru/")
-    print(p.type + " " + str(p.length()))
\ No newline at end of file
+    print(p.type + " " + str(p.length()))
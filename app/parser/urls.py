@@ -0,0 +1,214 @@
+import hashlib
+import math
+import re
+import string
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "ysclid", "_openstat", "mc_cid", "mc_eid",
+    "igshid", "_ga", "_gl", "ref_src",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# RFC 3986 unreserved characters, the only ones whose percent-encoding can be decoded without changing the URL.
+UNRESERVED = frozenset(string.ascii_letters + string.digits + "-._~")
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+PERCENT_ESCAPE = re.compile(r"(%[0-9A-Fa-f]{2})")
+
+
+def normalize_path(path):
+    """
+    Normalize the percent-encoding of a URL path as RFC 3986 does.
+
+    Escaped unreserved characters are decoded, the remaining escapes are uppercased, and characters that
+    may not appear in a path, like spaces or non-ASCII letters, are encoded. Escaped reserved characters
+    such as `%2F` stay escaped, because decoding them would change the path.
+
+    Args:
+        path (str): The path of a URL.
+
+    Returns:
+        str: The normalized path.
+    """
+    parts = []
+    for i, part in enumerate(PERCENT_ESCAPE.split(path)):
+        if i % 2 == 0:
+            parts.append(quote(part, safe=PATH_SAFE))
+        else:
+            char = chr(int(part[1:], 16))
+            parts.append(char if char in UNRESERVED else part.upper())
+    return "".join(parts)
+
+
+def canonicalize(url, rules=None):
+    """
+    Normalize a URL so that different spellings of the same page compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking query parameters and
+    trailing slashes, normalizes percent-encoding and sorts the remaining query parameters. Per-domain
+    rules can additionally strip `www.`, lowercase the path, drop or keep only given parameters.
+
+    Args:
+        url (str): The absolute URL to normalize.
+        rules (dict, optional): Per-host rules keyed by lowercased host (without `www.`), each a dict
+            with optional keys `strip_www` (bool), `lowercase_path` (bool), `drop_params` (iterable)
+            and `keep_params` (iterable). Defaults to None.
+
+    Returns:
+        str or None: The canonical URL, or None if it is not an http(s) URL.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    rule = (rules or {}).get(host[4:] if host.startswith("www.") else host, {})
+    if rule.get("strip_www") and host.startswith("www."):
+        host = host[4:]
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+
+    path = normalize_path(parts.path.lower() if rule.get("lowercase_path") else parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    drop_params, keep_params = set(rule.get("drop_params", ())), rule.get("keep_params")
+    query = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        lowered = key.lower()
+        if lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES) or key in drop_params:
+            continue
+        if keep_params is not None and key not in keep_params:
+            continue
+        query.append((key, value))
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def fingerprint(url):
+    """
+    Get a 64-bit fingerprint of a URL.
+
+    Args:
+        url (str): The URL to fingerprint.
+
+    Returns:
+        int: The fingerprint.
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "little")
+
+
+class SeenSet:
+    """
+    A set of visited URLs stored as 64-bit fingerprints instead of strings.
+
+    Collisions are possible but negligible below billions of URLs.
+
+    Methods:
+        add(url): Add a URL and report whether it was new.
+        __contains__(url): Check whether a URL was added.
+        __len__(): Get the number of added URLs.
+    """
+
+    def __init__(self):
+        self._fingerprints = set()
+
+    def add(self, url):
+        """
+        Add a URL and report whether it was new.
+
+        Args:
+            url (str): The URL to add.
+
+        Returns:
+            bool: True if the URL was not seen before.
+        """
+        key = fingerprint(url)
+        if key in self._fingerprints:
+            return False
+        self._fingerprints.add(key)
+        return True
+
+    def __contains__(self, url):
+        return fingerprint(url) in self._fingerprints
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+
+class BloomFilter:
+    """
+    A fixed-memory set of visited URLs with a bounded false positive rate and no false negatives.
+
+    A false positive makes the crawler skip a page it has not visited, which is acceptable for crawl
+    deduplication.
+
+    Args:
+        capacity (int): The number of URLs the filter is sized for.
+        error_rate (float, optional): The false positive rate at full capacity. Defaults to 0.001.
+
+    Attributes:
+        capacity (int): The number of URLs the filter is sized for.
+        error_rate (float): The false positive rate at full capacity.
+        num_bits (int): The size of the bit array.
+        num_hashes (int): The number of bit positions per URL.
+
+    Methods:
+        add(url): Add a URL and report whether it was new.
+        __contains__(url): Check whether a URL was (probably) added.
+        __len__(): Get the number of URLs reported as new.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url):
+        """
+        Get the bit positions of a URL using double hashing.
+
+        Args:
+            url (str): The URL to hash.
+
+        Returns:
+            list: The bit positions.
+        """
+        digest = hashlib.blake2b(url.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, url):
+        """
+        Add a URL and report whether it was new.
+
+        Args:
+            url (str): The URL to add.
+
+        Returns:
+            bool: True if the URL was (certainly) not seen before.
+        """
+        new = False
+        for position in self._positions(url):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & bit:
+                self._bits[byte] |= bit
+                new = True
+        self._count += new
+        return new
+
+    def __contains__(self, url):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(url))
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,333 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Priority classes, claimed in ascending order.
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class LeaseLost(Exception):
+    """
+    Raised when a job is written to by a queue that no longer holds its lease, because the job was cancelled,
+    finished or reclaimed by `recover` after the lease expired.
+
+    Attributes:
+        job_id (str): The id of the job.
+    """
+
+    def __init__(self, job_id):
+        super().__init__(f"Job {job_id} is no longer running under this lease")
+        self.job_id = job_id
+
+
+class JobQueue:
+    """
+    A persistent priority queue of background jobs and their results stored in a SQLite database.
+
+    Jobs are claimed in priority class order and, within a class, in submission order. A claim is a single
+    write transaction, so each queued job is claimed once. A claimed job is leased to the claiming queue,
+    identified by `owner`, for `lease` seconds and the lease is extended by `renew` and by every write of
+    progress or results. Writes to a job whose lease this queue lost raise `LeaseLost`, so a cancelled job
+    stops its worker. Results are appended in pages of rows keyed by their sequence number, so clients can
+    read them while the job runs. Jobs whose lease expired, because the process running them stopped, are
+    queued again by `recover`, and finished jobs are removed after a time to live by `compact`. The
+    database runs in WAL mode, like `SQLiteCache`.
+
+    Args:
+        db_file (str): The path to the SQLite database file.
+        timeout (float, optional): Seconds to wait for a lock held by another writer. Defaults to 30.
+        lease (float, optional): Seconds a claimed job stays leased without being renewed. Defaults to 60.
+
+    Attributes:
+        db_file (str): The path to the SQLite database file.
+        timeout (float): Seconds to wait for a lock held by another writer.
+        lease (float): Seconds a claimed job stays leased without being renewed.
+        owner (str): The id under which this queue leases the jobs it claims.
+
+    Methods:
+        submit(kind, params, priority="normal"): Queue a job.
+        claim(): Claim the next queued job.
+        renew(job_id): Extend the lease of a claimed job.
+        get(job_id): Get the state of a job.
+        set_progress(job_id, done, total=None): Record the progress of a claimed job.
+        add_results(job_id, start, results): Append results of a claimed job and count them as done.
+        get_results(job_id, offset=0, limit=100): Get a page of the results of a job.
+        finish(job_id, error=None): Mark a running job as completed or failed.
+        cancel(job_id): Cancel a queued or running job.
+        recover(): Queue the jobs whose lease expired again.
+        compact(ttl): Remove finished jobs and their results after a time to live.
+        close(): Close the connection of the calling thread.
+    """
+
+    def __init__(self, db_file, timeout=30, lease=60):
+        self.db_file = db_file
+        self.timeout = timeout
+        self.lease = lease
+        self.owner = uuid.uuid4().hex
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, priority INTEGER NOT NULL, "
+                "status TEXT NOT NULL, done INTEGER NOT NULL DEFAULT 0, total INTEGER, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, owner TEXT, lease_until REAL)"
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for column, definition in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS job_results ("
+                "job_id TEXT NOT NULL, seq INTEGER NOT NULL, value TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+            )
+
+    def _connection(self):
+        """
+        Get the SQLite connection of the calling thread, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: The connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_file, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def submit(self, kind, params, priority="normal"):
+        """
+        Queue a job.
+
+        Args:
+            kind (str): The kind of work, e.g. "check_urls".
+            params (dict): The JSON-serializable parameters of the job.
+            priority (str, optional): The priority class, one of PRIORITIES. Defaults to "normal".
+
+        Returns:
+            str: The id of the job.
+
+        Raises:
+            ValueError: If the priority class is unknown.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority}, expected one of {', '.join(PRIORITIES)}")
+        job_id = uuid.uuid4().hex
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, kind, params, priority, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), PRIORITIES[priority], time.time()),
+            )
+        return job_id
+
+    def claim(self):
+        """
+        Claim the next queued job, marking it as running under a lease of this queue.
+
+        Returns:
+            dict or None: The `id`, `kind` and `params` of the claimed job, or None if no job is queued.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id, kind, params FROM jobs WHERE status = 'queued' ORDER BY priority, created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            connection.execute("UPDATE jobs SET status = 'running', started_at = ?, owner = ?, lease_until = ? "
+                               "WHERE id = ?", (now, self.owner, now + self.lease, row[0]))
+        return {"id": row[0], "kind": row[1], "params": json.loads(row[2])}
+
+    def _hold(self, connection, job_id, done=None, total=None):
+        """
+        Extend the lease of a claimed job and optionally record its progress, inside the caller's transaction.
+
+        Args:
+            connection (sqlite3.Connection): The connection of the transaction.
+            job_id (str): The id of the job.
+            done (int, optional): The number of finished units of work. Defaults to None (unchanged).
+            total (int, optional): The total number of units of work. Defaults to None (unchanged).
+
+        Raises:
+            LeaseLost: If the job is not running under a lease of this queue.
+        """
+        updated = connection.execute(
+            "UPDATE jobs SET lease_until = ?, done = COALESCE(?, done), total = COALESCE(?, total) "
+            "WHERE id = ? AND status = 'running' AND owner = ?",
+            (time.time() + self.lease, done, total, job_id, self.owner),
+        ).rowcount
+        if not updated:
+            raise LeaseLost(job_id)
+
+    def renew(self, job_id):
+        """
+        Extend the lease of a claimed job, so `recover` does not queue it again while it runs.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Raises:
+            LeaseLost: If the job is not running under a lease of this queue.
+        """
+        with self._connection() as connection:
+            self._hold(connection, job_id)
+
+    def get(self, job_id):
+        """
+        Get the state of a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            dict or None: The `id`, `kind`, `priority`, `status`, `progress` (`done` and `total`), `error` and
+            timestamps of the job, or None if unknown.
+        """
+        row = self._connection().execute(
+            "SELECT id, kind, priority, status, done, total, error, created_at, started_at, finished_at "
+            "FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        priority = next(name for name, value in PRIORITIES.items() if value == row[2])
+        return {"id": row[0], "kind": row[1], "priority": priority, "status": row[3],
+                "progress": {"done": row[4], "total": row[5]}, "error": row[6],
+                "created_at": row[7], "started_at": row[8], "finished_at": row[9]}
+
+    def set_progress(self, job_id, done, total=None):
+        """
+        Record the progress of a claimed job and extend its lease.
+
+        Args:
+            job_id (str): The id of the job.
+            done (int): The number of finished units of work.
+            total (int, optional): The total number of units of work, if known. Defaults to None (unchanged).
+
+        Raises:
+            LeaseLost: If the job is not running under a lease of this queue.
+        """
+        with self._connection() as connection:
+            self._hold(connection, job_id, done, total)
+
+    def add_results(self, job_id, start, results):
+        """
+        Append results of a claimed job, count them as done and extend its lease, in one transaction.
+
+        Args:
+            job_id (str): The id of the job.
+            start (int): The sequence number of the first result, i.e. the number of results before it.
+            results (list): The JSON-serializable results.
+
+        Raises:
+            LeaseLost: If the job is not running under a lease of this queue; no result is stored then.
+        """
+        with self._connection() as connection:
+            self._hold(connection, job_id, start + len(results))
+            connection.executemany(
+                "INSERT OR REPLACE INTO job_results (job_id, seq, value) VALUES (?, ?, ?)",
+                ((job_id, seq, json.dumps(result, ensure_ascii=False)) for seq, result in enumerate(results, start)),
+            )
+
+    def get_results(self, job_id, offset=0, limit=100):
+        """
+        Get a page of the results of a job, in sequence order.
+
+        Args:
+            job_id (str): The id of the job.
+            offset (int, optional): The number of results to skip. Defaults to 0.
+            limit (int, optional): The maximum number of results. Defaults to 100.
+
+        Returns:
+            list: The results of the page.
+        """
+        rows = self._connection().execute(
+            "SELECT value FROM job_results WHERE job_id = ? ORDER BY seq LIMIT ? OFFSET ?", (job_id, limit, offset)
+        )
+        return [json.loads(value) for (value,) in rows]
+
+    def finish(self, job_id, error=None):
+        """
+        Mark a job claimed by this queue as completed, or as failed if an error is given. Cancelled jobs stay
+        cancelled, and jobs reclaimed after their lease expired are left to their new owner.
+
+        Args:
+            job_id (str): The id of the job.
+            error (str, optional): The error that stopped the job. Defaults to None.
+        """
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_until = NULL "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                ("failed" if error else "completed", error, time.time(), job_id, self.owner),
+            )
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. Results written so far are kept. The queue running the job notices
+        on its next write or lease renewal, which raises `LeaseLost`.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            bool: True if the job was queued or running.
+        """
+        with self._connection() as connection:
+            return connection.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            ).rowcount > 0
+
+    def recover(self):
+        """
+        Queue the running jobs whose lease expired again, dropping their partial results.
+
+        A lease expires when the process running the job stopped without finishing it; jobs that are still
+        renewed, by this or another process, are left alone.
+
+        Returns:
+            int: The number of queued jobs.
+        """
+        expired = "status = 'running' AND COALESCE(lease_until, 0) < ?"
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(f"DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs WHERE {expired})",
+                               (now,))
+            return connection.execute(
+                "UPDATE jobs SET status = 'queued', done = 0, started_at = NULL, owner = NULL, lease_until = NULL "
+                f"WHERE {expired}", (now,)
+            ).rowcount
+
+    def compact(self, ttl):
+        """
+        Remove finished jobs and their results after a time to live.
+
+        Args:
+            ttl (float): Seconds a finished job is kept.
+
+        Returns:
+            int: The number of removed jobs.
+        """
+        cutoff = time.time() - ttl
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs WHERE finished_at <= ?)", (cutoff,)
+            )
+            return connection.execute("DELETE FROM jobs WHERE finished_at <= ?", (cutoff,)).rowcount
+
+    def close(self):
+        """
+        Close the connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
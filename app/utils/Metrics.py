@@ -0,0 +1,386 @@
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from cache lookups (milliseconds) to browser renders (tens of seconds).
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def format_value(value):
+    """
+    Format a sample value for the Prometheus text format.
+
+    Args:
+        value (float): The value.
+
+    Returns:
+        str: The formatted value.
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels):
+    """
+    Format a label set for the Prometheus text format.
+
+    Args:
+        labels (dict): The label names and values.
+
+    Returns:
+        str: The label set in braces, or an empty string without labels.
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """
+    A family of samples sharing a name, a type and label names.
+
+    Args:
+        name (str): The metric name.
+        help_text (str): The description of the metric.
+        labels (tuple, optional): The label names. Defaults to ().
+
+    Attributes:
+        name (str): The metric name.
+        help_text (str): The description of the metric.
+        labels (tuple): The label names.
+
+    Methods:
+        samples(): Get the current samples of the family.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    @classmethod
+    def snapshot(cls, name, help_text, values, label=None):
+        """
+        Build a metric from values counted elsewhere, e.g. in a collector reading component statistics.
+
+        Args:
+            name (str): The metric name.
+            help_text (str): The description of the metric.
+            values: The value, or a dictionary of values keyed by the value of `label`.
+            label (str, optional): The name of the only label. Defaults to None (no labels).
+
+        Returns:
+            Metric: The metric holding the values.
+        """
+        metric = cls(name, help_text, (label,) if label else ())
+        items = values.items() if label else [((), values)]
+        metric._values = {((str(key),) if label else key): value for key, value in items}
+        return metric
+
+    def _key(self, labels):
+        """
+        Get the key of a label set, checking that it matches the label names.
+
+        Args:
+            labels (dict): The label values by name.
+
+        Returns:
+            tuple: The label values in label name order.
+
+        Raises:
+            ValueError: If the label names do not match.
+        """
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Metric {self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        """
+        Get the current samples of the family.
+
+        Returns:
+            list: (name, labels, value) tuples.
+        """
+        with self._lock:
+            return [(self.name, dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count, e.g. of requests or errors.
+
+    Methods:
+        inc(amount=1, **labels): Increase the count of a label set.
+        set(value, **labels): Set the count of a label set kept by another component.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the count of a label set.
+
+        Args:
+            amount (float, optional): The increment. Defaults to 1.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """
+        Set the count of a label set, for counts kept by another component and read at scrape time.
+
+        Args:
+            value (float): The current count.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, e.g. the number of requests in flight.
+
+    Methods:
+        set(value, **labels): Set the value of a label set.
+        inc(amount=1, **labels): Increase the value of a label set.
+        dec(amount=1, **labels): Decrease the value of a label set.
+    """
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        """
+        Set the value of a label set.
+
+        Args:
+            value (float): The value.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the value of a label set.
+
+        Args:
+            amount (float, optional): The increment. Defaults to 1.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """
+        Decrease the value of a label set.
+
+        Args:
+            amount (float, optional): The decrement. Defaults to 1.
+            **labels: The label values.
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    A distribution of observed values, e.g. latencies, counted in cumulative buckets.
+
+    Args:
+        name (str): The metric name.
+        help_text (str): The description of the metric.
+        labels (tuple, optional): The label names. Defaults to ().
+        buckets (tuple, optional): The upper bounds of the buckets. Defaults to DEFAULT_BUCKETS.
+
+    Attributes:
+        buckets (tuple): The upper bounds of the buckets, ending with +Inf.
+
+    Methods:
+        observe(value, **labels): Record a value.
+        time(**labels): Context manager that records the seconds spent in its block.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """
+        Record a value.
+
+        Args:
+            value (float): The observed value.
+            **labels: The label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            # [count per bucket (not cumulative), sum]
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Record the seconds spent in the block, including time spent awaiting inside it.
+
+        Args:
+            **labels: The label values.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        """
+        Get the cumulative bucket counts, the count and the sum of every label set.
+
+        Returns:
+            list: (name, labels, value) tuples.
+        """
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append((self.name + "_bucket", {**labels, "le": format_value(bound)}, cumulative))
+                samples.append((self.name + "_count", labels, cumulative))
+                samples.append((self.name + "_sum", labels, total))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    A set of metrics rendered together in the Prometheus text exposition format.
+
+    Metrics updated as events happen are created with `counter`, `gauge` and `histogram`. State that
+    components already count themselves, like cache or pool statistics, is read at scrape time by
+    collectors: callables returning metrics whose samples reflect the current state.
+
+    Methods:
+        counter(name, help_text, labels=()): Create a counter.
+        gauge(name, help_text, labels=()): Create a gauge.
+        histogram(name, help_text, labels=(), buckets=DEFAULT_BUCKETS): Create a histogram.
+        add_collector(collector): Add a callable returning metrics to include in every scrape.
+        render(): Render all metrics.
+    """
+
+    content_type = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _add(self, metric):
+        """
+        Add a metric to the registry.
+
+        Args:
+            metric (Metric): The metric.
+
+        Returns:
+            Metric: The same metric.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        """
+        Create a counter.
+
+        Args:
+            name (str): The metric name, ending with `_total` by convention.
+            help_text (str): The description of the metric.
+            labels (tuple, optional): The label names. Defaults to ().
+
+        Returns:
+            Counter: The counter.
+        """
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        """
+        Create a gauge.
+
+        Args:
+            name (str): The metric name.
+            help_text (str): The description of the metric.
+            labels (tuple, optional): The label names. Defaults to ().
+
+        Returns:
+            Gauge: The gauge.
+        """
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        """
+        Create a histogram.
+
+        Args:
+            name (str): The metric name.
+            help_text (str): The description of the metric.
+            labels (tuple, optional): The label names. Defaults to ().
+            buckets (tuple, optional): The upper bounds of the buckets. Defaults to DEFAULT_BUCKETS.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collector):
+        """
+        Add a callable returning metrics to include in every scrape.
+
+        Args:
+            collector (callable): Returns an iterable of Metric objects built from the current state.
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one family after another.
+        """
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logging.error(f"Error collecting metrics: {str(e)}")
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
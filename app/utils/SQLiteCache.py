@@ -0,0 +1,208 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """
+    A persistent cache of JSON-serializable data stored per key in a SQLite database.
+
+    Every read and write touches a single row, writes are atomic, and the database runs in WAL mode so
+    concurrent readers never see a partially written entry. Entries may carry a time to live; expired entries are skipped on
+    read and removed by `compact`. HTTP validators and a content fingerprint are kept per URL in a separate
+    table that outlives expired entries, so stale results can be revalidated instead of recomputed.
+
+    Args:
+        db_file (str): The path to the SQLite database file.
+        timeout (float, optional): Seconds to wait for a lock held by another writer. Defaults to 30.
+
+    Attributes:
+        db_file (str): The path to the SQLite database file.
+        timeout (float): Seconds to wait for a lock held by another writer.
+
+    Methods:
+        get_data(url): Get cached data for a specific URL.
+        get_entry(url): Get cached data for a specific URL together with its expiry time.
+        set_data(url, data, ttl=None): Set and save cached data for a specific URL.
+        set_many(items, ttl=None): Set cached data for many URLs in one transaction.
+        delete_data(url): Remove cached data for a specific URL.
+        get_validators(url): Get the validators and last result stored for a URL.
+        set_validators(url, data, etag=None, last_modified=None, fingerprint=None): Store validators for a URL.
+        compact(validator_ttl=None): Remove expired entries and old validators.
+        keys(): Iterate over the cached URLs.
+        close(): Close the connection of the calling thread.
+    """
+
+    def __init__(self, db_file, timeout=30):
+        self.db_file = db_file
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL, expires_at REAL)"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(cache)")]
+            if "expires_at" not in columns:
+                connection.execute("ALTER TABLE cache ADD COLUMN expires_at REAL")
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS validators ("
+                "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fingerprint TEXT, value TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        """
+        Get the SQLite connection of the calling thread, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: The connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_file, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_data(self, url):
+        """
+        Get cached data for a specific URL.
+
+        Args:
+            url (str): The URL for which to retrieve cached data.
+
+        Returns:
+            dict or None: The cached data for the URL, or None if not found or expired.
+        """
+        entry = self.get_entry(url)
+        return entry[0] if entry else None
+
+    def get_entry(self, url):
+        """
+        Get cached data for a specific URL together with its expiry time.
+
+        Args:
+            url (str): The URL for which to retrieve cached data.
+
+        Returns:
+            Tuple[dict, float] or None: The cached data and its expiry timestamp (None if it never
+            expires), or None if not found or expired.
+        """
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (url, time.time()),
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set_data(self, url, data, ttl=None):
+        """
+        Set and save cached data for a specific URL.
+
+        Args:
+            url (str): The URL for which to set cached data.
+            data (dict): The data to be cached for the URL.
+            ttl (float, optional): Seconds until the entry expires. Defaults to None (never).
+        """
+        self.set_many([(url, data)], ttl=ttl)
+
+    def set_many(self, items, ttl=None):
+        """
+        Set cached data for many URLs in one transaction.
+
+        Args:
+            items (iterable): (url, data) tuples to cache.
+            ttl (float, optional): Seconds until the entries expire. Defaults to None (never).
+        """
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+                ((url, json.dumps(data, ensure_ascii=False), now, expires_at) for url, data in items),
+            )
+
+    def delete_data(self, url):
+        """
+        Remove cached data for a specific URL.
+
+        Args:
+            url (str): The URL whose cached data to remove.
+        """
+        with self._connection() as connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (url,))
+
+    def get_validators(self, url):
+        """
+        Get the validators and last result stored for a URL.
+
+        Args:
+            url (str): The URL for which to retrieve validators.
+
+        Returns:
+            dict or None: The `etag`, `last_modified`, `fingerprint` and `data` of the URL, or None if unknown.
+        """
+        row = self._connection().execute(
+            "SELECT etag, last_modified, fingerprint, value FROM validators WHERE key = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "fingerprint": row[2], "data": json.loads(row[3])}
+
+    def set_validators(self, url, data, etag=None, last_modified=None, fingerprint=None):
+        """
+        Store the validators of a URL together with the result they validate.
+
+        Args:
+            url (str): The URL for which to store validators.
+            data (dict): The result computed for the validated content.
+            etag (str, optional): The ETag response header. Defaults to None.
+            last_modified (str, optional): The Last-Modified response header. Defaults to None.
+            fingerprint (str, optional): The fingerprint of the parsed text content. Defaults to None.
+        """
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO validators (key, etag, last_modified, fingerprint, value, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, fingerprint, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+
+    def compact(self, validator_ttl=None):
+        """
+        Remove expired entries and, optionally, validators that were not refreshed for a while.
+
+        Args:
+            validator_ttl (float, optional): Seconds after which unrefreshed validators are removed.
+                Defaults to None (keep them).
+
+        Returns:
+            int: The number of removed entries.
+        """
+        now = time.time()
+        with self._connection() as connection:
+            if validator_ttl is not None:
+                connection.execute("DELETE FROM validators WHERE updated_at <= ?", (now - validator_ttl,))
+            return connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+
+    def keys(self):
+        """
+        Iterate over the cached URLs.
+
+        Yields:
+            str: A cached URL.
+        """
+        for (key,) in self._connection().execute("SELECT key FROM cache"):
+            yield key
+
+    def close(self):
+        """
+        Close the connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
@@ -0,0 +1,215 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class TieredCache:
+    """
+    A bounded two-tier cache: an in-process LRU in front of a persistent store.
+
+    The memory tier is limited by entry count and by the approximate size of the cached data. Entries
+    expire after a time to live; expiry is checked lazily on read, and a background thread periodically
+    compacts expired entries out of the persistent tier.
+
+    Args:
+        store (SQLiteCache): The persistent tier.
+        max_entries (int, optional): The maximum number of entries kept in memory. Defaults to 10000.
+        max_bytes (int, optional): The approximate memory budget in bytes of JSON. Defaults to 64 MiB.
+        ttl (float, optional): Seconds until an entry expires, or None to keep entries forever.
+            Defaults to 7 days.
+        compaction_interval (float, optional): Seconds between compactions of the persistent tier, or
+            None to disable the background thread. Defaults to 3600.
+        validator_ttl (float, optional): Seconds after which unrefreshed validators are compacted away, or
+            None to keep them. Defaults to 30 days.
+
+    Attributes:
+        store (SQLiteCache): The persistent tier.
+        max_entries (int): The maximum number of entries kept in memory.
+        max_bytes (int): The approximate memory budget in bytes.
+        ttl (float): Seconds until an entry expires.
+        compaction_interval (float): Seconds between compactions of the persistent tier.
+        validator_ttl (float): Seconds after which unrefreshed validators are compacted away.
+
+    Methods:
+        get_data(url): Get cached data for a specific URL.
+        set_data(url, data, ttl=None): Set and save cached data for a specific URL.
+        delete_data(url): Remove cached data for a specific URL from both tiers.
+        get_validators(url): Get the validators and last result stored for a URL.
+        set_validators(url, data, etag=None, last_modified=None, fingerprint=None): Store validators for a URL.
+        compact(): Remove expired entries from both tiers.
+        stats(): Get the hit, miss, eviction and size counters.
+        close(): Stop the background compaction thread.
+    """
+
+    def __init__(self, store, max_entries=10000, max_bytes=64 * 2 ** 20, ttl=7 * 24 * 3600,
+                 compaction_interval=3600, validator_ttl=30 * 24 * 3600):
+        self.store = store
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compaction_interval = compaction_interval
+        self.validator_ttl = validator_ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {"memory_hits": 0, "store_hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                          "compacted": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if compaction_interval:
+            self._thread = threading.Thread(target=self._compaction_loop, name="cache-compaction", daemon=True)
+            self._thread.start()
+
+    def _remember(self, url, data, expires_at):
+        """
+        Put an entry into the memory tier and evict least recently used entries over the limits.
+
+        Args:
+            url (str): The URL of the entry.
+            data: The cached data.
+            expires_at (float): The expiry timestamp, or None if it never expires.
+        """
+        size = len(json.dumps(data, ensure_ascii=False).encode())
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._entries[url] = (data, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    def get_data(self, url):
+        """
+        Get cached data for a specific URL, looking in memory first and then in the persistent tier.
+
+        Args:
+            url (str): The URL for which to retrieve cached data.
+
+        Returns:
+            dict or None: The cached data for the URL, or None if not found or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                data, size, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(url)
+                    self._counters["memory_hits"] += 1
+                    return data
+                del self._entries[url]
+                self._bytes -= size
+                self._counters["expirations"] += 1
+
+        entry = self.store.get_entry(url)
+        with self._lock:
+            self._counters["store_hits" if entry else "misses"] += 1
+        if entry is None:
+            return None
+        self._remember(url, *entry)
+        return entry[0]
+
+    def set_data(self, url, data, ttl=None):
+        """
+        Set and save cached data for a specific URL in both tiers.
+
+        Args:
+            url (str): The URL for which to set cached data.
+            data (dict): The data to be cached for the URL.
+            ttl (float, optional): Seconds until the entry expires. Defaults to the cache's `ttl`.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        self.store.set_data(url, data, ttl=ttl)
+        self._remember(url, data, time.time() + ttl if ttl is not None else None)
+
+    def delete_data(self, url):
+        """
+        Remove cached data for a specific URL from both tiers.
+
+        Args:
+            url (str): The URL whose cached data to remove.
+        """
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+        self.store.delete_data(url)
+
+    def get_validators(self, url):
+        """
+        Get the validators and last result stored for a URL.
+
+        Args:
+            url (str): The URL for which to retrieve validators.
+
+        Returns:
+            dict or None: The `etag`, `last_modified`, `fingerprint` and `data` of the URL, or None if unknown.
+        """
+        return self.store.get_validators(url)
+
+    def set_validators(self, url, data, etag=None, last_modified=None, fingerprint=None):
+        """
+        Store the validators of a URL together with the result they validate.
+
+        Args:
+            url (str): The URL for which to store validators.
+            data (dict): The result computed for the validated content.
+            etag (str, optional): The ETag response header. Defaults to None.
+            last_modified (str, optional): The Last-Modified response header. Defaults to None.
+            fingerprint (str, optional): The fingerprint of the parsed text content. Defaults to None.
+        """
+        self.store.set_validators(url, data, etag=etag, last_modified=last_modified, fingerprint=fingerprint)
+
+    def compact(self):
+        """
+        Remove expired entries from both tiers and old validators from the persistent tier.
+
+        Returns:
+            int: The number of entries removed from the persistent tier.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [url for url, (_, _, expires_at) in self._entries.items()
+                       if expires_at is not None and expires_at <= now]
+            for url in expired:
+                self._bytes -= self._entries.pop(url)[1]
+            self._counters["expirations"] += len(expired)
+        removed = self.store.compact(validator_ttl=self.validator_ttl)
+        with self._lock:
+            self._counters["compacted"] += removed
+        return removed
+
+    def _compaction_loop(self):
+        """
+        Compact the cache every `compaction_interval` seconds until closed.
+        """
+        while not self._stop.wait(self.compaction_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logging.error(f"Error compacting cache: {str(e)}")
+
+    def stats(self):
+        """
+        Get the hit, miss, eviction and size counters.
+
+        Returns:
+            dict: The counters and the current size of the memory tier.
+        """
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "bytes": self._bytes}
+
+    def close(self):
+        """
+        Stop the background compaction thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,23 +1,32 @@
-import hashlib
 import json
+from array import array
+
+_EMPTY = -1
+_DELETED = -2
+_DELETED_KEY = object()
+_PERTURB_SHIFT = 5
 
 
 class HashTable:
     """
-    A hash table (dictionary) implementation with support for resizing.
+    A hash table (dictionary) implementation with open addressing and support for resizing.
+
+    Entries are kept in compact parallel arrays in insertion order, and a separate index table maps
+    probe slots to entry positions. Keys are hashed with Python's built-in non-cryptographic hash,
+    which is cached on string objects.
 
     Args:
-        initial_size (int): The initial size of the hash table.
+        initial_size (int): The initial size of the hash table, rounded up to a power of two.
         load_factor (float): The load factor that triggers resizing.
 
     Attributes:
-        size (int): The current size of the hash table.
-        buckets (list): A list of buckets where each bucket is a list of key-value pairs.
+        size (int): The current number of slots in the index table.
         load_factor (float): The load factor that triggers resizing.
         num_elements (int): The number of elements currently in the hash table.
 
     Methods:
-        _hash(key): Hashes a key to find the index in the buckets.
+        _hash(key): Hashes a key.
+        _lookup(key, key_hash): Finds the slot and entry position of a key.
         _resize(): Resizes the hash table when load factor is exceeded.
         insert(key, value): Inserts a key-value pair into the hash table.
         get(key): Retrieves the value associated with a given key.
@@ -27,38 +36,82 @@ class HashTable:
         __iter__(): Iterates over the key-value pairs in the hash table.
     """
 
+    __slots__ = ("size", "load_factor", "num_elements", "_index", "_hashes", "_keys", "_values")
+
     def __init__(self, initial_size=1000, load_factor=0.7):
-        self.size = initial_size
-        self.buckets = [[] for _ in range(initial_size)]
+        size = 8
+        while size < initial_size:
+            size <<= 1
+        self.size = size
         self.load_factor = load_factor
         self.num_elements = 0
+        self._index = array('q', [_EMPTY]) * size
+        self._hashes = array('q')
+        self._keys = []
+        self._values = []
 
     def _hash(self, key):
         """
-        Hashes a key to find the index in the buckets.
+        Hashes a key.
 
         Args:
             key (str): The key to be hashed.
 
         Returns:
-            int: The index in the buckets.
+            int: The hash of the key.
         """
-        hash_object = hashlib.sha256(key.encode())
-        return int(hash_object.hexdigest(), 16) % self.size
+        return hash(key)
+
+    def _lookup(self, key, key_hash):
+        """
+        Finds the slot and entry position of a key.
+
+        Args:
+            key (str): The key to look up.
+            key_hash (int): The hash of the key.
+
+        Returns:
+            Tuple[int, int]: The slot to use for the key and the entry position, or -1 if the key is absent.
+        """
+        index, hashes, keys = self._index, self._hashes, self._keys
+        mask = self.size - 1
+        perturb = key_hash & 0xFFFFFFFFFFFFFFFF
+        slot = key_hash & mask
+        free_slot = -1
+        while True:
+            position = index[slot]
+            if position == _EMPTY:
+                return (slot if free_slot < 0 else free_slot), -1
+            if position == _DELETED:
+                if free_slot < 0:
+                    free_slot = slot
+            elif hashes[position] == key_hash and keys[position] == key:
+                return slot, position
+            perturb >>= _PERTURB_SHIFT
+            slot = (slot * 5 + perturb + 1) & mask
 
     def _resize(self):
         """
-        Resizes the hash table when load factor is exceeded.
+        Resizes the hash table when the load factor is exceeded, dropping deleted entries. The table only
+        grows if the live entries need it; after insert/delete churn it is compacted at the same size.
         """
-        self.size *= 2
-        new_buckets = [[] for _ in range(self.size)]
+        while self.num_elements / self.size > self.load_factor / 2:
+            self.size *= 2
 
-        for bucket in self.buckets:
-            for key, value in bucket:
-                index = self._hash(key)
-                new_buckets[index].append((key, value))
+        live = [i for i, key in enumerate(self._keys) if key is not _DELETED_KEY]
+        self._hashes = array('q', (self._hashes[i] for i in live))
+        self._keys = [self._keys[i] for i in live]
+        self._values = [self._values[i] for i in live]
+        self._index = array('q', [_EMPTY]) * self.size
 
-        self.buckets = new_buckets
+        index, mask = self._index, self.size - 1
+        for position, key_hash in enumerate(self._hashes):
+            perturb = key_hash & 0xFFFFFFFFFFFFFFFF
+            slot = key_hash & mask
+            while index[slot] != _EMPTY:
+                perturb >>= _PERTURB_SHIFT
+                slot = (slot * 5 + perturb + 1) & mask
+            index[slot] = position
 
     def insert(self, key, value):
         """
@@ -68,18 +121,21 @@ class HashTable:
             key (str): The key to be inserted.
             value: The value associated with the key.
         """
-        index = self._hash(key)
-        bucket = self.buckets[index]
+        key_hash = self._hash(key)
+        slot, position = self._lookup(key, key_hash)
+        if position >= 0:
+            self._values[position] = value
+            return
 
-        for i, (k, v) in enumerate(bucket):
-            if k == key:
-                bucket[i] = (key, value)
-                return
-
-        bucket.append((key, value))
+        self._index[slot] = len(self._keys)
+        self._hashes.append(key_hash)
+        self._keys.append(key)
+        self._values.append(value)
         self.num_elements += 1
 
-        if self.num_elements / self.size > self.load_factor:
+        # Every appended entry fills a slot, empty or deleted, so the entry count bounds the filled slots
+        # and compacting on it also drops the entries left behind by deletions.
+        if len(self._keys) / self.size > self.load_factor:
             self._resize()
 
     def get(self, key):
@@ -95,12 +151,10 @@ class HashTable:
         Raises:
             KeyError: If the key is not found in the hash table.
         """
-        index = self._hash(key)
-        bucket = self.buckets[index]
-        for k, v in bucket:
-            if k == key:
-                return v
-        raise KeyError(f"Key '{key}' not found")
+        _, position = self._lookup(key, self._hash(key))
+        if position < 0:
+            raise KeyError(f"Key '{key}' not found")
+        return self._values[position]
 
     def delete(self, key):
         """
@@ -112,14 +166,13 @@ class HashTable:
         Raises:
             KeyError: If the key is not found in the hash table.
         """
-        index = self._hash(key)
-        bucket = self.buckets[index]
-        for i, (k, v) in enumerate(bucket):
-            if k == key:
-                del bucket[i]
-                self.num_elements -= 1
-                return
-        raise KeyError(f"Key '{key}' not found")
+        slot, position = self._lookup(key, self._hash(key))
+        if position < 0:
+            raise KeyError(f"Key '{key}' not found")
+        self._index[slot] = _DELETED
+        self._keys[position] = _DELETED_KEY
+        self._values[position] = None
+        self.num_elements -= 1
 
     def load(self, json_file):
         """
@@ -134,6 +187,9 @@ class HashTable:
         try:
             with open(json_file, 'r', encoding='utf-8') as file:
                 data = json.load(file)
+                while (len(self._keys) + len(data)) / self.size > self.load_factor:
+                    self.size *= 2
+                self._resize()
                 for key, value in data.items():
                     self.insert(key, value)
         except FileNotFoundError:
@@ -147,20 +203,18 @@ class HashTable:
             json_file (str): The path to the JSON file.
         """
         data = {}
-        for bucket in self.buckets:
-            for key, value in bucket:
-                data[key] = value
+        for key, value in self:
+            data[key] = value
         with open(json_file, 'w') as file:
             json.dump(data, file)
 
     def __iter__(self):
         """
-        Iterates over the key-value pairs in the hash table.
+        Iterates over the key-value pairs in the hash table in insertion order.
 
         Yields:
             Tuple[str, value]: A tuple containing the key and value.
         """
-        for bucket in self.buckets:
-            for key, value in bucket:
+        for key, value in zip(self._keys, self._values):
+            if key is not _DELETED_KEY:
                 yield key, value
-
@@ -0,0 +1,179 @@
+"""
+Benchmark of BatchAnalyzer against scoring every page with its own Analyzer.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_analyzer
+"""
+import random
+import time
+
+from app.analyzer.analyzer import Analyzer
+from app.analyzer.batch import BatchAnalyzer
+from app.analyzer.matcher import KeywordMatcher
+from app.utils.hash_table import HashTable
+
+FILLER = ["компания", "услуги", "Москва", "доставка", "цены", "контакты", "о нас", "главная", "the", "and"]
+
+
+def make_line(rng, keywords, words):
+    """
+    Build one line of text that mixes keywords with filler words.
+
+    Args:
+        rng (random.Random): The random generator.
+        keywords (list): Keywords to sprinkle into the line.
+        words (int): The number of words.
+
+    Returns:
+        str: The line.
+    """
+    return " ".join(rng.choice(keywords).upper() if rng.random() < 0.05 else rng.choice(FILLER)
+                    for _ in range(words))
+
+
+def make_site_pages(keywords, sites, pages_per_site, seed=0):
+    """
+    Build pages of several sites, where the pages of a site share their menu and footer lines.
+
+    Args:
+        keywords (list): Keywords to sprinkle into the pages.
+        sites (int): The number of sites.
+        pages_per_site (int): The number of pages of each site.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list: The text content of every page.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(sites):
+        boilerplate = [make_line(rng, keywords, rng.randint(2, 12)) for _ in range(60)]
+        for _ in range(pages_per_site):
+            body = [make_line(rng, keywords, rng.randint(5, 40)) for _ in range(10)]
+            pages.append("\n".join(boilerplate[:30] + body + boilerplate[30:]) + "\n")
+    return pages
+
+
+def make_distinct_pages(keywords, count, seed=0):
+    """
+    Build pages that share no lines.
+
+    Args:
+        keywords (list): Keywords to sprinkle into the pages.
+        count (int): The number of pages.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list: The text content of every page.
+    """
+    rng = random.Random(seed)
+    return ["\n".join(make_line(rng, keywords, rng.randint(2, 30)) for _ in range(70)) + "\n"
+            for _ in range(count)]
+
+
+def per_page(keywords, matcher, pages):
+    """
+    Score every page with its own Analyzer, as the handlers did.
+
+    Args:
+        keywords (HashTable): The keyword table.
+        matcher (KeywordMatcher): The compiled matcher.
+        pages (list): The text content of every page.
+
+    Returns:
+        tuple: The scores and keyword counts of every page.
+    """
+    scores, frequent_keywords = [], []
+    for page in pages:
+        analyzer = Analyzer(keywords=keywords, matcher=matcher)
+        analyzer.analyze_content(page)
+        scores.append(analyzer.get_score())
+        frequent_keywords.append(analyzer.get_frequent_keywords())
+    return scores, frequent_keywords
+
+
+def batched(batch, pages):
+    """
+    Score all pages with one BatchAnalyzer call.
+
+    Args:
+        batch (BatchAnalyzer): The batch analyzer.
+        pages (list): The text content of every page.
+
+    Returns:
+        tuple: The scores and keyword counts of every page.
+    """
+    batch.analyze_contents(pages)
+    return batch.get_scores(), batch.get_frequent_keywords()
+
+
+def assert_same(expected, actual):
+    """
+    Check that both results hold the same dictionaries in the same order.
+
+    Args:
+        expected (tuple): The per-page results.
+        actual (tuple): The batched results.
+    """
+    assert expected == actual, "batch output differs from per-page Analyzer"
+    for expected_dicts, actual_dicts in zip(expected, actual):
+        for expected_dict, actual_dict in zip(expected_dicts, actual_dicts):
+            assert list(expected_dict.items()) == list(actual_dict.items()), "batch ranking order differs"
+
+
+def check_random_keywords(rounds=300, seed=1):
+    """
+    Check parity on small random keyword sets with overlapping, repeated, empty and multi-line keywords.
+
+    Args:
+        rounds (int, optional): The number of random keyword sets. Defaults to 300.
+        seed (int, optional): Random seed. Defaults to 1.
+    """
+    rng = random.Random(seed)
+    alphabet = "abAB \n"
+    for _ in range(rounds):
+        keywords = {}
+        for _ in range(rng.randint(1, 8)):
+            keyword = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+            keywords[keyword] = rng.choice(["x", "y", "z"])
+        keywords = list(keywords.items())
+        pages = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(rng.randint(0, 6))]
+        matcher = KeywordMatcher(keywords)
+        assert_same(per_page(keywords, matcher, pages), batched(BatchAnalyzer(keywords, matcher=matcher), pages))
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    keywords = HashTable()
+    keywords.load("app/data/data.json")
+    keyword_list = [k for k, _ in keywords]
+    matcher = KeywordMatcher(keywords)
+
+    start = time.perf_counter()
+    batch = BatchAnalyzer(keywords, matcher=matcher)
+    print(f"build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    check_random_keywords()
+    print("parity: random keyword sets ok")
+
+    workloads = [
+        ("50 sites x 10 pages", make_site_pages(keyword_list, 50, 10)),
+        ("10 sites x 100 pages", make_site_pages(keyword_list, 10, 100)),
+        ("500 distinct pages", make_distinct_pages(keyword_list, 500)),
+    ]
+    for name, pages in workloads:
+        per_page_time, expected = timed(lambda: per_page(keywords, matcher, pages), 3)
+        batch_time, actual = timed(lambda: batched(batch, pages), 3)
+        assert_same(expected, actual)
+        print(f"{name:>21}: per page {per_page_time * 1000:8.1f} ms, "
+              f"batch {batch_time * 1000:8.1f} ms, x{per_page_time / batch_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark of the open-addressing HashTable against the original SHA-256 chained implementation.
+
+Measures load time, lookup latency and memory on a generated 100k-key JSON file.
+
+Run from the repository root:
+    python -m benchmarks.bench_hash_table
+"""
+import gc
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from app.utils.hash_table import HashTable
+
+
+class LegacyHashTable:
+    """
+    The original chained HashTable with SHA-256 bucket hashing, kept as the reference implementation.
+    """
+
+    def __init__(self, initial_size=1000, load_factor=0.7):
+        self.size = initial_size
+        self.buckets = [[] for _ in range(initial_size)]
+        self.load_factor = load_factor
+        self.num_elements = 0
+
+    def _hash(self, key):
+        hash_object = hashlib.sha256(key.encode())
+        return int(hash_object.hexdigest(), 16) % self.size
+
+    def _resize(self):
+        self.size *= 2
+        new_buckets = [[] for _ in range(self.size)]
+        for bucket in self.buckets:
+            for key, value in bucket:
+                new_buckets[self._hash(key)].append((key, value))
+        self.buckets = new_buckets
+
+    def insert(self, key, value):
+        bucket = self.buckets[self._hash(key)]
+        for i, (k, v) in enumerate(bucket):
+            if k == key:
+                bucket[i] = (key, value)
+                return
+        bucket.append((key, value))
+        self.num_elements += 1
+        if self.num_elements / self.size > self.load_factor:
+            self._resize()
+
+    def get(self, key):
+        for k, v in self.buckets[self._hash(key)]:
+            if k == key:
+                return v
+        raise KeyError(f"Key '{key}' not found")
+
+    def load(self, json_file):
+        with open(json_file, 'r', encoding='utf-8') as file:
+            for key, value in json.load(file).items():
+                self.insert(key, value)
+
+
+def make_file(path, count, seed=0):
+    """
+    Write a JSON file with `count` keyword-to-topic pairs.
+
+    Args:
+        path (str): The output path.
+        count (int): The number of keys.
+        seed (int, optional): Random seed. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    alphabet = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя "
+    topics = [f"Тема {i}" for i in range(100)]
+    data = {}
+    while len(data) < count:
+        data["".join(rng.choice(alphabet) for _ in range(rng.randint(5, 30)))] = rng.choice(topics)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+
+
+def measure(table_class, path, keys):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = table_class()
+    table.load(path)
+    load_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for key in keys:
+        table.get(key)
+    lookup_time = (time.perf_counter() - start) / len(keys)
+    return load_time, lookup_time, memory
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keys.json")
+        make_file(path, 100_000)
+        with open(path, 'r', encoding='utf-8') as file:
+            keys = list(json.load(file))
+        random.Random(1).shuffle(keys)
+
+        for name, table_class in (("legacy", LegacyHashTable), ("open addressing", HashTable)):
+            load_time, lookup_time, memory = measure(table_class, path, keys)
+            print(f"{name:>16}: load {load_time * 1000:8.1f} ms, "
+                  f"get {lookup_time * 1e9:7.0f} ns, memory {memory / 2 ** 20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark of the compiled KeywordMatcher against the original per-keyword scan in Analyzer.
+
+Run from the repository root:
+    python -m benchmarks.bench_matcher
+"""
+import random
+import time
+
+from app.analyzer.analyzer import Analyzer
+from app.analyzer.matcher import KeywordMatcher
+from app.utils.hash_table import HashTable
+
+
+def legacy_analyze(keywords, content):
+    """
+    The original Analyzer.analyze_content loop, kept as the reference implementation.
+
+    Args:
+        keywords (iterable): (keyword, topic) tuples.
+        content (str): The content to analyze.
+
+    Returns:
+        tuple: Topic scores and keyword counts.
+    """
+    score, frequent_keywords = {}, {}
+    for keyword, topic in keywords:
+        count = content.lower().count(keyword.lower())
+        if topic not in score:
+            score[topic] = 0
+        score[topic] += count
+        if count > 0:
+            if keyword not in frequent_keywords:
+                frequent_keywords[keyword] = 0
+            frequent_keywords[keyword] += count
+    return score, frequent_keywords
+
+
+def make_page(keywords, size, seed=0):
+    """
+    Build a synthetic page that mixes keywords with filler words.
+
+    Args:
+        keywords (list): Keywords to sprinkle into the page.
+        size (int): Approximate page size in characters.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        str: The page text.
+    """
+    rng = random.Random(seed)
+    filler = ["компания", "услуги", "Москва", "доставка", "цены", "контакты", "о нас", "главная", "the", "and"]
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(keywords).upper() if rng.random() < 0.05 else rng.choice(filler)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    keywords = HashTable()
+    keywords.load("app/data/data.json")
+    keyword_list = [k for k, _ in keywords]
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    print(f"build: {len(keyword_list)} keywords, {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for size in (10_000, 100_000, 1_000_000):
+        page = make_page(keyword_list, size)
+        repeat = 3 if size >= 1_000_000 else 10
+        legacy_time, legacy_result = timed(lambda: legacy_analyze(keywords, page), repeat)
+
+        def compiled():
+            analyzer = Analyzer(keywords=keywords, matcher=matcher)
+            analyzer.analyze_content(page)
+            return analyzer.score, analyzer.frequent_keywords
+
+        compiled_time, compiled_result = timed(compiled, repeat)
+        assert legacy_result == compiled_result, "matcher output differs from the legacy loop"
+        assert list(legacy_result[0]) == list(compiled_result[0])
+        assert list(legacy_result[1]) == list(compiled_result[1])
+        print(f"{size:>9} chars: legacy {legacy_time * 1000:9.1f} ms, "
+              f"matcher {compiled_time * 1000:8.1f} ms, x{legacy_time / compiled_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
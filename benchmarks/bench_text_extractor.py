@@ -0,0 +1,103 @@
+"""
+Benchmark of the streaming leaf-div text extractor against the original BeautifulSoup parse_content.
+
+Compares their speed on the pages in benchmarks/corpus and on generated large and deeply nested pages,
+checking that both produce identical text; tests/test_text_extractor.py holds the parity tests.
+
+Run from the repository root:
+    python -m benchmarks.bench_text_extractor
+"""
+import os
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from app.parser.TextExtractor import extract_leaf_div_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def legacy_parse(html_content):
+    """
+    The original ContentParser.parse_content loop, kept as the reference implementation.
+
+    Args:
+        html_content (str): The HTML to parse.
+
+    Returns:
+        str: The text of all leaf divs, one per line.
+    """
+    content = ""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    divs = soup.find_all('div')
+    for div in divs:
+        if not div.find_all('div'):
+            text = div.get_text(strip=True)
+            if text:
+                content += text + '\n'
+    return content
+
+
+def make_flat_page(blocks, seed=0):
+    """
+    Build a page with many sibling blocks of a few nested divs, like a catalog or a news feed.
+
+    Args:
+        blocks (int): The number of blocks.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        str: The page HTML.
+    """
+    rng = random.Random(seed)
+    words = ["купить", "корм", "доставка", "новости", "смартфон", "кредит", "&amp;", "&nbsp;", "цена"]
+    parts = ["<html><head><script>var x = '<div>';</script></head><body>"]
+    for i in range(blocks):
+        text = " ".join(rng.choice(words) for _ in range(8))
+        parts.append(f'<div class="card"><div class="title"><a href="/item/{i}">{text}</a></div>'
+                     f'<div class="body"><p>{text}<br>{text}</p><span>{i}</span></div></div>')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def make_deep_page(depth, width):
+    """
+    Build a page of nested divs, the worst case for the per-div descendant search of the original code.
+
+    Args:
+        depth (int): The nesting depth of each chain.
+        width (int): The number of chains.
+
+    Returns:
+        str: The page HTML.
+    """
+    chain = "".join(f"<div>level {level} <span>text</span>" for level in range(depth)) + "</div>" * depth
+    return "<html><body>" + chain * width + "</body></html>"
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    pages = []
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+            pages.append((name, f.read(), 50))
+    pages.append(("flat, 2000 cards", make_flat_page(2000), 3))
+    pages.append(("deep, 30 x 100 levels", make_deep_page(100, 30), 1))
+
+    for name, page, repeat in pages:
+        legacy_time, legacy_result = timed(lambda: legacy_parse(page), repeat)
+        fast_time, fast_result = timed(lambda: extract_leaf_div_text(page), repeat)
+        assert legacy_result == fast_result, f"extractor output differs from BeautifulSoup on {name}"
+        print(f"{name:>24} ({len(page) // 1024:>5} KiB): beautifulsoup {legacy_time * 1000:9.1f} ms, "
+              f"extractor {fast_time * 1000:8.1f} ms, x{legacy_time / fast_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.parser.AsyncLinkParser import AsyncLinkParser
+from app.parser.FetchPolicy import FetchPolicy
+
+FAST_PAGES = [f"/fast{i}" for i in range(6)]
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves a start page linking to one slow page and several fast ones.
+
+    The slow page only answers once the last fast page was requested, or after two seconds.
+    """
+
+    def do_GET(self):
+        if self.path == "/":
+            links = "".join(f'<a href="{path}">{path}</a>' for path in ["/slow"] + FAST_PAGES)
+        else:
+            links = ""
+        if self.path == "/slow":
+            self.server.last_fast_requested.wait(2)
+        if self.path == FAST_PAGES[-1]:
+            self.server.last_fast_requested.set()
+        data = f"<html><body>{links}</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingSession(requests.Session):
+    """A session recording whether it was closed."""
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+@pytest.fixture
+def site():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    httpd.last_fast_requested = threading.Event()
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_slow_page_does_not_hold_up_the_others(site):
+    parser = AsyncLinkParser(concurrency=2, per_host=2, policy=FetchPolicy(retries=0))
+
+    started = time.monotonic()
+    parser.crawl(site + "/", max_pages=20)
+
+    assert time.monotonic() - started < 1.5
+    assert sorted(parser.site_links) == sorted(site + path for path in ["/slow"] + FAST_PAGES)
+
+
+def test_shared_session_is_left_open(site):
+    session = CountingSession()
+    parser = AsyncLinkParser(concurrency=4, policy=FetchPolicy(retries=0), session=session)
+
+    parser.crawl(site + "/", max_pages=20)
+
+    assert len(parser.site_links) == 1 + len(FAST_PAGES)
+    assert not session.closed
+    session.close()
@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+
+from app.parser.BrowserPool import BrowserPool, BrowserPoolTimeout
+
+
+class FakeDriver:
+    """A stand-in for a WebDriver that can be made unresponsive."""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_calls = 0
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise ConnectionError("browser is gone")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class FakeFactory:
+    """A driver factory recording every driver it creates."""
+
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+
+def test_sessions_are_reused():
+    factory = FakeFactory()
+    pool = BrowserPool(max_size=2, driver_factory=factory)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+
+    assert first is second
+    assert len(factory.drivers) == 1
+    assert pool.live == 1 and pool.in_use() == 0
+
+
+def test_checkout_times_out_when_all_sessions_are_busy():
+    pool = BrowserPool(max_size=1, driver_factory=FakeFactory())
+    session = pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(BrowserPoolTimeout):
+        pool.acquire(timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+
+    pool.release(session)
+    assert pool.acquire(timeout=0.1) is session
+
+
+def test_waiting_checkout_gets_released_session():
+    pool = BrowserPool(max_size=1, driver_factory=FakeFactory())
+    session = pool.acquire()
+    timer = threading.Timer(0.05, pool.release, (session,))
+    timer.start()
+
+    assert pool.acquire(timeout=5) is session
+    timer.join()
+
+
+def test_unhealthy_idle_session_is_replaced_on_checkout():
+    factory = FakeFactory()
+    pool = BrowserPool(max_size=1, driver_factory=factory)
+    with pool.session():
+        pass
+    factory.drivers[0].alive = False
+
+    with pool.session() as driver:
+        assert driver is factory.drivers[1]
+
+    assert factory.drivers[0].quit_calls == 1
+    assert pool.restarts == 1
+    assert pool.live == 1
+
+
+def test_session_crashing_during_use_is_replaced():
+    factory = FakeFactory()
+    pool = BrowserPool(max_size=1, driver_factory=factory)
+
+    with pytest.raises(RuntimeError):
+        with pool.session() as driver:
+            driver.alive = False
+            raise RuntimeError("page crashed")
+
+    assert factory.drivers[0].quit_calls == 1
+    assert pool.restarts == 1 and pool.live == 0
+    with pool.session() as driver:
+        assert driver is factory.drivers[1]
+
+
+def test_failed_page_on_healthy_session_keeps_it():
+    factory = FakeFactory()
+    pool = BrowserPool(max_size=1, driver_factory=factory)
+
+    with pytest.raises(ValueError):
+        with pool.session():
+            raise ValueError("bad page")
+
+    assert factory.drivers[0].quit_calls == 0
+    assert pool.restarts == 0 and pool.live == 1
+
+
+def test_session_is_recycled_after_max_pages():
+    factory = FakeFactory()
+    pool = BrowserPool(max_size=1, max_pages=3, driver_factory=factory)
+
+    for _ in range(3):
+        with pool.session() as driver:
+            assert driver is factory.drivers[0]
+    assert factory.drivers[0].quit_calls == 1
+    assert pool.live == 0 and pool.restarts == 0
+
+    with pool.session() as driver:
+        assert driver is factory.drivers[1]
+
+
+def test_failed_driver_creation_frees_the_slot():
+    def broken_factory():
+        raise OSError("chromedriver not found")
+
+    pool = BrowserPool(max_size=1, driver_factory=broken_factory)
+    with pytest.raises(OSError):
+        pool.acquire(timeout=0.1)
+    assert pool.live == 0
+
+    pool.driver_factory = FakeFactory()
+    pool.release(pool.acquire(timeout=0.1))
+
+
+def test_close_quits_idle_sessions_and_rejects_checkouts():
+    factory = FakeFactory()
+    pool = BrowserPool(max_size=2, driver_factory=factory)
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    assert idle.driver.quit_calls == 1
+    assert busy.driver.quit_calls == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=0.1)
+
+    pool.release(busy)
+    assert busy.driver.quit_calls == 1
+    assert pool.live == 0
+
+
+def test_close_wakes_waiting_checkouts():
+    pool = BrowserPool(max_size=1, driver_factory=FakeFactory())
+    pool.acquire()
+    errors = []
+
+    def wait_for_session():
+        try:
+            pool.acquire(timeout=5)
+        except Exception as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait_for_session)
+    waiter.start()
+    time.sleep(0.05)
+    pool.close()
+    waiter.join(1)
+
+    assert not waiter.is_alive()
+    assert len(errors) == 1 and isinstance(errors[0], RuntimeError)
@@ -0,0 +1,84 @@
+import json
+
+import requests
+
+from app.handlers.bulk import Checkpoint, RowWriter, is_transient
+from app.parser.FetchPolicy import CircuitOpen
+
+COLUMNS = ["row", "url", "error"]
+
+
+def open_job(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "out.jsonl.checkpoint"))
+    writer = RowWriter(str(tmp_path / "out.jsonl"), "jsonl", COLUMNS, checkpoint.offset)
+    return checkpoint, writer
+
+
+def read_rows(tmp_path):
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_truncates_rows_written_after_the_last_mark(tmp_path):
+    checkpoint, writer = open_job(tmp_path)
+    for sequence in (1, 0):
+        checkpoint.mark(sequence, writer.write({"row": sequence, "url": f"http://{sequence}.test/"}))
+    # A crash between writing the row of 2 and logging it.
+    writer.write({"row": 2, "url": "http://2.test/"})
+    writer.close()
+    checkpoint.close()
+
+    checkpoint, writer = open_job(tmp_path)
+    assert checkpoint.completed == 2 and checkpoint.watermark == 2
+    assert [checkpoint.is_done(sequence) for sequence in range(3)] == [True, True, False]
+    checkpoint.mark(2, writer.write({"row": 2, "url": "http://2.test/"}))
+    writer.close()
+    checkpoint.close()
+
+    assert [row["row"] for row in read_rows(tmp_path)] == [1, 0, 2]
+
+
+def test_cut_off_checkpoint_line_redoes_its_row(tmp_path):
+    checkpoint, writer = open_job(tmp_path)
+    checkpoint.mark(0, writer.write({"row": 0, "url": "http://0.test/"}))
+    writer.close()
+    checkpoint.close()
+    with open(tmp_path / "out.jsonl.checkpoint", "a", encoding="utf-8") as f:
+        f.write('{"seq": 1, "off')
+
+    checkpoint = Checkpoint(str(tmp_path / "out.jsonl.checkpoint"))
+    assert checkpoint.completed == 1 and not checkpoint.is_done(1)
+    checkpoint.close()
+
+
+def test_deferred_urls_do_not_hold_the_watermark_back(tmp_path):
+    checkpoint, writer = open_job(tmp_path)
+    checkpoint.defer(0)
+    for sequence in range(1, 100):
+        checkpoint.mark(sequence, writer.write({"row": sequence, "url": f"http://{sequence}.test/"}))
+    assert checkpoint.watermark == 100 and not checkpoint._done
+    writer.close()
+    checkpoint.close()
+
+    checkpoint, writer = open_job(tmp_path)
+    assert checkpoint.retry == {0} and checkpoint.completed == 99
+    assert not checkpoint.is_done(0) and checkpoint.is_done(1)
+    checkpoint.mark(0, writer.write({"row": 0, "url": "http://0.test/"}))
+    writer.close()
+    checkpoint.close()
+
+    checkpoint = Checkpoint(str(tmp_path / "out.jsonl.checkpoint"))
+    assert checkpoint.retry == set() and checkpoint.completed == 100 and checkpoint.is_done(0)
+    checkpoint.close()
+    assert len(read_rows(tmp_path)) == 100
+
+
+def test_transient_errors():
+    response = requests.Response()
+    response.status_code = 503
+    assert is_transient(requests.Timeout("read timed out"))
+    assert is_transient(CircuitOpen("example.test"))
+    assert is_transient(requests.HTTPError("503", response=response))
+    response.status_code = 404
+    assert not is_transient(requests.HTTPError("404", response=response))
+    assert not is_transient(RuntimeError("boom"))
@@ -0,0 +1,66 @@
+import pytest
+import requests
+
+from app.parser.ContentParser import ContentParser
+from app.parser.HttpFetcher import HttpFetcher
+
+SERVER_RENDERED = "<html><body><div>" + "Server-rendered text. " * 20 + "</div></body></html>"
+JS_SHELL = "<html><body><div id='root'></div><script>render()</script></body></html>"
+
+
+class StubFetcher(HttpFetcher):
+    """An HttpFetcher answering every GET with the next of the given (status, body) pairs."""
+
+    def __init__(self, *answers):
+        super().__init__()
+        self.answers = list(answers)
+
+    def get(self, url, etag=None, last_modified=None):
+        status, body = self.answers.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        response._content = body.encode()
+        return response
+
+
+def fetch(fetcher, url):
+    p = ContentParser(url, fetcher=fetcher)
+    p.renders = 0
+
+    def fetch_browser():
+        p.renders += 1
+        p.html_content = SERVER_RENDERED
+
+    p.fetch_browser = fetch_browser
+    p.fetch_content()
+    return p
+
+
+@pytest.mark.parametrize("status", [403, 404, 429, 500, 503])
+def test_error_status_is_an_error_not_a_javascript_shell(status):
+    fetcher = StubFetcher((status, "<html><body>Error</body></html>"))
+
+    p = fetch(fetcher, "http://example.test/missing")
+
+    assert p.renders == 0 and p.html_content is None
+    assert isinstance(p.error, requests.HTTPError)
+    assert fetcher.get_strategy("http://example.test/other") is None
+
+
+def test_javascript_shell_is_rendered_and_remembered():
+    fetcher = StubFetcher((200, JS_SHELL))
+
+    p = fetch(fetcher, "http://example.test/app")
+
+    assert p.renders == 1 and p.html_content == SERVER_RENDERED
+    assert fetcher.get_strategy("http://example.test/other") == HttpFetcher.BROWSER
+
+
+def test_server_rendered_page_is_remembered_as_http():
+    fetcher = StubFetcher((200, SERVER_RENDERED))
+
+    p = fetch(fetcher, "http://example.test/page")
+
+    assert p.renders == 0 and p.fetched_with == HttpFetcher.HTTP
+    assert fetcher.get_strategy("http://example.test/other") == HttpFetcher.HTTP
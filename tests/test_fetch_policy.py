@@ -0,0 +1,166 @@
+import pytest
+import requests
+
+from app.parser.FetchPolicy import CircuitOpen, DeadlineExceeded, FetchPolicy
+
+
+class Answer:
+    """A stand-in for a response with a status code."""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    """A clock that only moves when slept on, recording the sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_policy(clock, **kwargs):
+    return FetchPolicy(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_retryable_errors_are_retried_a_bounded_number_of_times():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=2)
+    attempts = []
+
+    def attempt(timeout):
+        attempts.append(timeout)
+        raise requests.ConnectionError("refused")
+
+    with pytest.raises(requests.ConnectionError):
+        policy.call("http://a.test/", attempt)
+
+    assert len(attempts) == 3 and len(clock.sleeps) == 2
+    assert policy.host_stats()["a.test"] == {"attempts": 3, "errors": 3, "rejected": 0}
+
+
+def test_retries_stop_at_the_deadline():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=10, deadline=5, backoff=4, max_backoff=4, read_timeout=10)
+    timeouts = []
+
+    def attempt(timeout):
+        timeouts.append(timeout)
+        clock.now += 1
+        raise requests.Timeout("read timed out")
+
+    with pytest.raises(DeadlineExceeded):
+        policy.call("http://a.test/", attempt)
+
+    assert len(timeouts) < 11 and sum(clock.sleeps) < 5
+    assert timeouts[0] == (5, 5)
+
+    clock, answers = FakeClock(), []
+    policy = make_policy(clock, retries=10, deadline=5, backoff=4, max_backoff=4)
+
+    def answer(timeout):
+        clock.now += 2
+        answers.append(Answer(503))
+        return answers[-1]
+
+    assert policy.call("http://b.test/", answer) is answers[-1]
+    assert not answers[-1].closed and all(a.closed for a in answers[:-1])
+
+
+def test_circuit_opens_after_consecutive_host_failures():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=0, failure_threshold=3, reset_timeout=30)
+
+    for _ in range(3):
+        assert policy.call("http://a.test/", lambda timeout: Answer(502)).status_code == 502
+
+    assert policy.is_open("http://a.test/") and policy.open_circuits() == ["a.test"]
+    with pytest.raises(CircuitOpen):
+        policy.call("http://a.test/x", lambda timeout: Answer(200))
+    assert policy.host_stats()["a.test"]["rejected"] == 1
+    assert policy.call("http://b.test/", lambda timeout: Answer(200)).status_code == 200
+
+
+def test_single_trial_after_reset_timeout():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=0, failure_threshold=1, reset_timeout=30)
+    policy.call("http://a.test/", lambda timeout: Answer(503))
+
+    clock.now += 29
+    with pytest.raises(CircuitOpen):
+        policy.call("http://a.test/", lambda timeout: Answer(200))
+
+    clock.now += 1
+    concurrent = []
+
+    def trial(timeout):
+        with pytest.raises(CircuitOpen):
+            policy.call("http://a.test/other", lambda timeout: Answer(200))
+        concurrent.append(True)
+        return Answer(200)
+
+    assert policy.call("http://a.test/", trial).status_code == 200
+    assert concurrent == [True] and not policy.is_open("http://a.test/")
+
+    policy.call("http://a.test/", lambda timeout: Answer(503))
+    clock.now += 30
+
+    def failed_trial(timeout):
+        raise requests.ConnectionError("refused")
+
+    with pytest.raises(requests.ConnectionError):
+        policy.call("http://a.test/", failed_trial)
+    assert policy.is_open("http://a.test/")
+
+
+def test_client_errors_do_not_count_as_host_failures():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=2, failure_threshold=2)
+
+    for _ in range(5):
+        assert policy.call("http://a.test/", lambda timeout: Answer(404)).status_code == 404
+
+    assert not policy.is_open("http://a.test/") and clock.sleeps == []
+    assert policy.host_stats()["a.test"] == {"attempts": 5, "errors": 0, "rejected": 0}
+
+
+def test_retry_after_replaces_the_backoff():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=2, deadline=30, max_backoff=1)
+    answers = iter([Answer(429, {"Retry-After": "3"}), Answer(200)])
+
+    assert policy.call("http://a.test/", lambda timeout: next(answers)).status_code == 200
+    assert clock.sleeps == [3]
+
+
+def test_retry_after_beyond_the_deadline_returns_the_answer():
+    clock = FakeClock()
+    policy = make_policy(clock, retries=2, deadline=30)
+    busy = Answer(503, {"Retry-After": "120"})
+
+    assert policy.call("http://a.test/", lambda timeout: busy) is busy
+    assert clock.sleeps == [] and not busy.closed
+
+
+def test_hosts_beyond_counted_hosts_share_a_monotonic_other_counter():
+    policy = FetchPolicy(retries=0, counted_hosts=2)
+
+    for host in ("a.test", "b.test", "c.test", "d.test", "a.test", "c.test"):
+        policy.call(f"http://{host}/", lambda timeout: Answer(200))
+
+    stats = policy.host_stats()
+    assert set(stats) == {"a.test", "b.test", "other"}
+    assert stats["a.test"]["attempts"] == 2
+    assert stats["other"]["attempts"] == 3
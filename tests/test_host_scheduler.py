@@ -0,0 +1,173 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.HostScheduler import HostScheduler
+from app.parser.HttpFetcher import HttpFetcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves robots.txt and pages from the settings of its server, recording every request path."""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == "/robots.txt":
+            if self.server.robots is None:
+                self._reply(404)
+            else:
+                self._reply(200, self.server.robots)
+            return
+        statuses = self.server.statuses.get(self.path)
+        if statuses:
+            status, headers = statuses.pop(0)
+            self._reply(status, "slow down", headers)
+            return
+        self._reply(200, "<html><body>page</body></html>")
+
+    def _reply(self, status, body="", headers=None):
+        data = body.encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeClock:
+    """A clock that only advances when slept on, recording every sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.requests, httpd.robots, httpd.statuses = [], None, {}
+    httpd.origin = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_fetcher(scheduler, retries=0):
+    return HttpFetcher(scheduler=scheduler, policy=FetchPolicy(retries=retries, backoff=0))
+
+
+def test_requests_are_paced_by_the_token_bucket(server, clock):
+    scheduler = HostScheduler(rate=2, burst=2, respect_robots=False, clock=clock, sleep=clock.sleep)
+    fetcher = make_fetcher(scheduler)
+
+    for i in range(4):
+        assert fetcher.get(f"{server.origin}/page{i}").status_code == 200
+
+    assert clock.sleeps == [0.5, 0.5]
+    assert server.requests == [f"/page{i}" for i in range(4)]
+
+
+def test_origins_have_separate_buckets(server, clock):
+    scheduler = HostScheduler(rate=1, burst=1, respect_robots=False, clock=clock, sleep=clock.sleep)
+
+    assert scheduler.acquire(server.origin + "/a") == 0
+    assert scheduler.acquire("http://other.test/a") == 0
+    assert scheduler.acquire(server.origin + "/b") == 1
+
+
+def test_robots_crawl_delay_slows_the_origin_down(server, clock):
+    server.robots = "User-agent: *\nCrawl-delay: 3\nDisallow: /private\n"
+    scheduler = HostScheduler(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+    fetcher = make_fetcher(scheduler)
+
+    assert not scheduler.allowed(server.origin + "/private/page")
+    assert scheduler.allowed(server.origin + "/public")
+    for path in ("/a", "/b", "/c"):
+        fetcher.get(server.origin + path)
+
+    assert clock.sleeps == [3, 3]
+    assert server.requests.count("/robots.txt") == 1
+
+
+def test_robots_are_fetched_again_after_their_ttl(server, clock):
+    server.robots = "User-agent: *\nDisallow: /private\n"
+    scheduler = HostScheduler(robots_ttl=60, clock=clock, sleep=clock.sleep)
+
+    assert not scheduler.allowed(server.origin + "/private")
+    server.robots = "User-agent: *\nDisallow:\n"
+    assert not scheduler.allowed(server.origin + "/private")
+    clock.now += 61
+    assert scheduler.allowed(server.origin + "/private")
+    assert server.requests.count("/robots.txt") == 2
+
+
+def test_missing_robots_allows_everything(server, clock):
+    scheduler = HostScheduler(clock=clock, sleep=clock.sleep)
+
+    assert scheduler.allowed(server.origin + "/anything")
+
+
+def test_429_pauses_the_origin_for_retry_after(server, clock):
+    server.statuses["/limited"] = [(429, {"Retry-After": "4"})]
+    scheduler = HostScheduler(rate=10, burst=5, respect_robots=False, clock=clock, sleep=clock.sleep)
+    fetcher = make_fetcher(scheduler, retries=1)
+
+    response = fetcher.get(server.origin + "/limited")
+
+    assert response.status_code == 200
+    assert server.requests == ["/limited", "/limited"]
+    assert clock.sleeps == [pytest.approx(4)]
+
+
+def test_429_without_retry_after_waits_one_token(server, clock):
+    server.statuses["/limited"] = [(429, {})]
+    scheduler = HostScheduler(rate=2, burst=5, respect_robots=False, clock=clock, sleep=clock.sleep)
+
+    assert make_fetcher(scheduler).get(server.origin + "/limited").status_code == 429
+    assert scheduler.acquire(server.origin + "/next") == pytest.approx(0.5)
+
+
+def test_prepaid_slots_let_acquire_return_at_once(clock):
+    scheduler = HostScheduler(rate=20, burst=2, respect_robots=False, clock=clock, sleep=clock.sleep)
+    url = "http://example.test/page"
+
+    async def prepay(times):
+        for _ in range(times):
+            await scheduler.prepay_async(url)
+
+    asyncio.run(prepay(3))
+    assert scheduler.acquire(url) == 0
+    assert scheduler.acquire(url) == 0
+    assert clock.sleeps == []
+    # Only `burst` slots are kept, so the third prepaid slot was dropped.
+    assert scheduler.acquire(url) > 0
+
+
+def test_backoff_drops_prepaid_slots(clock):
+    scheduler = HostScheduler(rate=1, burst=1, respect_robots=False, clock=clock, sleep=clock.sleep)
+    url = "http://example.test/page"
+
+    asyncio.run(scheduler.prepay_async(url))
+    scheduler.backoff(url, 5)
+
+    assert scheduler.acquire(url) == pytest.approx(5)
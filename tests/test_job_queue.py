@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from app.utils.JobQueue import JobQueue, LeaseLost
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def test_recover_leaves_jobs_with_a_live_lease_alone(db_file):
+    running, restarted = JobQueue(db_file), JobQueue(db_file)
+    job_id = running.submit("check_urls", {"urls": []})
+    running.claim()
+    running.add_results(job_id, 0, ["first"])
+
+    assert restarted.recover() == 0
+    assert restarted.get(job_id)["status"] == "running"
+    running.add_results(job_id, 1, ["second"])
+    assert running.get_results(job_id) == ["first", "second"]
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_stops(db_file):
+    stopped, restarted = JobQueue(db_file, lease=0.01), JobQueue(db_file)
+    job_id = stopped.submit("check_urls", {"urls": []})
+    stopped.claim()
+    stopped.add_results(job_id, 0, ["partial"])
+    time.sleep(0.02)
+
+    assert restarted.recover() == 1
+    assert restarted.get_results(job_id) == []
+    assert restarted.claim()["id"] == job_id
+    with pytest.raises(LeaseLost):
+        stopped.add_results(job_id, 1, ["late"])
+    stopped.finish(job_id)
+    assert restarted.get(job_id)["status"] == "running"
+
+
+def test_cancel_stops_the_owner_on_its_next_write(db_file):
+    owner, api = JobQueue(db_file), JobQueue(db_file)
+    job_id = owner.submit("check_urls", {"urls": []})
+    owner.claim()
+    owner.add_results(job_id, 0, ["kept"])
+
+    assert api.cancel(job_id)
+    with pytest.raises(LeaseLost):
+        owner.add_results(job_id, 1, ["dropped"])
+    with pytest.raises(LeaseLost):
+        owner.renew(job_id)
+    assert api.get_results(job_id) == ["kept"]
+    assert api.get(job_id)["progress"]["done"] == 1
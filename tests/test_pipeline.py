@@ -0,0 +1,43 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.handlers.execution import BoundedPool
+from app.handlers.pipeline import BatchPipeline
+
+
+def make_pipeline(pool):
+    async def lookup(url):
+        return await pool.run(str.upper, url)
+
+    return BatchPipeline(fetch=None, parse=None, analyze=None, lookup=lookup, concurrency=4)
+
+
+def test_run_keeps_a_large_batch_within_the_pool_queue():
+    executor = ThreadPoolExecutor(2)
+    pool = BoundedPool("cache", executor, workers=2, max_queue=8)
+    urls = [f"http://example.test/{i}" for i in range(100)]
+
+    try:
+        results = asyncio.run(make_pipeline(pool).run(urls + urls[:10]))
+    finally:
+        executor.shutdown()
+
+    assert results == [url.upper() for url in urls + urls[:10]]
+    assert pool.rejected == 0
+
+
+def test_stream_keeps_a_large_batch_within_the_pool_queue():
+    executor = ThreadPoolExecutor(2)
+    pool = BoundedPool("cache", executor, workers=2, max_queue=8)
+    urls = [f"http://example.test/{i}" for i in range(100)]
+
+    async def collect():
+        return [(index, result, error) async for index, _, result, error in make_pipeline(pool).stream(urls)]
+
+    try:
+        lines = asyncio.run(collect())
+    finally:
+        executor.shutdown()
+
+    assert sorted(lines) == [(i, url.upper(), None) for i, url in enumerate(urls)]
+    assert pool.rejected == 0
@@ -0,0 +1,36 @@
+from app.parser.BrowserPool import BrowserPool
+from app.parser.FetchPolicy import FetchPolicy
+from app.parser.SeleniumLinkParser import SeleniumLinkParser
+
+PAGES = {
+    "http://site.test/": '<a href="/a">a</a><a href="/b">b</a>',
+    "http://site.test/a": '<a href="/c">c</a>',
+    "http://site.test/b": '<a href="/d">d</a>',
+}
+
+
+class FakeDriver:
+    """A stand-in for a WebDriver rendering pages from a dict."""
+
+    current_url = "about:blank"
+    page_source = ""
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def get(self, url):
+        self.page_source = f"<html><body>{PAGES.get(url, '')}</body></html>"
+
+    def quit(self):
+        pass
+
+
+def test_pooled_crawl_keeps_the_links_of_every_page():
+    parser = SeleniumLinkParser(pool=BrowserPool(max_size=1, driver_factory=FakeDriver),
+                                policy=FetchPolicy(retries=0))
+
+    parser.crawl("http://site.test/", max_pages=10)
+    assert parser.site_links == [f"http://site.test/{path}" for path in "abcd"]
+
+    parser.crawl("http://site.test/a", max_pages=10)
+    assert parser.site_links == ["http://site.test/c"]
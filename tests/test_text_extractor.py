@@ -0,0 +1,65 @@
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.parser.TextExtractor import extract_leaf_div_text
+
+PAGES = {
+    "news": """<!DOCTYPE html>
+<html><head><title>Новости</title><style>div { color: red }</style>
+<script>document.write('<div>not text</div>');</script></head>
+<body>
+<div class="header"><div class="logo"><a href="/">Новости&nbsp;дня</a></div><div class="menu">
+<a href="/a">Политика</a> <a href="/b">Экономика</a></div></div>
+<div class="article"><div class="title"><h1>Курс рубля &amp; нефть</h1></div>
+<div class="body"><p>Первый абзац.<br>Второй&#160;абзац &lt;важно&gt;.</p><!-- comment --></div></div>
+<div class="footer">  © 2024  </div>
+</body></html>""",
+    "shop": """<html><body>
+<DIV class="card"><Div class="name">Корм для кошек</DIV><div class="price">199 &#8381;</div></div>
+<div class="card"><div class="name"><img src="x.png" alt="img">Смартфон</div><div class="price"></div></div>
+<div class="empty"> </div><div/><div>after self-closing</div>
+<template><div>template text</div></template>
+</body></html>""",
+    "malformed": """<html><body>
+<div><p>unclosed paragraph<div>inner <b>bold <i>italic</b> tail</i></div>
+<div>unclosed div<span>span text
+<table><tr><td><div>cell</div></td></tr></table>
+</div></div></p></div></div>
+<div>entities: &bogus; &#65; &#150; a&b x < y<![CDATA[cdata]]></div>
+<div><rt>ruby</rt></br>broken br</div>
+""",
+    "deep": "<html><body>" + "".join(f"<div>level {i} <span>text</span>" for i in range(40)) + "</div>" * 40
+            + "</body></html>",
+}
+
+TAG_SOUP_TOKENS = ["<div>", "</div>", "<div/>", "<DIV class='x'>", "</Div>", "<p>", "</p>", "<span>", "</span>",
+                   "<br>", "<br/>", "<img src=x>", "<script>s()</script>", "<style>a{}</style>", "<template>",
+                   "</template>", "<rt>", "</rt>", "</br>", "<!-- c -->", "<![CDATA[cd]]>", "</td>", "<b>", "</b>",
+                   "&amp;", "&lt;", "&#65;", "&#150;", "&nbsp;", "&bogus;", " ", "\n", "  text ", "слово", "a&b",
+                   "x < y"]
+
+
+def reference_text(html_content):
+    """The original BeautifulSoup parse_content loop, which the extractor must match."""
+    content = ""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for div in soup.find_all('div'):
+        if not div.find_all('div'):
+            text = div.get_text(strip=True)
+            if text:
+                content += text + '\n'
+    return content
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_extractor_matches_beautifulsoup_on_fixed_pages(name):
+    assert extract_leaf_div_text(PAGES[name]) == reference_text(PAGES[name])
+
+
+def test_extractor_matches_beautifulsoup_on_tag_soup():
+    rng = random.Random(0)
+    for _ in range(500):
+        soup = "".join(rng.choice(TAG_SOUP_TOKENS) for _ in range(rng.randint(1, 60)))
+        assert extract_leaf_div_text(soup) == reference_text(soup), soup
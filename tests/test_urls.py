@@ -0,0 +1,34 @@
+from app.parser.urls import canonicalize
+
+
+def test_spellings_of_the_same_page_compare_equal():
+    assert canonicalize("HTTP://Example.COM:80/a/?utm_source=x&b=2&a=1#top") == "http://example.com/a?a=1&b=2"
+
+
+def test_ipv6_host_keeps_its_brackets():
+    assert canonicalize("http://[::1]:8080/a") == "http://[::1]:8080/a"
+    assert canonicalize("https://[2001:DB8::1]:443/") == "https://[2001:db8::1]/"
+
+
+def test_escaped_unreserved_characters_are_decoded():
+    assert canonicalize("http://example.com/%7euser/%41") == "http://example.com/~user/A"
+
+
+def test_escaped_reserved_characters_stay_escaped():
+    assert canonicalize("http://example.com/a%2fb") == "http://example.com/a%2Fb"
+    assert canonicalize("http://example.com/a%2Fb") != canonicalize("http://example.com/a/b")
+
+
+def test_characters_outside_the_path_alphabet_are_encoded():
+    assert canonicalize("http://example.com/a b/é/100%") == "http://example.com/a%20b/%C3%A9/100%25"
+    assert canonicalize("http://example.com/%c3%a9") == "http://example.com/%C3%A9"
+
+
+def test_lowercase_path_rule_keeps_escapes_uppercase():
+    rules = {"example.com": {"lowercase_path": True, "strip_www": True}}
+    assert canonicalize("http://www.example.com/A%2fB", rules) == "http://example.com/a%2Fb"
+
+
+def test_non_http_urls_are_rejected():
+    assert canonicalize("mailto:someone@example.com") is None
+    assert canonicalize("http://[::1/") is None